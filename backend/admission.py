@@ -0,0 +1,188 @@
+"""
+Admission control and statement timeouts per route class.
+
+Every /api route belongs to a class: `interactive` (the default: fault
+reporting, the repair workflow, lists), `report` (on-screen and Excel reports,
+full listings, /batch) or `bulk` (imports, bulk assign/approve). Each class
+has its own concurrency limit, a bounded wait queue, an optional per-client
+limit and a PostgreSQL statement_timeout, so a few long report requests
+cannot take every pool connection away from POST /faults.
+
+Requests are admitted in the event loop before any dependency touches the
+database, so queued requests hold neither a thread nor a connection. When a
+class is saturated the caller gets an immediate 503 (queue full or queue
+wait timed out), or a 429 when that client already has its share of the
+class running; both carry Retry-After. Limits are per worker process.
+"""
+
+import asyncio
+import math
+import os
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from metrics import ADMISSION_ACTIVE, ADMISSION_QUEUED, ADMISSION_REJECTED
+from request_context import current_scope, timed
+
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+DEFAULT_CLASS = "interactive"
+
+# name: (concurrency, queue, per_client, statement_timeout_ms, queue_timeout_s, expected_seconds)
+DEFAULTS = {
+    "interactive": (32, 128, 0, 10000, 5, 0.05),
+    # Two per client, so a second tab can load the Reports page while the first is running
+    "report": (2, 4, 2, 120000, 30, 5),
+    "bulk": (1, 2, 1, 300000, 30, 20),
+}
+
+
+def setting(name: str, key: str, default: float) -> float:
+    return float(os.environ.get(f"ADMISSION_{name.upper()}_{key}", default))
+
+
+def admission_class(name: Optional[str]):
+    """Assign a route handler to a class; None exempts it (health and readiness probes)."""
+    def decorator(endpoint):
+        endpoint.admission_class = name
+        return endpoint
+    return decorator
+
+
+class RouteClass:
+    def __init__(self, name: str, concurrency: int, queue: int, per_client: int, statement_timeout_ms: int,
+                 queue_timeout_s: float, expected_seconds: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.per_client = per_client
+        self.statement_timeout_ms = statement_timeout_ms
+        self.queue_timeout_s = queue_timeout_s
+        # Moving average of time in the class; drives Retry-After
+        self.average_seconds = expected_seconds
+        self.active = 0
+        self.waiting = 0
+        self._clients: Counter = Counter()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_env(cls, name: str, defaults: tuple) -> "RouteClass":
+        concurrency, queue, per_client, timeout_ms, queue_timeout_s, expected = defaults
+        return cls(name, int(setting(name, "CONCURRENCY", concurrency)), int(setting(name, "QUEUE", queue)),
+                   int(setting(name, "PER_CLIENT", per_client)), int(setting(name, "STATEMENT_TIMEOUT_MS", timeout_ms)),
+                   setting(name, "QUEUE_TIMEOUT_S", queue_timeout_s), expected)
+
+    def retry_after(self) -> int:
+        slots = self.concurrency or 1
+        return max(1, min(300, math.ceil(self.average_seconds * (self.waiting + 1) / slots)))
+
+    def reject(self, status_code: int, reason: str, detail: str):
+        ADMISSION_REJECTED.inc(route_class=self.name, reason=reason)
+        raise HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": str(self.retry_after())})
+
+    async def acquire(self, client: Optional[str]):
+        if self.per_client and client is not None and self._clients[client] >= self.per_client:
+            self.reject(429, "per_client", f"Too many concurrent {self.name} requests for this client")
+        if self.concurrency:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+            if self._semaphore.locked() and self.waiting >= self.queue:
+                self.reject(503, "queue_full", f"Server is busy with {self.name} requests")
+        # Queued requests count towards the client's share, so one client cannot fill the queue either
+        self._add_client(client, 1)
+        if self.concurrency:
+            self.waiting += 1
+            ADMISSION_QUEUED.inc(route_class=self.name)
+            try:
+                with timed("queue"):
+                    await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout_s)
+            except BaseException as e:
+                self._add_client(client, -1)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.reject(503, "queue_timeout", f"Timed out waiting for a free {self.name} slot")
+                raise
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUED.dec(route_class=self.name)
+        self.active += 1
+        ADMISSION_ACTIVE.inc(route_class=self.name)
+
+    def _add_client(self, client: Optional[str], delta: int):
+        if client is None:
+            return
+        self._clients[client] += delta
+        if not self._clients[client]:
+            del self._clients[client]
+
+    def release(self, client: Optional[str], seconds: float):
+        self.active -= 1
+        ADMISSION_ACTIVE.dec(route_class=self.name)
+        self._add_client(client, -1)
+        if self._semaphore is not None:
+            self._semaphore.release()
+        self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+
+    def status(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queue": self.queue,
+            "waiting": self.waiting,
+            "per_client": self.per_client,
+            "statement_timeout_ms": self.statement_timeout_ms,
+            "average_seconds": round(self.average_seconds, 3),
+        }
+
+
+ROUTE_CLASSES: Dict[str, RouteClass] = {name: RouteClass.from_env(name, d) for name, d in DEFAULTS.items()}
+
+
+def client_key(request: Request) -> Optional[str]:
+    """The caller's bearer token (one per login), else its address."""
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return authorization
+    return request.client.host if request.client else None
+
+
+def class_for(scope: dict) -> Optional[RouteClass]:
+    endpoint = getattr(scope.get("route"), "endpoint", None)
+    name = getattr(endpoint, "admission_class", DEFAULT_CLASS)
+    return ROUTE_CLASSES.get(name) if name is not None else None
+
+
+async def admit(request: Request):
+    """Router-level dependency; resolved before the route's own dependencies."""
+    route_class = class_for(request.scope) if ADMISSION_ENABLED else None
+    if route_class is None:
+        yield
+        return
+    client = client_key(request) if route_class.per_client else None
+    await route_class.acquire(client)
+    request.state.route_class = route_class.name
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        route_class.release(client, time.perf_counter() - started)
+
+
+def install_statement_timeouts():
+    """SET LOCAL statement_timeout for the request's class at the start of each PostgreSQL transaction."""
+    @event.listens_for(Session, "after_begin")
+    def after_begin(session, transaction, connection):
+        scope = current_scope.get()
+        name = scope.get("state", {}).get("route_class") if scope else None
+        route_class = ROUTE_CLASSES.get(name)
+        if route_class is None or not route_class.statement_timeout_ms or connection.dialect.name != "postgresql":
+            return
+        # Through the DBAPI cursor: a setting, not a query, so it stays out of statement counts and spans
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(route_class.statement_timeout_ms)}")
+        finally:
+            cursor.close()
@@ -0,0 +1,239 @@
+"""
+Bulk device import (CSV / .xlsx) through PostgreSQL COPY.
+
+Rows are streamed from the input, validated and de-duplicated by device code
+(CIH-<D.No>, used as the device id), written to a temporary staging table with
+COPY and merged into devices with a single INSERT ... ON CONFLICT statement.
+"""
+
+import csv
+import io
+import tempfile
+from typing import Any, Dict, IO, Iterator, List, Tuple
+
+from sqlalchemy.orm import Session
+
+DEFAULT_OPERATING_HOURS = 8760.0
+
+# Accepted header spellings for each column (Excel export first, snake_case second)
+COLUMN_ALIASES = {
+    "d_no": ("D.No", "d_no"),
+    "kat": ("Kat", "kat"),
+    "oda": ("Oda", "oda"),
+    "demirbas_adi": ("Demirbaş Adı", "demirbas_adi"),
+    "marka": ("Marka", "marka"),
+    "model": ("Model", "model"),
+    "seri_no": ("Seri", "seri", "seri_no"),
+    "adet": ("Adet", "adet"),
+}
+
+# Column limits from database.Device
+MAX_LENGTHS = {
+    "id": 50,
+    "type": 255,
+    "location": 255,
+    "kat": 50,
+    "demirbas_adi": 255,
+    "marka": 255,
+    "model": 255,
+    "seri_no": 255,
+}
+
+STAGING_COLUMNS = ["id", "type", "location", "kat", "demirbas_adi", "marka", "model", "seri_no", "adet"]
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def iter_csv_rows(file: IO[bytes]) -> Iterator[Dict[str, str]]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        for row in csv.DictReader(text):
+            yield {k.strip(): _cell(v) for k, v in row.items() if k is not None}
+    finally:
+        text.detach()
+
+
+def iter_xlsx_rows(file: IO[bytes]) -> Iterator[Dict[str, str]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [_cell(h) for h in next(rows, [])]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield {header[i]: _cell(v) for i, v in enumerate(values) if i < len(header) and header[i]}
+    finally:
+        wb.close()
+
+
+def iter_rows(file: IO[bytes], filename: str) -> Iterator[Dict[str, str]]:
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return iter_xlsx_rows(file)
+    return iter_csv_rows(file)
+
+
+def normalize_row(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Map a raw input row onto device columns; raises ValueError when invalid."""
+    values = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        values[column] = next((raw[a] for a in aliases if raw.get(a)), "")
+
+    if not values["d_no"]:
+        raise ValueError("D.No is required")
+    if not values["demirbas_adi"]:
+        raise ValueError("Demirbaş Adı is required")
+
+    try:
+        adet = int(float(values["adet"])) if values["adet"] else 1
+    except ValueError:
+        raise ValueError(f"Adet is not a number: {values['adet']}")
+    if adet < 1:
+        raise ValueError("Adet must be at least 1")
+
+    device = {
+        "id": f"CIH-{values['d_no']}",
+        "type": values["demirbas_adi"],
+        "location": f"{values['kat']} - {values['oda']}",
+        "kat": values["kat"],
+        "demirbas_adi": values["demirbas_adi"],
+        "marka": values["marka"],
+        "model": values["model"],
+        "seri_no": values["seri_no"],
+        "adet": adet,
+    }
+
+    for column, limit in MAX_LENGTHS.items():
+        if len(device[column]) > limit:
+            raise ValueError(f"{column} is longer than {limit} characters")
+
+    return device
+
+
+def prepare_rows(rows: Iterator[Dict[str, str]], staging: IO[str]) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """Validate rows and write the accepted ones as COPY CSV into `staging`.
+
+    Returns (total_rows, valid_rows, errors). Row numbers in errors count the
+    header as row 1, matching what users see in Excel.
+    """
+    writer = csv.writer(staging)
+    seen = {}
+    errors = []
+    total = 0
+    valid = 0
+
+    for total, raw in enumerate(rows, 1):
+        row_number = total + 1
+        try:
+            device = normalize_row(raw)
+        except ValueError as e:
+            errors.append({"row": row_number, "code": raw.get("D.No") or raw.get("d_no") or "", "error": str(e)})
+            continue
+
+        if device["id"] in seen:
+            errors.append({"row": row_number, "code": device["id"], "error": f"Duplicate device code (first seen on row {seen[device['id']]})"})
+            continue
+
+        seen[device["id"]] = row_number
+        writer.writerow([device[c] for c in STAGING_COLUMNS])
+        valid += 1
+
+    return total, valid, errors
+
+
+def copy_from(cursor, sql: str, source: IO[str]):
+    """Run COPY ... FROM STDIN on a raw psycopg2 or psycopg 3 cursor."""
+    if hasattr(cursor, "copy_expert"):
+        cursor.copy_expert(sql, source)
+        return
+    # psycopg 3 (e.g. DB_PGBOUNCER with postgresql+psycopg://) streams through cursor.copy()
+    with cursor.copy(sql) as copy:
+        while chunk := source.read(COPY_CHUNK_SIZE):
+            copy.write(chunk)
+
+
+def copy_devices(db: Session, staging: IO[str]) -> Tuple[int, int]:
+    """COPY staged rows into a temp table and upsert them into devices.
+
+    Existing devices keep their failure counters and metrics; only the
+    descriptive columns are updated. Returns (inserted, updated).
+    """
+    raw = db.connection().connection
+    with raw.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE device_import_staging (
+                id VARCHAR(50),
+                type VARCHAR(255),
+                location VARCHAR(255),
+                kat VARCHAR(50),
+                demirbas_adi VARCHAR(255),
+                marka VARCHAR(255),
+                model VARCHAR(255),
+                seri_no VARCHAR(255),
+                adet INTEGER
+            ) ON COMMIT DROP
+        """)
+        copy_from(
+            cursor,
+            f"COPY device_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            staging
+        )
+        cursor.execute("""
+            INSERT INTO devices (
+                id, type, location, kat, demirbas_adi, marka, model, seri_no, adet,
+                total_failures, total_operating_hours, total_repair_hours,
+                mtbf, mttr, availability, ariza_adeti, created_at
+            )
+            SELECT
+                id, type, location, kat, demirbas_adi, marka, model, seri_no, adet,
+                0, %s, 0.0, 0.0, 0.0, 100.0, 0, now()
+            FROM device_import_staging
+            ON CONFLICT (id) DO UPDATE SET
+                type = EXCLUDED.type,
+                location = EXCLUDED.location,
+                kat = EXCLUDED.kat,
+                demirbas_adi = EXCLUDED.demirbas_adi,
+                marka = EXCLUDED.marka,
+                model = EXCLUDED.model,
+                seri_no = EXCLUDED.seri_no,
+                adet = EXCLUDED.adet
+            RETURNING (xmax = 0)
+        """, (DEFAULT_OPERATING_HOURS,))
+        flags = [row[0] for row in cursor.fetchall()]
+
+    inserted = sum(1 for f in flags if f)
+    return inserted, len(flags) - inserted
+
+
+def import_devices(db: Session, file: IO[bytes], filename: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Validate and load a device file; commits unless dry_run is set."""
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+", newline="", encoding="utf-8") as staging:
+        total, valid, errors = prepare_rows(iter_rows(file, filename), staging)
+        inserted = updated = 0
+
+        if valid and not dry_run:
+            staging.seek(0)
+            try:
+                inserted, updated = copy_devices(db, staging)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+    return {
+        "total_rows": total,
+        "valid_rows": valid,
+        "inserted": inserted,
+        "updated": updated,
+        "dry_run": dry_run,
+        "errors": errors,
+    }
@@ -1,10 +1,12 @@
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from datetime import datetime, timezone
+from collections import defaultdict
 from io import BytesIO
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from database import Device, FaultRecord
+from tracing import traced, start_span
 
 class ExcelReportService:
     """TÜSEP Excel Rapor Oluşturma Servisi - PostgreSQL Version"""
@@ -33,6 +35,10 @@ class ExcelReportService:
         if end_col > start_col:
             ws.merge_cells(start_row=row, start_column=start_col, end_row=row, end_column=end_col)
     
+    @staticmethod
+    def year_range(year: int):
+        return datetime(year, 1, 1, tzinfo=timezone.utc), datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    
     @staticmethod
     def format_time_minutes(hours: float) -> str:
         if hours == 0:
@@ -43,7 +49,8 @@ class ExcelReportService:
         return f"{minutes:02d}:{seconds:02d}"
     
     @staticmethod
-    async def generate_device_failure_frequency_report_postgres(db: Session, year: int = None):
+    @traced("report.render", report="device_failure_frequency")
+    def generate_device_failure_frequency_report_postgres(db: Session, year: int = None):
         """Gİ.YD.DH.08 - PostgreSQL version"""
         if not year:
             year = datetime.now(timezone.utc).year
@@ -64,21 +71,25 @@ class ExcelReportService:
             cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
             cell.alignment = Alignment(horizontal="center", vertical="center")
         
-        devices = db.query(Device).all()
+        devices = db.query(Device.id, Device.type, Device.location).all()
+        
+        # One pass over the year's faults instead of a query per device
+        start, end = ExcelReportService.year_range(year)
+        monthly_counts_by_device = defaultdict(lambda: [0] * 12)
+        for device_id, created_at in db.query(FaultRecord.device_id, FaultRecord.created_at).filter(
+            FaultRecord.created_at >= start,
+            FaultRecord.created_at < end
+        ):
+            if created_at.year == year:
+                monthly_counts_by_device[device_id][created_at.month - 1] += 1
         
         row_num = 3
         for device in devices:
-            ws.cell(row=row_num, column=1).value = device.code
+            ws.cell(row=row_num, column=1).value = device.id
             ws.cell(row=row_num, column=2).value = device.type
             ws.cell(row=row_num, column=3).value = device.location
             
-            monthly_counts = [0] * 12
-            faults = db.query(FaultRecord).filter(FaultRecord.device_id == device.id).all()
-            
-            for fault in faults:
-                if fault.created_at and fault.created_at.year == year:
-                    month_index = fault.created_at.month - 1
-                    monthly_counts[month_index] += 1
+            monthly_counts = monthly_counts_by_device.get(device.id, [0] * 12)
             
             for i, count in enumerate(monthly_counts):
                 ws.cell(row=row_num, column=4 + i).value = count
@@ -95,12 +106,14 @@ class ExcelReportService:
             ws.column_dimensions[chr(64 + col)].width = 12
         
         output = BytesIO()
-        wb.save(output)
+        with start_span("report.save"):
+            wb.save(output)
         output.seek(0)
         return output
     
     @staticmethod
-    async def generate_intervention_duration_report_postgres(db: Session, year: int = None):
+    @traced("report.render", report="intervention_duration")
+    def generate_intervention_duration_report_postgres(db: Session, year: int = None):
         """Gİ.YD.DH.07 - PostgreSQL version"""
         if not year:
             year = datetime.now(timezone.utc).year
@@ -124,10 +137,7 @@ class ExcelReportService:
         ws.row_dimensions[2].height = 40
         
         locations = {}
-        devices = db.query(Device).all()
-        
-        for device in devices:
-            location = device.location
+        for (location,) in db.query(Device.location):
             if location not in locations:
                 locations[location] = {
                     'q1_durations': [],
@@ -136,27 +146,30 @@ class ExcelReportService:
                     'q4_durations': [],
                     'total_faults': 0
                 }
-            
-            faults = db.query(FaultRecord).filter(
-                FaultRecord.device_id == device.id,
-                FaultRecord.status == "closed"
-            ).all()
-            
-            for fault in faults:
-                if fault.created_at and fault.created_at.year == year:
-                    month = fault.created_at.month
-                    duration = fault.repair_duration
-                    
-                    locations[location]['total_faults'] += 1
-                    
-                    if month in [1, 2, 3]:
-                        locations[location]['q1_durations'].append(duration)
-                    elif month in [4, 5, 6]:
-                        locations[location]['q2_durations'].append(duration)
-                    elif month in [7, 8, 9]:
-                        locations[location]['q3_durations'].append(duration)
-                    elif month in [10, 11, 12]:
-                        locations[location]['q4_durations'].append(duration)
+        
+        start, end = ExcelReportService.year_range(year)
+        faults = db.query(Device.location, FaultRecord.created_at, FaultRecord.repair_duration).join(
+            Device, FaultRecord.device_id == Device.id
+        ).filter(
+            FaultRecord.status == "closed",
+            FaultRecord.created_at >= start,
+            FaultRecord.created_at < end
+        )
+        
+        for location, created_at, duration in faults:
+            if created_at.year == year:
+                month = created_at.month
+                
+                locations[location]['total_faults'] += 1
+                
+                if month in [1, 2, 3]:
+                    locations[location]['q1_durations'].append(duration)
+                elif month in [4, 5, 6]:
+                    locations[location]['q2_durations'].append(duration)
+                elif month in [7, 8, 9]:
+                    locations[location]['q3_durations'].append(duration)
+                elif month in [10, 11, 12]:
+                    locations[location]['q4_durations'].append(duration)
         
         row_num = 3
         for location, data in locations.items():
@@ -186,12 +199,14 @@ class ExcelReportService:
             ws.column_dimensions[col].width = 18
         
         output = BytesIO()
-        wb.save(output)
+        with start_span("report.save"):
+            wb.save(output)
         output.seek(0)
         return output
     
     @staticmethod
-    async def generate_facility_issues_report_postgres(db: Session, year: int = None):
+    @traced("report.render", report="facility_issues")
+    def generate_facility_issues_report_postgres(db: Session, year: int = None):
         """Gİ.YD.DH.02 - PostgreSQL version"""
         if not year:
             year = datetime.now(timezone.utc).year
@@ -213,22 +228,30 @@ class ExcelReportService:
         months_tr = ["OCAK", "ŞUBAT", "MART", "NİSAN", "MAYIS", "HAZİRAN",
                      "TEMMUZ", "AĞUSTOS", "EYLÜL", "EKİM", "KASIM", "ARALIK"]
         
+        # The year's closed faults are read once and bucketed by month
+        start, end = ExcelReportService.year_range(year)
+        durations_by_month = defaultdict(list)
+        for created_at, description, duration in db.query(
+            FaultRecord.created_at, FaultRecord.description, FaultRecord.repair_duration
+        ).filter(
+            FaultRecord.status == "closed",
+            FaultRecord.created_at >= start,
+            FaultRecord.created_at < end
+        ):
+            if created_at.year == year:
+                desc = description.lower()
+                if 'tesis' in desc or 'altyapı' in desc or 'elektrik' in desc:
+                    durations_by_month[created_at.month].append(duration)
+        
         row_num = 3
         yearly_total_faults = 0
         yearly_total_duration = 0
         
         for month_num, month_name in enumerate(months_tr, 1):
-            faults = db.query(FaultRecord).filter(FaultRecord.status == "closed").all()
-            
-            month_faults = []
-            for fault in faults:
-                if fault.created_at and fault.created_at.year == year and fault.created_at.month == month_num:
-                    desc = fault.description.lower()
-                    if 'tesis' in desc or 'altyapı' in desc or 'elektrik' in desc:
-                        month_faults.append(fault)
+            month_durations = durations_by_month.get(month_num, [])
             
-            fault_count = len(month_faults)
-            total_duration = sum(f.repair_duration for f in month_faults)
+            fault_count = len(month_durations)
+            total_duration = sum(month_durations)
             avg_duration = total_duration / fault_count if fault_count > 0 else 0
             
             ws.cell(row=row_num, column=1).value = month_name
@@ -256,6 +279,7 @@ class ExcelReportService:
             ws.column_dimensions[col].width = 25
         
         output = BytesIO()
-        wb.save(output)
+        with start_span("report.save"):
+            wb.save(output)
         output.seek(0)
         return output
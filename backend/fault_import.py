@@ -0,0 +1,315 @@
+"""
+Historical fault record backfill through PostgreSQL COPY.
+
+Rows are streamed from CSV/.xlsx, validated in Python, loaded with COPY into a
+staging table and inserted in one statement that also rolls the new rows into
+device and technician counters. Breakdown iterations and MTBF/MTTR/availability
+are then recomputed once, set-based, for the affected devices.
+"""
+
+import csv
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import Device, User, Log
+from device_import import copy_from, iter_rows
+
+DEFAULT_TIMEZONE = "Europe/Istanbul"
+REPAIR_CATEGORIES = ("part_replacement", "adjustment", "complete_repair", "other")
+DATETIME_FORMATS = ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+# Fixed namespace so re-importing the same file yields the same fault ids
+FAULT_IMPORT_NAMESPACE = uuid.UUID("6f1d0c52-1d38-4f43-9a43-6f5c7e0d8a11")
+
+COLUMN_ALIASES = {
+    "device_id": ("device_id", "Cihaz ID"),
+    "d_no": ("D.No", "d_no"),
+    "description": ("description", "Açıklama"),
+    "created_at": ("created_at", "Bildirim Tarihi"),
+    "repair_start": ("repair_start", "Onarım Başlangıç"),
+    "repair_end": ("repair_end", "Onarım Bitiş"),
+    "repair_notes": ("repair_notes", "Onarım Notları"),
+    "repair_category": ("repair_category", "Onarım Kategorisi"),
+    "technician": ("technician_email", "Teknisyen"),
+}
+
+STAGING_COLUMNS = [
+    "id", "device_id", "description", "created_at", "repair_start", "repair_end",
+    "repair_duration", "repair_notes", "repair_category", "assigned_to", "status"
+]
+
+
+def load_timezone(name: str) -> ZoneInfo:
+    """IANA zone for `name`; raises ValueError for unknown, empty or path-like names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        raise ValueError(f"Unknown timezone: {name}")
+
+
+def parse_datetime(value: str, tz: ZoneInfo) -> Optional[datetime]:
+    if not value:
+        return None
+
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for fmt in DATETIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        raise ValueError(f"Unrecognised date: {value}")
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed.astimezone(timezone.utc)
+
+
+def normalize_row(raw: Dict[str, str], device_ids: set, technicians: Dict[str, str], tz: ZoneInfo) -> Dict[str, Any]:
+    """Map a raw input row onto fault columns; raises ValueError when invalid."""
+    values = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        values[column] = next((raw[a] for a in aliases if raw.get(a)), "")
+
+    device_id = values["device_id"] or (f"CIH-{values['d_no']}" if values["d_no"] else "")
+    if not device_id:
+        raise ValueError("device_id or D.No is required")
+    if device_id not in device_ids:
+        raise ValueError(f"Unknown device: {device_id}")
+    if not values["description"]:
+        raise ValueError("description is required")
+
+    created_at = parse_datetime(values["created_at"], tz)
+    if created_at is None:
+        raise ValueError("created_at is required")
+    repair_start = parse_datetime(values["repair_start"], tz)
+    repair_end = parse_datetime(values["repair_end"], tz)
+
+    if repair_end and not repair_start:
+        raise ValueError("repair_end given without repair_start")
+    if repair_start and repair_start < created_at:
+        raise ValueError("repair_start is before created_at")
+    if repair_end and repair_end < repair_start:
+        raise ValueError("repair_end is before repair_start")
+
+    category = values["repair_category"] or None
+    if category and category not in REPAIR_CATEGORIES:
+        raise ValueError(f"Unknown repair_category: {category}")
+
+    assigned_to = None
+    if values["technician"]:
+        assigned_to = technicians.get(values["technician"].lower())
+        if assigned_to is None:
+            raise ValueError(f"Unknown technician: {values['technician']}")
+
+    if repair_end:
+        status = "closed"
+    elif repair_start or assigned_to:
+        status = "in_progress"
+    else:
+        status = "open"
+
+    fault_id = uuid.uuid5(FAULT_IMPORT_NAMESPACE, f"{device_id}|{created_at.isoformat()}|{values['description']}")
+
+    return {
+        "id": str(fault_id),
+        "device_id": device_id,
+        "description": values["description"],
+        "created_at": created_at.isoformat(),
+        "repair_start": repair_start.isoformat() if repair_start else None,
+        "repair_end": repair_end.isoformat() if repair_end else None,
+        "repair_duration": (repair_end - repair_start).total_seconds() / 3600 if repair_end else 0.0,
+        "repair_notes": values["repair_notes"] or None,
+        "repair_category": category,
+        "assigned_to": assigned_to,
+        "status": status,
+    }
+
+
+def prepare_rows(db: Session, rows: Iterator[Dict[str, str]], staging: IO[str], tz: ZoneInfo) -> Tuple[int, int, List[Dict[str, Any]]]:
+    """Validate rows and write accepted ones as COPY CSV; returns (total, valid, errors)."""
+    device_ids = {d for (d,) in db.query(Device.id).all()}
+    technicians = {email.lower(): uid for uid, email in db.query(User.id, User.email).filter(User.role == "technician").all()}
+
+    writer = csv.writer(staging)
+    seen = set()
+    errors = []
+    total = 0
+    valid = 0
+
+    for total, raw in enumerate(rows, 1):
+        row_number = total + 1
+        try:
+            fault = normalize_row(raw, device_ids, technicians, tz)
+        except ValueError as e:
+            errors.append({"row": row_number, "error": str(e)})
+            continue
+
+        if fault["id"] in seen:
+            errors.append({"row": row_number, "error": "Duplicate fault in file"})
+            continue
+
+        seen.add(fault["id"])
+        # COPY csv treats unquoted empty fields as NULL
+        writer.writerow(["" if fault[c] is None else fault[c] for c in STAGING_COLUMNS])
+        valid += 1
+
+    return total, valid, errors
+
+
+def copy_faults(db: Session, staging: IO[str], user: User) -> int:
+    """COPY staged faults into a temp table and insert new ones; returns inserted count."""
+    raw = db.connection().connection
+    with raw.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE fault_import_staging (
+                id VARCHAR(50),
+                device_id VARCHAR(50),
+                description TEXT,
+                created_at TIMESTAMPTZ,
+                repair_start TIMESTAMPTZ,
+                repair_end TIMESTAMPTZ,
+                repair_duration DOUBLE PRECISION,
+                repair_notes TEXT,
+                repair_category VARCHAR(50),
+                assigned_to VARCHAR(50),
+                status VARCHAR(50)
+            ) ON COMMIT DROP
+        """)
+        copy_from(
+            cursor,
+            f"COPY fault_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            staging
+        )
+        cursor.execute("""
+            WITH inserted AS (
+                INSERT INTO fault_records (
+                    id, created_by, created_by_name, created_at, device_id, device_type, description,
+                    assigned_to, assigned_to_name, repair_start, repair_end, repair_duration,
+                    repair_notes, repair_category, breakdown_iteration, status, confirmed_by, confirmed_at
+                )
+                SELECT
+                    s.id, %(user_id)s, %(user_name)s, s.created_at, s.device_id, d.type, s.description,
+                    s.assigned_to, u.name, s.repair_start, s.repair_end, s.repair_duration,
+                    s.repair_notes, s.repair_category, 0, s.status,
+                    CASE WHEN s.status = 'closed' THEN %(user_id)s END,
+                    CASE WHEN s.status = 'closed' THEN s.repair_end END
+                FROM fault_import_staging s
+                JOIN devices d ON d.id = s.device_id
+                LEFT JOIN users u ON u.id = s.assigned_to
+                ON CONFLICT (id) DO NOTHING
+                RETURNING device_id, repair_duration, assigned_to, status
+            ),
+            device_totals AS (
+                UPDATE devices d
+                SET total_failures = d.total_failures + t.failures,
+                    total_repair_hours = d.total_repair_hours + t.repair_hours
+                FROM (
+                    SELECT device_id, count(*) AS failures, sum(repair_duration) AS repair_hours
+                    FROM inserted
+                    GROUP BY device_id
+                ) t
+                WHERE d.id = t.device_id
+            ),
+            technician_totals AS (
+                UPDATE users u
+                SET successful_repairs = u.successful_repairs + t.repairs
+                FROM (
+                    SELECT assigned_to, count(*) AS repairs
+                    FROM inserted
+                    WHERE status = 'closed' AND assigned_to IS NOT NULL
+                    GROUP BY assigned_to
+                ) t
+                WHERE u.id = t.assigned_to
+            )
+            SELECT count(*) FROM inserted
+        """, {"user_id": user.id, "user_name": user.name})
+        inserted = cursor.fetchone()[0]
+
+    return inserted
+
+
+def recompute_device_metrics(db: Session, device_ids_sql: str):
+    """Set-based recompute of breakdown iterations and MTBF/MTTR/availability.
+
+    `device_ids_sql` is a subquery selecting the affected device ids. The
+    metric formulas mirror server.apply_device_metrics.
+    """
+    db.execute(text(f"""
+        UPDATE fault_records f
+        SET breakdown_iteration = r.iteration
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY device_id ORDER BY created_at, id) AS iteration
+            FROM fault_records
+            WHERE device_id IN ({device_ids_sql})
+        ) r
+        WHERE f.id = r.id AND f.breakdown_iteration IS DISTINCT FROM r.iteration
+    """))
+    db.execute(text(f"""
+        UPDATE devices d
+        SET mttr = m.mttr,
+            mtbf = m.mtbf,
+            availability = CASE
+                WHEN d.total_failures > 0 AND m.mtbf + m.mttr > 0 THEN m.mtbf / (m.mtbf + m.mttr) * 100
+                ELSE 100.0
+            END
+        FROM (
+            SELECT id,
+                CASE WHEN total_failures > 0 THEN total_repair_hours / total_failures ELSE 0.0 END AS mttr,
+                CASE WHEN total_failures > 0 AND total_operating_hours > 0
+                     THEN (total_operating_hours - total_repair_hours) / total_failures ELSE 0.0 END AS mtbf
+            FROM devices
+            WHERE id IN ({device_ids_sql})
+        ) m
+        WHERE d.id = m.id
+    """))
+
+
+def import_faults(db: Session, file: IO[bytes], filename: str, user: User,
+                  tz_name: str = DEFAULT_TIMEZONE, dry_run: bool = False) -> Dict[str, Any]:
+    """Validate and backfill historical faults; commits unless dry_run is set.
+
+    Naive timestamps in the input are interpreted in `tz_name`.
+    """
+    tz = load_timezone(tz_name)
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024, mode="w+", newline="", encoding="utf-8") as staging:
+        total, valid, errors = prepare_rows(db, iter_rows(file, filename), staging, tz)
+        inserted = 0
+        affected_devices = 0
+
+        if valid and not dry_run:
+            staging.seek(0)
+            try:
+                inserted = copy_faults(db, staging, user)
+                affected_devices = db.execute(text("SELECT count(DISTINCT device_id) FROM fault_import_staging")).scalar()
+                recompute_device_metrics(db, "SELECT DISTINCT device_id FROM fault_import_staging")
+                db.add(Log(
+                    id=str(uuid.uuid4()),
+                    event=f"Geçmiş arıza kayıtları içe aktarıldı: {inserted} kayıt, {affected_devices} cihaz",
+                    user_id=user.id,
+                    user_name=user.name
+                ))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+    return {
+        "total_rows": total,
+        "valid_rows": valid,
+        "inserted": inserted,
+        "skipped_existing": valid - inserted if valid and not dry_run else 0,
+        "affected_devices": affected_devices,
+        "dry_run": dry_run,
+        "errors": errors,
+    }
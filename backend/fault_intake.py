@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import List
+
+from fastapi import HTTPException
+
+from database import SessionLocal, Device, FaultRecord, Log
+from tracing import current_span, start_span, NOOP_SPAN
+
+logger = logging.getLogger(__name__)
+
+FAULT_INTAKE_MAX_BATCH = int(os.environ.get('FAULT_INTAKE_MAX_BATCH', '200'))
+FAULT_INTAKE_MAX_WAIT_MS = int(os.environ.get('FAULT_INTAKE_MAX_WAIT_MS', '20'))
+FAULT_INTAKE_QUEUE_SIZE = int(os.environ.get('FAULT_INTAKE_QUEUE_SIZE', '5000'))
+
+
+class FaultReport:
+    __slots__ = ("device_id", "description", "user_id", "user_name", "future", "span")
+
+    def __init__(self, device_id: str, description: str, user_id: str, user_name: str):
+        self.device_id = device_id
+        self.description = description
+        self.user_id = user_id
+        self.user_name = user_name
+        self.future = Future()
+        # The worker thread links its batch span back to each submitting request
+        self.span = current_span.get() or NOOP_SPAN
+
+
+class FaultIntakeQueue:
+    """Collects fault reports and writes them in group-committed batches.
+
+    A single worker thread drains the queue: it waits for the first report,
+    then keeps collecting for up to max_wait_ms or max_batch reports, and
+    writes the whole batch in one transaction. Device counters are locked
+    and incremented once per device per batch. If the batch transaction
+    fails, its reports are retried one per transaction, so only the report
+    that cannot be written is rejected.
+    """
+
+    def __init__(self, max_batch: int = FAULT_INTAKE_MAX_BATCH, max_wait_ms: int = FAULT_INTAKE_MAX_WAIT_MS,
+                 queue_size: int = FAULT_INTAKE_QUEUE_SIZE):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="fault-intake", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush pending reports and stop the worker."""
+        self._stopping = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(self, device_id: str, description: str, user_id: str, user_name: str) -> FaultRecord:
+        self.start()
+        report = FaultReport(device_id, description, user_id, user_name)
+        try:
+            self._queue.put_nowait(report)
+        except queue.Full:
+            raise HTTPException(status_code=503, detail="Fault intake is busy, please retry", headers={"Retry-After": "1"})
+        return await asyncio.wrap_future(report.future)
+
+    def _collect(self) -> List[FaultReport]:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                traced = [r.span for r in batch if r.span.sampled]
+                with start_span("fault_intake.write_batch", parent=traced[0] if traced else None, links=traced[1:],
+                                batch_size=len(batch)):
+                    self._write_batch(batch)
+            elif self._stopping:
+                return
+
+    def _write_batch(self, batch: List[FaultReport]):
+        retry = []
+        db = SessionLocal(expire_on_commit=False)
+        try:
+            device_ids = {r.device_id for r in batch}
+            devices = {
+                d.id: d for d in db.query(Device).filter(Device.id.in_(device_ids)).order_by(Device.id).with_for_update().all()
+            }
+
+            accepted = []
+            for report in batch:
+                device = devices.get(report.device_id)
+                if device is None:
+                    report.future.set_exception(HTTPException(status_code=404, detail="Device not found"))
+                    continue
+
+                device.total_failures += 1
+                fault = FaultRecord(
+                    id=str(uuid.uuid4()),
+                    created_by=report.user_id,
+                    created_by_name=report.user_name,
+                    device_id=report.device_id,
+                    device_type=device.type,
+                    description=report.description,
+                    breakdown_iteration=device.total_failures
+                )
+                accepted.append((report, fault))
+
+            db.add_all([fault for _, fault in accepted])
+            db.add_all([
+                Log(
+                    id=str(uuid.uuid4()),
+                    record_id=fault.id,
+                    event=f"Arıza kaydı oluşturuldu: {report.description}",
+                    user_id=report.user_id,
+                    user_name=report.user_name
+                ) for report, fault in accepted
+            ])
+            db.commit()
+
+            for report, fault in accepted:
+                report.future.set_result(fault)
+        except Exception as e:
+            db.rollback()
+            pending = [r for r in batch if not r.future.done()]
+            if len(pending) > 1:
+                # One bad report must not reject the others: write them one per transaction
+                logger.warning(f"Fault intake batch of {len(batch)} failed, retrying reports one at a time: {e}")
+                retry = pending
+            else:
+                logger.error(f"Fault intake batch of {len(batch)} failed: {e}")
+                for report in pending:
+                    report.future.set_exception(HTTPException(status_code=503, detail="Fault intake failed, please retry"))
+        finally:
+            db.close()
+
+        for report in retry:
+            self._write_batch([report])
+
+
+fault_intake = FaultIntakeQueue()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import IdempotencyKey
+
+IDEMPOTENCY_TTL = timedelta(hours=int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24')))
+SWEEP_INTERVAL = timedelta(minutes=10)
+
+_last_sweep = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def replay_response(record: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        content=json.loads(record.response_body),
+        status_code=record.status_code,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def find_stored_response(db: Session, key: str, user_id: str, scope: str, fingerprint: str) -> Optional[JSONResponse]:
+    """Return the stored response for a retried request, or None on first use of the key."""
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.key == key,
+        IdempotencyKey.user_id == user_id
+    ).first()
+    if record is None:
+        return None
+    
+    created_at = record.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if created_at < datetime.now(timezone.utc) - IDEMPOTENCY_TTL:
+        db.delete(record)
+        db.flush()
+        return None
+    
+    if record.scope != scope or record.request_hash != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    
+    return replay_response(record)
+
+
+def commit_with_key(db: Session, key: str, user_id: str, scope: str, fingerprint: str, response: Any, status_code: int = 200) -> Optional[JSONResponse]:
+    """Commit the pending writes together with the stored response for `key`.
+
+    If a concurrent retry committed the same key first, the writes are rolled
+    back and that request's stored response is returned instead.
+    """
+    db.add(IdempotencyKey(
+        key=key,
+        user_id=user_id,
+        scope=scope,
+        request_hash=fingerprint,
+        status_code=status_code,
+        response_body=json.dumps(jsonable_encoder(response))
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        stored = find_stored_response(db, key, user_id, scope, fingerprint)
+        if stored is None:
+            raise
+        return stored
+    
+    maybe_sweep_expired_keys(db)
+    return None
+
+
+def sweep_expired_keys(db: Session) -> int:
+    cutoff = datetime.now(timezone.utc) - IDEMPOTENCY_TTL
+    deleted = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def maybe_sweep_expired_keys(db: Session):
+    global _last_sweep
+    now = datetime.now(timezone.utc)
+    if now - _last_sweep >= SWEEP_INTERVAL:
+        _last_sweep = now
+        sweep_expired_keys(db)
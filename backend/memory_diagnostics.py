@@ -0,0 +1,194 @@
+"""
+Memory diagnostics for tracking down retention in long-running workers.
+
+tracemalloc is off by default (it slows allocation-heavy code noticeably);
+quality users switch it on, take snapshots before and after a suspect
+workload (Excel downloads, /faults/all) and diff them by file (module),
+line or full traceback. Live object counts walk the GC heap for ORM
+instances and the other objects the report and list paths create.
+"""
+
+import gc
+import itertools
+import os
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from database import Base
+
+MEMORY_MAX_SNAPSHOTS = int(os.environ.get('MEMORY_MAX_SNAPSHOTS', '4'))
+GROUP_BY = ("filename", "lineno", "traceback")
+
+# Allocations made by the diagnostics themselves are noise
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def format_stat(stat, diff: bool) -> dict:
+    frame = stat.traceback[0]
+    entry = {
+        "file": frame.filename,
+        "line": frame.lineno,
+        "size": stat.size,
+        "count": stat.count,
+    }
+    if diff:
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    if len(stat.traceback) > 1:
+        entry["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+    return entry
+
+
+def validate_group_by(group_by: str):
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_BY)}")
+
+
+class MemoryDiagnostics:
+    def __init__(self, max_snapshots: int = MEMORY_MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[str, dict]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def status(self) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshots = [{k: v for k, v in s.items() if k != "snapshot"} for s in self._snapshots.values()]
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "rss_bytes": rss_bytes(),
+            "snapshots": snapshots,
+        }
+
+    def start(self, frames: int = 1) -> dict:
+        if not 1 <= frames <= 50:
+            raise HTTPException(status_code=400, detail="frames must be between 1 and 50")
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+        return self.status()
+
+    def stop(self) -> dict:
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+        return self.status()
+
+    def _require_tracing(self):
+        if not tracemalloc.is_tracing():
+            raise HTTPException(status_code=409, detail="tracemalloc is not running")
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def take_snapshot(self, label: Optional[str] = None) -> dict:
+        self._require_tracing()
+        snapshot = self._snapshot()
+        entry = {
+            "id": str(next(self._ids)),
+            "label": label,
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+            "traced_bytes": sum(t.size for t in snapshot.traces),
+            "rss_bytes": rss_bytes(),
+        }
+        with self._lock:
+            self._snapshots[entry["id"]] = {**entry, "snapshot": snapshot}
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return entry
+
+    def _get(self, snapshot_id: str):
+        with self._lock:
+            stored = self._snapshots.get(snapshot_id)
+        if stored is None:
+            raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+        return stored["snapshot"]
+
+    def diff(self, base: str, target: str = "current", group_by: str = "lineno", limit: int = 30) -> dict:
+        """Largest growth from `base` to `target` ('current' takes a fresh snapshot)."""
+        validate_group_by(group_by)
+        self._require_tracing()
+        before = self._get(base)
+        after = self._snapshot() if target == "current" else self._get(target)
+        stats = after.compare_to(before, group_by)
+        return {
+            "base": base,
+            "target": target,
+            "group_by": group_by,
+            "size_diff": sum(s.size_diff for s in stats),
+            "count_diff": sum(s.count_diff for s in stats),
+            "top": [format_stat(s, diff=True) for s in stats[:limit]],
+        }
+
+    def top(self, group_by: str = "lineno", limit: int = 30) -> dict:
+        validate_group_by(group_by)
+        self._require_tracing()
+        stats = self._snapshot().statistics(group_by)
+        return {
+            "group_by": group_by,
+            "traced_bytes": sum(s.size for s in stats),
+            "top": [format_stat(s, diff=False) for s in stats[:limit]],
+        }
+
+
+def tracked_classes() -> Dict[type, str]:
+    classes = {mapper.class_: mapper.class_.__name__ for mapper in Base.registry.mappers}
+    classes[Session] = "Session"
+    classes[BytesIO] = "BytesIO"
+    try:
+        from openpyxl import Workbook
+        from openpyxl.worksheet.worksheet import Worksheet
+        classes[Workbook] = "openpyxl.Workbook"
+        classes[Worksheet] = "openpyxl.Worksheet"
+    except ImportError:
+        pass
+    return classes
+
+
+def live_objects(collect: bool = False) -> dict:
+    """Live instances of ORM classes, sessions and report objects on the GC heap."""
+    collected = gc.collect() if collect else None
+    classes = tracked_classes()
+    # sessionmaker instantiates a generated Session subclass, so match on the MRO
+    names: Dict[type, Optional[str]] = {}
+    counts = Counter()
+    for obj in gc.get_objects():
+        cls = type(obj)
+        if cls not in names:
+            names[cls] = next((classes[base] for base in cls.__mro__ if base in classes), None)
+        if names[cls] is not None:
+            counts[names[cls]] += 1
+    return {
+        "collected": collected,
+        "gc_counts": gc.get_count(),
+        "objects": {name: counts.get(name, 0) for name in sorted(classes.values())},
+    }
+
+
+memory_diagnostics = MemoryDiagnostics()
@@ -0,0 +1,296 @@
+"""
+In-process runtime metrics in the Prometheus text exposition format.
+
+Kept dependency-free: counters, gauges and histograms hold their samples in
+dicts keyed by label values and are rendered on each scrape of /metrics.
+Quantiles (p50/p95/p99) are computed by the scraper from the histogram
+buckets, e.g. histogram_quantile(0.95, rate(tusep_http_request_duration_seconds_bucket[5m])).
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REPORT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Metric):
+    """A settable gauge, or one whose value is read by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Unlabelled gauges report 0 before their first update
+        self._values: Dict[Tuple[str, ...], float] = {} if self.label_names else {(): 0.0}
+        self._callback = callback
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            items = sorted(self._callback().items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def totals(self, **labels) -> Tuple[int, float]:
+        """Observation count and sum for one label set."""
+        with self._lock:
+            row = self._values.get(self._key(labels))
+            return (int(sum(row[:-1])), row[-1]) if row else (0, 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), row[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "tusep_http_requests_total", "HTTP requests by route template, method, role and status code.",
+    ("route", "method", "role", "status")))
+REQUEST_ERRORS = REGISTRY.register(Counter(
+    "tusep_http_request_errors_total", "Requests answered with a 5xx status or an unhandled exception.",
+    ("route", "method", "role")))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "tusep_http_request_duration_seconds", "Time from receiving a request to the end of its response body.",
+    ("route", "method", "role")))
+REQUESTS_IN_PROGRESS = REGISTRY.register(Gauge(
+    "tusep_http_requests_in_progress", "Requests currently being served.", ()))
+POOL_CHECKOUT_SECONDS = REGISTRY.register(Histogram(
+    "tusep_db_pool_checkout_seconds", "Time spent waiting for a connection from the SQLAlchemy pool.",
+    (), buckets=POOL_WAIT_BUCKETS))
+SLOW_QUERIES = REGISTRY.register(Counter(
+    "tusep_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS by originating route.", ("route",)))
+REPORT_SECONDS = REGISTRY.register(Histogram(
+    "tusep_report_generation_seconds", "Excel report generation time.", ("report",), buckets=REPORT_BUCKETS))
+BCRYPT_WAITING = REGISTRY.register(Gauge(
+    "tusep_bcrypt_queue_depth", "Password hash/verify calls waiting for a free bcrypt slot.", ()))
+BCRYPT_ACTIVE = REGISTRY.register(Gauge(
+    "tusep_bcrypt_in_progress", "Password hash/verify calls currently running.", ()))
+BCRYPT_SECONDS = REGISTRY.register(Histogram(
+    "tusep_bcrypt_duration_seconds", "Password hash/verify time including the wait for a slot.", ("operation",)))
+ADMISSION_ACTIVE = REGISTRY.register(Gauge(
+    "tusep_admission_active", "Admitted requests currently running by route class.", ("route_class",)))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    "tusep_admission_queued", "Requests waiting for a slot by route class.", ("route_class",)))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "tusep_admission_rejected_total", "Requests turned away with 429/503 by route class and reason.",
+    ("route_class", "reason")))
+
+
+def pool_usage(pool) -> dict:
+    """Occupancy of a SQLAlchemy pool; counts are None for pools that do not keep connections."""
+    usage = {"pool": type(pool).__name__, "size": None, "capacity": None,
+             "checked_out": None, "checked_in": None, "overflow": None}
+    try:
+        usage["checked_out"] = pool.checkedout()
+        usage["checked_in"] = pool.checkedin()
+        usage["size"] = pool.size()
+        usage["overflow"] = max(pool.overflow(), 0)
+        usage["capacity"] = pool.size() + max(pool._max_overflow, 0)
+    except AttributeError:
+        pass
+    return usage
+
+
+def register_pool(engine, prefix: str = "tusep_db") -> None:
+    """Expose the engine's pool occupancy; read at scrape time."""
+
+    def occupancy():
+        usage = pool_usage(engine.pool)
+        if usage["checked_out"] is None:
+            return {}
+        values = {("checked_out",): usage["checked_out"]}
+        if usage["capacity"]:
+            values[("capacity",)] = usage["capacity"]
+            values[("checked_in",)] = usage["checked_in"]
+        return values
+
+    def saturation():
+        usage = pool_usage(engine.pool)
+        if not usage["capacity"]:
+            return {}
+        return {(): usage["checked_out"] / usage["capacity"]}
+
+    REGISTRY.register(Gauge(f"{prefix}_pool_connections", "SQLAlchemy pool connections by state.",
+                            ("state",), callback=occupancy))
+    REGISTRY.register(Gauge(f"{prefix}_pool_saturation", "Checked-out connections as a fraction of pool size plus overflow.",
+                            (), callback=saturation))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streamed responses are timed to their last chunk."""
+
+    def __init__(self, app, skip_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        # Shared with request.state so get_current_user can record the role
+        scope.setdefault("state", {})
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            status_code = 500
+            raise
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            labels = {
+                "route": getattr(route, "path", "unmatched"),
+                "method": scope["method"],
+                "role": scope["state"].get("user_role", "anonymous"),
+            }
+            REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+            REQUESTS.inc(status=str(status_code), **labels)
+            if status_code >= 500:
+                REQUEST_ERRORS.inc(**labels)
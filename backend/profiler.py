@@ -0,0 +1,249 @@
+"""
+On-demand sampling profiler.
+
+A background thread samples Python stacks from sys._current_frames() every
+PROFILE_INTERVAL_MS and aggregates them as folded stacks
+("frame;frame;frame count"), the input format of flamegraph.pl, speedscope
+and inferno. Profiles are written to PROFILE_DIR, which keeps only the
+newest PROFILE_MAX_FILES files.
+
+Two ways to start one, both restricted to quality users:
+- send `X-Profile: 1` with a request: the caller's token is checked before
+  the profiler slot is taken, then only the event loop thread and the
+  worker thread running that request's endpoint are sampled, so concurrent
+  traffic does not leak into the profile;
+- POST /api/quality/profiler/sample for a window over all threads.
+
+Only one profile runs at a time; extra requests are served unprofiled.
+"""
+
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', '1') == '1'
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', '/tmp/tusep-profiles'))
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '20'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', '60'))
+
+MAX_DEPTH = 128
+PROFILE_NAME = re.compile(r"^[\w.-]+\.folded$")
+
+
+def code_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def stack_codes(frame) -> tuple:
+    """Innermost-first code objects; labels are only built when the profile is saved."""
+    codes = []
+    while frame is not None and len(codes) < MAX_DEPTH:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    return tuple(codes)
+
+
+class Sampler:
+    """Samples the given threads (or all but itself) until stopped."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, max_seconds: float = PROFILE_MAX_SECONDS,
+                 all_threads: bool = False):
+        self.interval = interval_ms / 1000
+        self.max_seconds = max_seconds
+        self.all_threads = all_threads
+        self.thread_ids: Set[int] = set()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = self.started + self.max_seconds
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or not (self.all_threads or thread_id in self.thread_ids):
+                    continue
+                if thread_id not in names:
+                    names.update((t.ident, t.name) for t in threading.enumerate())
+                self.stacks[(names.get(thread_id, str(thread_id)), stack_codes(frame))] += 1
+            self.samples += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.elapsed = time.perf_counter() - self.started
+
+    def folded(self) -> str:
+        labels = {}
+        lines = []
+        for (thread_name, codes), count in self.stacks.most_common():
+            frames = [labels.setdefault(code, code_label(code)) for code in reversed(codes)]
+            lines.append(f"{';'.join([thread_name] + frames)} {count}\n")
+        return "".join(lines)
+
+
+class ProfileStore:
+    """Bounded directory of folded-stack files, oldest removed first."""
+
+    def __init__(self, directory: Path = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES):
+        self.directory = directory
+        self.max_files = max_files
+
+    @staticmethod
+    def new_name(kind: str, label: str) -> str:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^\w-]+", "-", label).strip("-")[:60] or "all"
+        return f"{stamp}_{kind}_{slug}.folded"
+
+    def save(self, name: str, sampler: Sampler) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(sampler.folded())
+        logger.info(f"Saved profile {name}: {sampler.samples} samples over {sampler.elapsed:.2f}s")
+        self._trim()
+        return name
+
+    def _trim(self):
+        files = sorted(self.directory.glob("*.folded"))
+        for old in files[:-self.max_files]:
+            old.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict]:
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for path in sorted(self.directory.glob("*.folded"), reverse=True):
+            stat = path.stat()
+            profiles.append({
+                "name": path.name,
+                "bytes": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(),
+            })
+        return profiles
+
+    def path(self, name: str) -> Optional[Path]:
+        if not PROFILE_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+class Profiler:
+    def __init__(self, store: ProfileStore):
+        self.store = store
+        self._busy = threading.Lock()
+
+    def try_begin(self, **kwargs) -> Optional[Sampler]:
+        if not PROFILER_ENABLED or not self._busy.acquire(blocking=False):
+            return None
+        sampler = Sampler(**kwargs)
+        sampler.start()
+        return sampler
+
+    def finish(self, sampler: Sampler, name: Optional[str]):
+        """Stop sampling and save under `name`; None discards the samples."""
+        try:
+            sampler.stop()
+            if name is not None:
+                self.store.save(name, sampler)
+        finally:
+            self._busy.release()
+
+    def sample_window(self, seconds: float, interval_ms: float = PROFILE_INTERVAL_MS) -> Optional[str]:
+        """Sample all threads for `seconds` in the background; None if a profile is already running."""
+        sampler = self.try_begin(interval_ms=interval_ms, max_seconds=seconds, all_threads=True)
+        if sampler is None:
+            return None
+        name = self.store.new_name("window", f"{seconds:g}s")
+
+        def finish_later():
+            time.sleep(seconds)
+            self.finish(sampler, name)
+
+        threading.Thread(target=finish_later, name="profiler-window", daemon=True).start()
+        return name
+
+
+profiler = Profiler(ProfileStore())
+
+current_sampler: ContextVar[Optional[Sampler]] = ContextVar("current_sampler", default=None)
+
+
+@contextmanager
+def profiled_thread():
+    """Include the calling thread in the current request's profile."""
+    sampler = current_sampler.get()
+    if sampler is None:
+        yield
+        return
+    thread_id = threading.get_ident()
+    sampler.thread_ids.add(thread_id)
+    try:
+        yield
+    finally:
+        sampler.thread_ids.discard(thread_id)
+
+
+class ProfilerMiddleware:
+    """Profiles a request sent with `X-Profile: 1` by a caller that `authorize` accepts.
+
+    `authorize(authorization_header)` runs on the threadpool before the
+    profiler slot is taken, so anonymous or unauthorized X-Profile requests
+    are served unprofiled and cannot keep the slot busy.
+    """
+
+    def __init__(self, app, authorize: Callable[[str], bool]):
+        self.app = app
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        headers = dict(scope.get("headers", [])) if scope["type"] == "http" else {}
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        allowed = headers.get(b"x-profile") == b"1" and authorization \
+            and await run_in_threadpool(self.authorize, authorization)
+        sampler = profiler.try_begin() if allowed else None
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        sampler.thread_ids.add(threading.get_ident())
+        token = current_sampler.set(sampler)
+        name = None
+
+        async def send_wrapper(message):
+            nonlocal name
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                name = profiler.store.new_name("request", f"{scope['method']}{getattr(route, 'path', scope['path'])}")
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-name", name.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_sampler.reset(token)
+            # Joining the sampler and writing the profile block, so keep them off the event loop
+            await run_in_threadpool(profiler.finish, sampler, name)
@@ -0,0 +1,150 @@
+"""
+Read-replica routing for report and dashboard endpoints.
+
+Endpoints marked with @read_only get their session from get_db bound to the
+replica (DATABASE_REPLICA_URL), always in READ ONLY transactions: the driver
+opens them with BEGIN READ ONLY, so there is no extra round trip and nothing
+is left on the connection. The primary serves those endpoints instead when
+
+- no replica is configured, or it is unreachable or lagging more than
+  REPLICA_MAX_LAG_S (checked at most every REPLICA_LAG_CHECK_S),
+- the client wrote recently: successful POST/PUT/PATCH/DELETE responses set
+  a cookie valid for REPLICA_STICKY_S, so the next reads see those writes
+  whichever worker serves them (read-your-writes).
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+REPLICA_MAX_LAG_S = float(os.environ.get('REPLICA_MAX_LAG_S', '5'))
+REPLICA_STICKY_S = float(os.environ.get('REPLICA_STICKY_S', '5'))
+REPLICA_LAG_CHECK_S = float(os.environ.get('REPLICA_LAG_CHECK_S', '2'))
+
+STICKY_COOKIE = "tusep_primary_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Zero when the standby has replayed everything it received (an idle primary is not lag)
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def read_only(endpoint):
+    """Mark a route handler as safe to serve from the replica."""
+    endpoint.read_only = True
+    return endpoint
+
+
+def read_only_options(engine):
+    if engine.dialect.name == "postgresql":
+        return engine.execution_options(postgresql_readonly=True)
+    return engine
+
+
+def primary_requested(scope: dict) -> bool:
+    """The client wrote within the last REPLICA_STICKY_S seconds."""
+    header = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k == b"cookie"), None)
+    if not header:
+        return False
+    morsel = SimpleCookie(header).get(STICKY_COOKIE)
+    try:
+        return morsel is not None and float(morsel.value) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    def __init__(self, max_lag_seconds: float = REPLICA_MAX_LAG_S, check_interval: float = REPLICA_LAG_CHECK_S):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.primary = None
+        self.replica = None
+        self._read_primary = None
+        self._read_replica = None
+        self._lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, primary, replica=None):
+        self.primary, self.replica = primary, replica
+        self._read_primary = read_only_options(primary)
+        self._read_replica = read_only_options(replica) if replica is not None else None
+        self._lag, self._checked_at = None, 0.0
+
+    def lag_seconds(self) -> Optional[float]:
+        """Replica lag, refreshed by one request at a time; None when the check fails."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = now
+                with self.replica.connect() as conn:
+                    self._lag = float(conn.execute(LAG_SQL).scalar()) if conn.dialect.name == "postgresql" else 0.0
+            except Exception as e:
+                logger.warning(f"Replica lag check failed: {e}")
+                self._lag = None
+            finally:
+                self._lock.release()
+        return self._lag
+
+    def replica_usable(self) -> bool:
+        if self.replica is None:
+            return False
+        lag = self.lag_seconds()
+        return lag is not None and lag <= self.max_lag_seconds
+
+    def bind_for(self, scope: Optional[dict]):
+        """Engine for the request's session; None keeps the session's default (primary) bind."""
+        endpoint = getattr(scope.get("route"), "endpoint", None) if scope else None
+        if not getattr(endpoint, "read_only", False):
+            return None
+        if primary_requested(scope) or not self.replica_usable():
+            target = "primary"
+        else:
+            target = "replica"
+        scope.setdefault("state", {})["db_target"] = target
+        return self._read_replica if target == "replica" else self._read_primary
+
+    def status(self) -> dict:
+        return {
+            "configured": self.replica is not None,
+            "lag_seconds": self._lag,
+            "max_lag_seconds": self.max_lag_seconds,
+            "usable": self.replica is not None and self._lag is not None and self._lag <= self.max_lag_seconds,
+        }
+
+
+class ReadYourWritesMiddleware:
+    """Sets the primary-stickiness cookie on successful writes."""
+
+    def __init__(self, app, sticky_seconds: float = REPLICA_STICKY_S):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or not scope["path"].startswith("/api"):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (f"{STICKY_COOKIE}={time.time() + self.sticky_seconds:.3f}; Max-Age={math.ceil(self.sticky_seconds)}; "
+                          f"Path=/api; HttpOnly; SameSite=Lax")
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,109 @@
+"""
+Per-request context that code below the route handlers can read.
+
+The ASGI scope is published through a ContextVar; Starlette runs sync
+endpoints and dependencies with a copy of the caller's context, so engine
+event hooks executing in the threadpool still see the request they serve.
+RequestTimings is shared the same way so any layer can add to the
+request's time breakdown.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+def current_route() -> Optional[str]:
+    """'METHOD /route/template' of the request being served, if any."""
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+
+
+class RequestContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(token)
+
+
+DESCRIPTIONS = {
+    "pool": "connection checkout",
+    "auth": "get_current_user",
+    "db": "SQL",
+    "serialize": "response model + JSON",
+    "excel": "report rendering",
+    "queue": "admission wait",
+}
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self._endpoint_done = None
+        self._db_at_endpoint_done = 0.0
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_statement(self, seconds: float):
+        self.db_seconds += seconds
+        self.db_statements += 1
+
+    def endpoint_done(self, returned_response: bool):
+        # Endpoints returning a Response skip FastAPI's serialization step
+        if not returned_response:
+            self._endpoint_done = time.perf_counter()
+            self._db_at_endpoint_done = self.db_seconds
+
+    def serialization_done(self):
+        if self._endpoint_done is None:
+            return
+        elapsed = time.perf_counter() - self._endpoint_done
+        self.add("serialize", max(elapsed - (self.db_seconds - self._db_at_endpoint_done), 0.0))
+        self._endpoint_done = None
+
+    def milliseconds(self) -> Dict[str, float]:
+        values = dict(self.phases)
+        if self.db_statements:
+            values["db"] = self.db_seconds
+        return {name: round(seconds * 1000, 2) for name, seconds in values.items()}
+
+    def header(self) -> str:
+        parts = []
+        for name, ms in self.milliseconds().items():
+            desc = f"{self.db_statements} statements" if name == "db" else DESCRIPTIONS.get(name, name)
+            parts.append(f'{name};dur={ms};desc="{desc}"')
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def timed(name: str):
+    """Add the enclosed block's duration to the current request's `name` phase."""
+    timings = current_timings.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(name, time.perf_counter() - started)
@@ -1,24 +1,48 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, UploadFile, File, Request, Response, status
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import json
+import inspect
 import logging
+import threading
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import func, and_, or_, update, case
+from sqlalchemy.exc import OperationalError
+from starlette.routing import Match
+from urllib.parse import urlsplit, parse_qsl
 import traceback
 
 # Import database models
-from database import get_db, User, Device, FaultRecord, EquipmentTransfer, Log
+from database import get_db, engine, replica_engine, SessionLocal, Base, DB_POOL_WARM, User, Device, FaultRecord, EquipmentTransfer, Log
 from excel_service_postgres import ExcelReportService
+from idempotency import request_fingerprint, find_stored_response, commit_with_key, sweep_expired_keys
+from fault_intake import fault_intake
+from device_import import import_devices
+from fault_import import import_faults, load_timezone, DEFAULT_TIMEZONE
+from metrics import (REGISTRY, CONTENT_TYPE, MetricsMiddleware, register_pool, pool_usage, REPORT_SECONDS,
+                     POOL_CHECKOUT_SECONDS, BCRYPT_WAITING, BCRYPT_ACTIVE, BCRYPT_SECONDS)
+from request_context import RequestContextMiddleware, timed
+from server_timing import TimedRoute, ServerTimingMiddleware, install_db_timing
+from slow_queries import slow_query_log
+from profiler import profiler, ProfilerMiddleware, PROFILER_ENABLED, PROFILE_INTERVAL_MS, PROFILE_MAX_SECONDS
+from memory_diagnostics import memory_diagnostics, live_objects
+from tracing import TracingMiddleware, install_db_tracing, install_session_tracing, exporter as trace_exporter
+from warmup import warmup, warm_pool, warm_tables
+from replica import read_only, replica_router, ReadYourWritesMiddleware
+from admission import admit, admission_class, install_statement_timeouts, ROUTE_CLASSES
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -29,10 +53,14 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-this-in-produc
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# bcrypt is CPU-bound; cap concurrent hashes so logins queue instead of starving the threadpool
+BCRYPT_CONCURRENCY = int(os.environ.get('BCRYPT_CONCURRENCY', os.cpu_count() or 2))
+bcrypt_slots = threading.BoundedSemaphore(BCRYPT_CONCURRENCY)
+
 security = HTTPBearer()
 
 app = FastAPI()
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=TimedRoute, dependencies=[Depends(admit)])
 
 # ===== PYDANTIC MODELS =====
 
@@ -129,6 +157,24 @@ class FaultRecordEndRepair(BaseModel):
     repair_notes: str
     repair_category: str
 
+class FaultAssignment(BaseModel):
+    fault_id: str
+    assigned_to: str
+
+class BulkFaultAssign(BaseModel):
+    assignments: List[FaultAssignment]
+
+class SyncAction(BaseModel):
+    action: str  # "start_repair" or "end_repair"
+    fault_id: str
+    client_timestamp: datetime
+    client_action_id: Optional[str] = None
+    repair_notes: Optional[str] = None
+    repair_category: Optional[str] = None
+
+class FaultSyncRequest(BaseModel):
+    actions: List[SyncAction]
+
 class TransferResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: str
@@ -155,6 +201,36 @@ class TransferCreate(BaseModel):
 class TransferReject(BaseModel):
     rejection_reason: str
 
+class BulkTransferApprove(BaseModel):
+    transfer_ids: List[str]
+
+class DeviceMetrics(BaseModel):
+    mtbf: float = 0.0
+    mttr: float = 0.0
+    availability: float = 100.0
+    total_faults: int = 0
+    open_faults: int = 0
+    in_progress_faults: int = 0
+    closed_faults: int = 0
+    avg_repair_duration: float = 0.0
+    last_fault_at: Optional[datetime] = None
+
+class DeviceDetailResponse(BaseModel):
+    device: DeviceResponse
+    metrics: DeviceMetrics
+    faults: List[FaultRecordResponse]
+    fault_offset: int = 0
+    fault_limit: int = 0
+    transfers: List[TransferResponse]
+
+class BatchOperation(BaseModel):
+    id: Optional[str] = None
+    path: str
+    params: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
 # ===== AUTHENTICATION =====
 
 def create_access_token(data: dict):
@@ -164,22 +240,59 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def run_bcrypt(operation: str, fn, *args):
+    started = time.perf_counter()
+    with BCRYPT_WAITING.track():
+        bcrypt_slots.acquire()
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        with BCRYPT_ACTIVE.track():
+            return fn(*args)
+    finally:
+        bcrypt_slots.release()
+        BCRYPT_SECONDS.observe(time.perf_counter() - started, operation=operation)
+
+def hash_password(password: str) -> str:
+    return run_bcrypt("hash", pwd_context.hash, password)
+
+def verify_password(password: str, hashed: str) -> bool:
+    return run_bcrypt("verify", pwd_context.verify, password, hashed)
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    with timed("auth"):
+        try:
+            token = credentials.credentials
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise HTTPException(status_code=401, detail="Invalid credentials")
+        except JWTError:
             raise HTTPException(status_code=401, detail="Invalid credentials")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        raise HTTPException(status_code=401, detail="User not found")
+        
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
     
+    request.state.user_role = user.role
     return user
 
+def can_profile(authorization: str) -> bool:
+    """Whether an X-Profile request's bearer token belongs to a quality user."""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user_id = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return False
+    if user_id is None:
+        return False
+    
+    db = SessionLocal()
+    try:
+        return db.query(User.role).filter(User.id == user_id).scalar() == UserRole.QUALITY
+    finally:
+        db.close()
+
 # ===== HELPER FUNCTIONS =====
 
 def create_log(db: Session, record_id: str, event: str, user_id: str = None, user_name: str = None):
@@ -193,11 +306,28 @@ def create_log(db: Session, record_id: str, event: str, user_id: str = None, use
     db.add(log)
     db.commit()
 
+def add_logs(db: Session, entries: List[tuple], user_id: str = None, user_name: str = None):
+    """Queue (record_id, event) log entries without committing, for bulk operations."""
+    db.add_all([
+        Log(
+            id=str(uuid.uuid4()),
+            record_id=record_id,
+            event=event,
+            user_id=user_id,
+            user_name=user_name
+        ) for record_id, event in entries
+    ])
+
 def calculate_device_metrics(db: Session, device_id: str):
     device = db.query(Device).filter(Device.id == device_id).first()
     if not device:
         return
     
+    apply_device_metrics(device)
+    db.commit()
+
+def apply_device_metrics(device: Device):
+    """Recompute MTBF, MTTR and availability from the device counters (no commit)."""
     total_failures = device.total_failures
     total_operating_hours = device.total_operating_hours
     total_repair_hours = device.total_repair_hours
@@ -221,7 +351,35 @@ def calculate_device_metrics(db: Session, device_id: str):
     device.mtbf = mtbf
     device.mttr = mttr
     device.availability = availability
-    db.commit()
+
+def parse_fields(fields: Optional[str], response_model) -> Optional[List[str]]:
+    """Parse a ?fields=a,b,c query parameter against a response model.
+
+    Returns None when no selection was requested. The id column is always
+    included so clients can still key rows.
+    """
+    if not fields:
+        return None
+    
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in response_model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    if "id" not in requested:
+        requested.insert(0, "id")
+    return list(dict.fromkeys(requested))
+
+def select_fields(db: Session, model, fields: List[str]):
+    """Build a Core column query for only the requested fields."""
+    return db.query(*[getattr(model, f) for f in fields])
+
+def fields_response(rows) -> JSONResponse:
+    return JSONResponse(content=jsonable_encoder([row._asdict() for row in rows]))
+
+def response_columns(model, response_model):
+    """ORM attributes backing a response model, for load_only()."""
+    return [getattr(model, f) for f in response_model.model_fields if hasattr(model, f)]
 
 # ===== AUTH ROUTES =====
 
@@ -233,7 +391,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = pwd_context.hash(user_data.password)
+    hashed_password = hash_password(user_data.password)
     
     # Create user
     user = User(
@@ -256,7 +414,7 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not pwd_context.verify(credentials.password, user.password):
+    if not verify_password(credentials.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token = create_access_token(data={"sub": user.id, "email": user.email})
@@ -311,15 +469,36 @@ def create_device(device_data: DeviceCreate, current_user: User = Depends(get_cu
     
     return device
 
+@api_router.post("/devices/import")
+@admission_class("bulk")
+def import_devices_file(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role not in [UserRole.MANAGER, UserRole.TECHNICIAN]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if not (file.filename or "").lower().endswith((".csv", ".xlsx", ".xlsm")):
+        raise HTTPException(status_code=400, detail="Only .csv and .xlsx files are supported")
+    
+    return import_devices(db, file.file, file.filename, dry_run=dry_run)
+
 @api_router.get("/devices", response_model=List[DeviceResponse])
 def get_devices(
     device_id: Optional[str] = None,
     type: Optional[str] = None,
     location: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user), 
     db: Session = Depends(get_db)
 ):
-    query = db.query(Device)
+    selected = parse_fields(fields, DeviceResponse)
+    if selected:
+        query = select_fields(db, Device, selected)
+    else:
+        query = db.query(Device).options(load_only(*response_columns(Device, DeviceResponse)))
     
     # Apply filters
     if device_id:
@@ -330,6 +509,8 @@ def get_devices(
         query = query.filter(Device.location.ilike(f"%{location}%"))
     
     devices = query.all()
+    if selected:
+        return fields_response(devices)
     return devices
 
 @api_router.get("/devices/{device_id}", response_model=DeviceResponse)
@@ -339,15 +520,88 @@ def get_device(device_id: str, current_user: User = Depends(get_current_user), d
         raise HTTPException(status_code=404, detail="Device not found")
     return device
 
+@api_router.get("/devices/{device_id}/details", response_model=DeviceDetailResponse)
+def get_device_details(
+    device_id: str,
+    fault_limit: int = 50,
+    fault_offset: int = 0,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    fault_limit = max(1, min(fault_limit, 500))
+    fault_offset = max(0, fault_offset)
+    
+    # Device + transfer history (selectinload: 2 queries regardless of history size)
+    device = db.query(Device).options(
+        load_only(*response_columns(Device, DeviceResponse)),
+        selectinload(Device.transfers)
+    ).filter(Device.id == device_id).first()
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    
+    # Fault counters and repair stats in a single aggregate query
+    stats = db.query(
+        func.count(FaultRecord.id),
+        func.count(FaultRecord.id).filter(FaultRecord.status == FaultStatus.OPEN),
+        func.count(FaultRecord.id).filter(FaultRecord.status == FaultStatus.IN_PROGRESS),
+        func.count(FaultRecord.id).filter(FaultRecord.status == FaultStatus.CLOSED),
+        func.avg(FaultRecord.repair_duration).filter(FaultRecord.status == FaultStatus.CLOSED),
+        func.max(FaultRecord.created_at)
+    ).filter(FaultRecord.device_id == device_id).one()
+    
+    # Most recent fault window, served by idx_fault_records_device_created_at
+    faults = db.query(FaultRecord).filter(
+        FaultRecord.device_id == device_id
+    ).order_by(FaultRecord.created_at.desc()).offset(fault_offset).limit(fault_limit).all()
+    
+    metrics = DeviceMetrics(
+        mtbf=device.mtbf,
+        mttr=device.mttr,
+        availability=device.availability,
+        total_faults=stats[0],
+        open_faults=stats[1],
+        in_progress_faults=stats[2],
+        closed_faults=stats[3],
+        avg_repair_duration=round(float(stats[4] or 0), 2),
+        last_fault_at=stats[5]
+    )
+    
+    transfers = sorted(device.transfers, key=lambda t: t.requested_at, reverse=True)
+    
+    return {
+        "device": device,
+        "metrics": metrics,
+        "faults": faults,
+        "fault_offset": fault_offset,
+        "fault_limit": fault_limit,
+        "transfers": transfers
+    }
+
 @api_router.get("/devices/{device_id}/faults", response_model=List[FaultRecordResponse])
-def get_device_faults(device_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    faults = db.query(FaultRecord).filter(FaultRecord.device_id == device_id).order_by(FaultRecord.created_at.desc()).all()
+def get_device_faults(device_id: str, fields: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = parse_fields(fields, FaultRecordResponse)
+    query = select_fields(db, FaultRecord, selected) if selected else db.query(FaultRecord)
+    
+    faults = query.filter(FaultRecord.device_id == device_id).order_by(FaultRecord.created_at.desc()).all()
+    if selected:
+        return fields_response(faults)
     return faults
 
 # ===== FAULT RECORDS ROUTES =====
 
 @api_router.post("/faults", response_model=FaultRecordResponse)
-def create_fault(fault_data: FaultRecordCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_fault(
+    fault_data: FaultRecordCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if idempotency_key:
+        fingerprint = request_fingerprint(fault_data)
+        stored = find_stored_response(db, idempotency_key, current_user.id, "POST /faults", fingerprint)
+        if stored is not None:
+            return stored
+    
     # Get device
     device = db.query(Device).filter(Device.id == fault_data.device_id).first()
     if not device:
@@ -367,17 +621,56 @@ def create_fault(fault_data: FaultRecordCreate, current_user: User = Depends(get
     )
     
     db.add(fault)
-    db.commit()
-    db.refresh(fault)
+    if idempotency_key:
+        db.flush()
+        # Return exactly what is stored so first responses and replays match
+        fault = FaultRecordResponse.model_validate(fault)
+        stored = commit_with_key(db, idempotency_key, current_user.id, "POST /faults", fingerprint, fault)
+        if stored is not None:
+            return stored
+    else:
+        db.commit()
+        db.refresh(fault)
     
     # Create log
     create_log(db, fault.id, f"Arıza kaydı oluşturuldu: {fault_data.description}", current_user.id, current_user.name)
     
     return fault
 
+@api_router.post("/faults/intake", response_model=FaultRecordResponse)
+async def intake_fault(fault_data: FaultRecordCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # Group-committed variant of POST /faults for reporting bursts.
+    # Release the auth session's connection so waiting callers don't starve the intake writer.
+    user_id, user_name = current_user.id, current_user.name
+    db.close()
+    return await fault_intake.submit(fault_data.device_id, fault_data.description, user_id, user_name)
+
+@api_router.post("/faults/import")
+@admission_class("bulk")
+def import_fault_history(
+    file: UploadFile = File(...),
+    timezone_name: str = DEFAULT_TIMEZONE,
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if current_user.role not in [UserRole.MANAGER, UserRole.QUALITY]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if not (file.filename or "").lower().endswith((".csv", ".xlsx", ".xlsm")):
+        raise HTTPException(status_code=400, detail="Only .csv and .xlsx files are supported")
+    
+    try:
+        load_timezone(timezone_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return import_faults(db, file.file, file.filename, current_user, tz_name=timezone_name, dry_run=dry_run)
+
 @api_router.get("/faults", response_model=List[FaultRecordResponse])
-def get_faults(status: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    query = db.query(FaultRecord)
+def get_faults(status: Optional[str] = None, fields: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = parse_fields(fields, FaultRecordResponse)
+    query = select_fields(db, FaultRecord, selected) if selected else db.query(FaultRecord)
     
     if status:
         query = query.filter(FaultRecord.status == status)
@@ -389,14 +682,22 @@ def get_faults(status: Optional[str] = None, current_user: User = Depends(get_cu
         query = query.filter(FaultRecord.created_by == current_user.id)
     
     faults = query.order_by(FaultRecord.created_at.desc()).all()
+    if selected:
+        return fields_response(faults)
     return faults
 
 @api_router.get("/faults/all", response_model=List[FaultRecordResponse])
-def get_all_faults(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@admission_class("report")
+def get_all_faults(fields: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.MANAGER, UserRole.QUALITY]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    faults = db.query(FaultRecord).order_by(FaultRecord.created_at.desc()).all()
+    selected = parse_fields(fields, FaultRecordResponse)
+    query = select_fields(db, FaultRecord, selected) if selected else db.query(FaultRecord)
+    
+    faults = query.order_by(FaultRecord.created_at.desc()).all()
+    if selected:
+        return fields_response(faults)
     return faults
 
 @api_router.get("/faults/{fault_id}", response_model=FaultRecordResponse)
@@ -428,6 +729,158 @@ def assign_fault(fault_id: str, assign_data: FaultRecordAssign, current_user: Us
     
     return {"message": "Fault assigned successfully"}
 
+@api_router.post("/faults/bulk-assign")
+@admission_class("bulk")
+def bulk_assign_faults(assign_data: BulkFaultAssign, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.role != UserRole.MANAGER:
+        raise HTTPException(status_code=403, detail="Only managers can assign faults")
+    
+    fault_ids = {a.fault_id for a in assign_data.assignments}
+    technician_ids = {a.assigned_to for a in assign_data.assignments}
+    
+    fault_status = dict(db.query(FaultRecord.id, FaultRecord.status).filter(FaultRecord.id.in_(fault_ids)).all()) if fault_ids else {}
+    technicians = dict(db.query(User.id, User.name).filter(
+        User.id.in_(technician_ids),
+        User.role == UserRole.TECHNICIAN
+    ).all()) if technician_ids else {}
+    
+    results = []
+    assigned = {}
+    for assignment in assign_data.assignments:
+        if assignment.fault_id not in fault_status:
+            results.append({"id": assignment.fault_id, "success": False, "detail": "Fault not found"})
+        elif fault_status[assignment.fault_id] == FaultStatus.CLOSED:
+            results.append({"id": assignment.fault_id, "success": False, "detail": "Fault is closed"})
+        elif assignment.assigned_to not in technicians:
+            results.append({"id": assignment.fault_id, "success": False, "detail": "Invalid technician"})
+        else:
+            # A later entry for the same fault overrides an earlier one
+            assigned[assignment.fault_id] = assignment.assigned_to
+            results.append({"id": assignment.fault_id, "success": True, "detail": f"Assigned to {technicians[assignment.assigned_to]}"})
+    
+    # One UPDATE for all faults; the technician is picked per row with CASE
+    if assigned:
+        db.execute(
+            update(FaultRecord)
+            .where(FaultRecord.id.in_(assigned.keys()))
+            .values(
+                assigned_to=case(assigned, value=FaultRecord.id),
+                assigned_to_name=case({f: technicians[t] for f, t in assigned.items()}, value=FaultRecord.id),
+                status=FaultStatus.IN_PROGRESS
+            )
+            .execution_options(synchronize_session=False)
+        )
+    log_entries = [(fault_id, f"Teknisyene atandı: {technicians[t]}") for fault_id, t in assigned.items()]
+    
+    add_logs(db, log_entries, current_user.id, current_user.name)
+    db.commit()
+    
+    return {"applied": len(log_entries), "results": results}
+
+SYNC_MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+class SyncConflict(Exception):
+    pass
+
+# Fault columns read and written by /faults/sync
+SYNC_COLUMNS = ("id", "device_id", "assigned_to", "repair_start", "repair_end", "repair_duration", "repair_notes", "repair_category")
+
+def apply_sync_action(action: SyncAction, fault: Optional[Dict[str, Any]], timestamp: datetime, current_user: User) -> str:
+    """Apply one queued technician action to a fault's column values; returns the log event."""
+    if fault is None:
+        raise SyncConflict("Fault not found")
+    
+    if fault["assigned_to"] != current_user.id:
+        raise SyncConflict("Not assigned to you")
+    
+    if action.action == "start_repair":
+        if fault["repair_start"]:
+            raise SyncConflict("Repair already started")
+        
+        fault["repair_start"] = timestamp
+        return "Onarım başlatıldı"
+    
+    if action.action == "end_repair":
+        if not action.repair_category:
+            raise SyncConflict("Onarım kategorisi seçilmelidir")
+        if len(action.repair_notes or "") < 20:
+            raise SyncConflict("Onarım notları en az 20 karakter olmalıdır")
+        if not fault["repair_start"]:
+            raise SyncConflict("Repair not started yet")
+        if fault["repair_end"]:
+            raise SyncConflict("Repair already ended")
+        
+        repair_start = fault["repair_start"]
+        if repair_start.tzinfo is None:
+            repair_start = repair_start.replace(tzinfo=timezone.utc)
+        if timestamp < repair_start:
+            raise SyncConflict("Repair end is before repair start")
+        
+        fault["repair_end"] = timestamp
+        fault["repair_duration"] = (timestamp - repair_start).total_seconds() / 3600
+        fault["repair_notes"] = action.repair_notes
+        fault["repair_category"] = action.repair_category
+        return f"Onarım tamamlandı ({fault['repair_duration']:.2f} saat)"
+    
+    raise SyncConflict(f"Unknown action: {action.action}")
+
+@api_router.post("/faults/sync")
+def sync_technician_actions(sync_data: FaultSyncRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.role != UserRole.TECHNICIAN:
+        raise HTTPException(status_code=403, detail="Only technicians can sync repairs")
+    
+    fault_ids = {a.fault_id for a in sync_data.actions}
+    faults = {
+        row.id: row._asdict() for row in db.query(*[getattr(FaultRecord, c) for c in SYNC_COLUMNS])
+        .filter(FaultRecord.id.in_(fault_ids)).with_for_update()
+    } if fault_ids else {}
+    changed = set()
+    
+    now = datetime.now(timezone.utc)
+    results = []
+    log_entries = []
+    repair_hours = {}
+    
+    for index, action in enumerate(sync_data.actions):
+        action_id = action.client_action_id or str(index)
+        timestamp = action.client_timestamp
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        
+        fault = faults.get(action.fault_id)
+        try:
+            if timestamp > now + SYNC_MAX_CLOCK_SKEW:
+                raise SyncConflict("Client timestamp is in the future")
+            event = apply_sync_action(action, fault, timestamp, current_user)
+        except SyncConflict as e:
+            results.append({"id": action_id, "fault_id": action.fault_id, "success": False, "detail": str(e)})
+            continue
+        
+        if action.action == "end_repair":
+            repair_hours[fault["device_id"]] = repair_hours.get(fault["device_id"], 0.0) + fault["repair_duration"]
+        changed.add(fault["id"])
+        log_entries.append((fault["id"], event))
+        results.append({"id": action_id, "fault_id": action.fault_id, "success": True, "detail": event})
+    
+    # Changed faults are written in one executemany UPDATE by primary key
+    if changed:
+        db.execute(update(FaultRecord), [
+            {c: faults[fault_id][c] for c in SYNC_COLUMNS if c not in ("device_id", "assigned_to")}
+            for fault_id in changed
+        ])
+    
+    # Counters and MTBF/MTTR are recomputed once per affected device
+    if repair_hours:
+        devices = db.query(Device).filter(Device.id.in_(repair_hours.keys())).with_for_update().all()
+        for device in devices:
+            device.total_repair_hours += repair_hours[device.id]
+            apply_device_metrics(device)
+    
+    add_logs(db, log_entries, current_user.id, current_user.name)
+    db.commit()
+    
+    return {"applied": len(log_entries), "results": results}
+
 @api_router.post("/faults/{fault_id}/start-repair")
 def start_repair(fault_id: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.TECHNICIAN:
@@ -475,7 +928,10 @@ def end_repair(fault_id: str, repair_data: FaultRecordEndRepair, current_user: U
         raise HTTPException(status_code=400, detail="Repair already ended")
     
     repair_end = datetime.now(timezone.utc)
-    repair_duration = (repair_end - fault.repair_start).total_seconds() / 3600
+    repair_start = fault.repair_start
+    if repair_start.tzinfo is None:
+        repair_start = repair_start.replace(tzinfo=timezone.utc)
+    repair_duration = (repair_end - repair_start).total_seconds() / 3600
     
     fault.repair_end = repair_end
     fault.repair_duration = repair_duration
@@ -531,6 +987,7 @@ def confirm_fault(fault_id: str, current_user: User = Depends(get_current_user),
 # ===== REPORTS & DASHBOARD =====
 
 @api_router.get("/dashboard/stats")
+@read_only
 def get_dashboard_stats(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     total_devices = db.query(Device).count()
     total_faults = db.query(FaultRecord).count()
@@ -579,6 +1036,8 @@ def get_dashboard_stats(current_user: User = Depends(get_current_user), db: Sess
     }
 
 @api_router.get("/reports/breakdown-frequency")
+@read_only
+@admission_class("report")
 def breakdown_frequency_report(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.MANAGER, UserRole.QUALITY]:
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -604,6 +1063,8 @@ def breakdown_frequency_report(current_user: User = Depends(get_current_user), d
     return report_data
 
 @api_router.get("/reports/intervention-duration")
+@read_only
+@admission_class("report")
 def intervention_duration_report(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.MANAGER, UserRole.QUALITY]:
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -637,19 +1098,27 @@ def intervention_duration_report(current_user: User = Depends(get_current_user),
     return report_data
 
 @api_router.get("/reports/technician-performance")
+@read_only
+@admission_class("report")
 def technician_performance_report(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role not in [UserRole.MANAGER, UserRole.QUALITY]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
     technicians = db.query(User).filter(User.role == UserRole.TECHNICIAN).all()
     
+    # Assigned/completed counts for all technicians in one grouped query
+    counts = {
+        assigned_to: (total, completed)
+        for assigned_to, total, completed in db.query(
+            FaultRecord.assigned_to,
+            func.count(FaultRecord.id),
+            func.count(case((FaultRecord.status == FaultStatus.CLOSED, 1)))
+        ).filter(FaultRecord.assigned_to.isnot(None)).group_by(FaultRecord.assigned_to)
+    }
+    
     report_data = []
     for tech in technicians:
-        total_assigned = db.query(FaultRecord).filter(FaultRecord.assigned_to == tech.id).count()
-        completed = db.query(FaultRecord).filter(
-            FaultRecord.assigned_to == tech.id,
-            FaultRecord.status == FaultStatus.CLOSED
-        ).count()
+        total_assigned, completed = counts.get(tech.id, (0, 0))
         success_rate = (completed / total_assigned * 100) if total_assigned > 0 else 0
         
         report_data.append({
@@ -667,7 +1136,18 @@ def technician_performance_report(current_user: User = Depends(get_current_user)
 # ===== TRANSFER MANAGEMENT ROUTES =====
 
 @api_router.post("/transfers", response_model=TransferResponse)
-def create_transfer(transfer_data: TransferCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_transfer(
+    transfer_data: TransferCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    if idempotency_key:
+        fingerprint = request_fingerprint(transfer_data)
+        stored = find_stored_response(db, idempotency_key, current_user.id, "POST /transfers", fingerprint)
+        if stored is not None:
+            return stored
+    
     device = db.query(Device).filter(Device.id == transfer_data.device_id).first()
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -684,19 +1164,30 @@ def create_transfer(transfer_data: TransferCreate, current_user: User = Depends(
     )
     
     db.add(transfer)
-    db.commit()
-    db.refresh(transfer)
+    if idempotency_key:
+        db.flush()
+        # Return exactly what is stored so first responses and replays match
+        transfer = TransferResponse.model_validate(transfer)
+        stored = commit_with_key(db, idempotency_key, current_user.id, "POST /transfers", fingerprint, transfer)
+        if stored is not None:
+            return stored
+    else:
+        db.commit()
+        db.refresh(transfer)
     
     return transfer
 
 @api_router.get("/transfers", response_model=List[TransferResponse])
-def get_transfers(status: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    query = db.query(EquipmentTransfer)
+def get_transfers(status: Optional[str] = None, fields: Optional[str] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    selected = parse_fields(fields, TransferResponse)
+    query = select_fields(db, EquipmentTransfer, selected) if selected else db.query(EquipmentTransfer)
     
     if status:
         query = query.filter(EquipmentTransfer.status == status)
     
     transfers = query.order_by(EquipmentTransfer.requested_at.desc()).all()
+    if selected:
+        return fields_response(transfers)
     return transfers
 
 @api_router.post("/transfers/{transfer_id}/approve")
@@ -731,6 +1222,77 @@ def approve_transfer(transfer_id: str, current_user: User = Depends(get_current_
     
     return {"message": "Transfer approved and completed"}
 
+@api_router.post("/transfers/bulk-approve")
+@admission_class("bulk")
+def bulk_approve_transfers(approve_data: BulkTransferApprove, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can approve transfers")
+    
+    requested_ids = list(dict.fromkeys(approve_data.transfer_ids))
+    transfers = {
+        t.id: t for t in db.query(
+            EquipmentTransfer.id,
+            EquipmentTransfer.device_id,
+            EquipmentTransfer.from_location,
+            EquipmentTransfer.to_location,
+            EquipmentTransfer.requested_at,
+            EquipmentTransfer.status
+        ).filter(EquipmentTransfer.id.in_(requested_ids)).all()
+    } if requested_ids else {}
+    
+    pending = [t for t in transfers.values() if t.status == TransferStatus.PENDING]
+    changed = set()
+    if pending:
+        approved_at = datetime.now(timezone.utc)
+        
+        # A concurrent approve/reject may win the row after the read above, so only
+        # the rows this guarded UPDATE actually changed count as approved
+        changed = set(db.execute(
+            update(EquipmentTransfer)
+            .where(
+                EquipmentTransfer.id.in_([t.id for t in pending]),
+                EquipmentTransfer.status == TransferStatus.PENDING
+            )
+            .values(
+                status=TransferStatus.COMPLETED,
+                approved_by=current_user.id,
+                approved_by_name=current_user.name,
+                approved_at=approved_at,
+                completed_at=approved_at
+            )
+            .returning(EquipmentTransfer.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+    
+    approved = [t for t in pending if t.id in changed]
+    if approved:
+        # When a device is moved more than once, the latest request is its final location
+        final_location = {}
+        for transfer in sorted(approved, key=lambda t: t.requested_at):
+            final_location[transfer.device_id] = transfer.to_location
+        db.execute(
+            update(Device)
+            .where(Device.id.in_(final_location.keys()))
+            .values(location=case(final_location, value=Device.id))
+            .execution_options(synchronize_session=False)
+        )
+        
+        add_logs(db, [
+            (t.id, f"Transfer onaylandı: {t.from_location} → {t.to_location}") for t in approved
+        ], current_user.id, current_user.name)
+    db.commit()
+    
+    results = []
+    for transfer_id in requested_ids:
+        if transfer_id not in transfers:
+            results.append({"id": transfer_id, "success": False, "detail": "Transfer not found"})
+        elif transfer_id not in changed:
+            results.append({"id": transfer_id, "success": False, "detail": "Transfer is not pending"})
+        else:
+            results.append({"id": transfer_id, "success": True, "detail": "Transfer approved and completed"})
+    
+    return {"applied": len(approved), "results": results}
+
 @api_router.post("/transfers/{transfer_id}/reject")
 def reject_transfer(transfer_id: str, reject_data: TransferReject, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.QUALITY:
@@ -754,16 +1316,21 @@ def reject_transfer(transfer_id: str, reject_data: TransferReject, current_user:
     return {"message": "Transfer rejected"}
 
 # ===== EXCEL REPORT ROUTES =====
+# Report generation blocks on the database, so these are sync endpoints calling the sync
+# generators: they run on the threadpool instead of stalling the event loop for everyone
 
 @api_router.get("/reports/excel/device-failure-frequency")
-async def download_device_failure_frequency(year: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@read_only
+@admission_class("report")
+def download_device_failure_frequency(year: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.QUALITY:
         raise HTTPException(status_code=403, detail="Only quality department can download reports")
     
     if not year:
         year = datetime.now(timezone.utc).year
     
-    excel_file = await ExcelReportService.generate_device_failure_frequency_report_postgres(db, year)
+    with REPORT_SECONDS.time(report="device_failure_frequency"), timed("excel"):
+        excel_file = ExcelReportService.generate_device_failure_frequency_report_postgres(db, year)
     
     return StreamingResponse(
         excel_file,
@@ -772,14 +1339,17 @@ async def download_device_failure_frequency(year: Optional[int] = None, current_
     )
 
 @api_router.get("/reports/excel/intervention-duration")
-async def download_intervention_duration(year: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@read_only
+@admission_class("report")
+def download_intervention_duration(year: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.QUALITY:
         raise HTTPException(status_code=403, detail="Only quality department can download reports")
     
     if not year:
         year = datetime.now(timezone.utc).year
     
-    excel_file = await ExcelReportService.generate_intervention_duration_report_postgres(db, year)
+    with REPORT_SECONDS.time(report="intervention_duration"), timed("excel"):
+        excel_file = ExcelReportService.generate_intervention_duration_report_postgres(db, year)
     
     return StreamingResponse(
         excel_file,
@@ -788,14 +1358,17 @@ async def download_intervention_duration(year: Optional[int] = None, current_use
     )
 
 @api_router.get("/reports/excel/facility-issues")
-async def download_facility_issues(year: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@read_only
+@admission_class("report")
+def download_facility_issues(year: Optional[int] = None, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.QUALITY:
         raise HTTPException(status_code=403, detail="Only quality department can download reports")
     
     if not year:
         year = datetime.now(timezone.utc).year
     
-    excel_file = await ExcelReportService.generate_facility_issues_report_postgres(db, year)
+    with REPORT_SECONDS.time(report="facility_issues"), timed("excel"):
+        excel_file = ExcelReportService.generate_facility_issues_report_postgres(db, year)
     
     return StreamingResponse(
         excel_file,
@@ -806,6 +1379,7 @@ async def download_facility_issues(year: Optional[int] = None, current_user: Use
 # ===== QUALITY DASHBOARD LOGS =====
 
 @api_router.get("/quality/all-logs")
+@admission_class("report")
 def get_all_system_logs(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     if current_user.role != UserRole.QUALITY:
         raise HTTPException(status_code=403, detail="Only quality department can view all logs")
@@ -841,9 +1415,266 @@ def get_quality_system_stats(current_user: User = Depends(get_current_user), db:
         "pending_transfers": pending_transfers
     }
 
+@api_router.get("/quality/slow-queries")
+def get_slow_queries(limit: int = 100, current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can view slow queries")
+    
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "explain_enabled": slow_query_log.explain,
+        "explain_threshold_ms": slow_query_log.explain_ms,
+        "queries": slow_query_log.entries(limit)
+    }
+
+@api_router.post("/quality/profiler/sample")
+def start_profile_window(seconds: float = 10, interval_ms: float = PROFILE_INTERVAL_MS, current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can run the profiler")
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    if not 0 < seconds <= PROFILE_MAX_SECONDS or interval_ms < 1:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS:g}] and interval_ms >= 1")
+    
+    name = profiler.sample_window(seconds, interval_ms)
+    if name is None:
+        raise HTTPException(status_code=409, detail="Another profile is already running")
+    
+    return {"profile": name, "seconds": seconds, "interval_ms": interval_ms}
+
+@api_router.get("/quality/profiler/profiles")
+def list_profiles(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can view profiles")
+    
+    return profiler.store.list()
+
+@api_router.get("/quality/profiler/profiles/{name}")
+def download_profile(name: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can view profiles")
+    
+    path = profiler.store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+def require_quality(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can use memory diagnostics")
+    return current_user
+
+@api_router.get("/quality/memory")
+def get_memory_status(current_user: User = Depends(require_quality)):
+    return memory_diagnostics.status()
+
+@api_router.post("/quality/memory/tracemalloc/start")
+def start_tracemalloc(frames: int = 1, current_user: User = Depends(require_quality)):
+    return memory_diagnostics.start(frames)
+
+@api_router.post("/quality/memory/tracemalloc/stop")
+def stop_tracemalloc(current_user: User = Depends(require_quality)):
+    return memory_diagnostics.stop()
+
+@api_router.post("/quality/memory/snapshots")
+def take_memory_snapshot(label: Optional[str] = None, current_user: User = Depends(require_quality)):
+    return memory_diagnostics.take_snapshot(label)
+
+@api_router.get("/quality/memory/diff")
+def diff_memory_snapshots(base: str, target: str = "current", group_by: str = "lineno", limit: int = 30,
+                          current_user: User = Depends(require_quality)):
+    return memory_diagnostics.diff(base, target, group_by, limit)
+
+@api_router.get("/quality/memory/top")
+def get_top_allocators(group_by: str = "lineno", limit: int = 30, current_user: User = Depends(require_quality)):
+    return memory_diagnostics.top(group_by, limit)
+
+@api_router.get("/quality/memory/objects")
+def get_live_objects(collect: bool = False, current_user: User = Depends(require_quality)):
+    return live_objects(collect)
+
+# ===== BATCH ROUTES =====
+
+BATCH_MAX_OPERATIONS = 20
+# Operations call the endpoint directly with the batch's user and session, so
+# only GET routes whose sole dependencies are get_current_user and get_db (role
+# checks in the handler body) can be batched. The batch is @read_only, so its
+# snapshot is taken on the replica when one is configured and usable.
+BATCHABLE_PATHS = {
+    "/api/users",
+    "/api/users/technicians",
+    "/api/devices",
+    "/api/devices/{device_id}",
+    "/api/devices/{device_id}/details",
+    "/api/devices/{device_id}/faults",
+    "/api/faults",
+    "/api/faults/{fault_id}",
+    "/api/dashboard/stats",
+    "/api/reports/breakdown-frequency",
+    "/api/reports/intervention-duration",
+    "/api/reports/technician-performance",
+    "/api/transfers",
+    "/api/quality/system-stats",
+}
+
+def resolve_batch_route(path: str):
+    for route in api_router.routes:
+        if not isinstance(route, APIRoute) or "GET" not in route.methods or route.path not in BATCHABLE_PATHS:
+            continue
+        match, child_scope = route.matches({"type": "http", "path": path, "method": "GET"})
+        if match == Match.FULL:
+            return route, child_scope["path_params"]
+    return None, None
+
+def run_batch_operation(operation: BatchOperation, current_user: User, db: Session):
+    url = urlsplit(operation.path)
+    path = url.path if url.path.startswith("/api/") else "/api" + url.path
+    
+    route, path_params = resolve_batch_route(path)
+    if route is None:
+        raise HTTPException(status_code=404, detail=f"No batchable GET route for {path}")
+    
+    params = dict(parse_qsl(url.query))
+    params.update(operation.params)
+    
+    signature = inspect.signature(route.endpoint).parameters
+    kwargs = {"current_user": current_user, "db": db}
+    for name, value in {**params, **path_params}.items():
+        if name not in signature or name in kwargs:
+            continue
+        annotation = signature[name].annotation
+        try:
+            kwargs[name] = TypeAdapter(annotation).validate_python(value) if annotation is not inspect.Parameter.empty else value
+        except ValidationError:
+            raise HTTPException(status_code=422, detail=f"Invalid value for {name}")
+    
+    result = route.endpoint(**kwargs)
+    if isinstance(result, JSONResponse):
+        return json.loads(result.body)
+    if route.response_model is not None:
+        result = TypeAdapter(route.response_model).validate_python(result, from_attributes=True)
+    return jsonable_encoder(result)
+
+def begin_batch_snapshot(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True})
+
+@api_router.post("/batch")
+@read_only
+@admission_class("report")
+def batch_read(batch: BatchRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    if len(batch.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_OPERATIONS} operations per batch")
+    
+    # Start a fresh transaction so every operation reads the same snapshot.
+    # The sync Session is not thread-safe, so operations run in order on it.
+    db.commit()
+    begin_batch_snapshot(db)
+    
+    results = []
+    for index, operation in enumerate(batch.operations):
+        op_id = operation.id or str(index)
+        try:
+            body = run_batch_operation(operation, current_user, db)
+            results.append({"id": op_id, "status": 200, "body": body})
+        except HTTPException as e:
+            results.append({"id": op_id, "status": e.status_code, "body": {"detail": e.detail}})
+        except Exception:
+            # One failing operation must not fail the others; a failed statement
+            # aborts the transaction, so the rest continue in a new snapshot
+            logger.exception(f"Batch operation {operation.path} failed")
+            results.append({"id": op_id, "status": 500, "body": {"detail": "Internal server error"}})
+            db.rollback()
+            begin_batch_snapshot(db)
+    
+    db.rollback()
+    return {"results": results}
+
+# ===== WARM-UP & READINESS =====
+
+@warmup.step("pool", required=True)
+def warm_connection_pool():
+    return warm_pool(engine, DB_POOL_WARM)
+
+if replica_engine is not None:
+    @warmup.step("replica")
+    def warm_replica():
+        return {"pool": warm_pool(replica_engine, DB_POOL_WARM), "tables": warm_tables(replica_engine, Base.metadata)}
+
+@warmup.step("tables")
+def warm_table_cache():
+    return warm_tables(engine, Base.metadata)
+
+@warmup.step("queries")
+def warm_query_cache():
+    # Mapper configuration and the compiled-SQL cache for the dashboard queries
+    db = SessionLocal()
+    try:
+        get_dashboard_stats(None, db)
+    finally:
+        db.close()
+
+@warmup.step("bcrypt")
+def warm_password_hashing():
+    # passlib probes the bcrypt backend on first use
+    pwd_context.hash("warmup")
+
+@api_router.get("/health")
+@admission_class(None)
+def health():
+    return {"status": "ok"}
+
+@api_router.get("/ready")
+@admission_class(None)
+def readiness():
+    status = warmup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@api_router.get("/quality/pool")
+def get_pool_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.QUALITY:
+        raise HTTPException(status_code=403, detail="Only quality department can view pool statistics")
+    
+    usage = pool_usage(engine.pool)
+    checkouts, waited = POOL_CHECKOUT_SECONDS.totals()
+    return {
+        **usage,
+        "saturation": round(usage["checked_out"] / usage["capacity"], 3) if usage["capacity"] else None,
+        "timeout_seconds": getattr(engine.pool, "_timeout", None),
+        "recycle_seconds": engine.pool._recycle,
+        "checkouts": checkouts,
+        "avg_checkout_wait_ms": round(waited / checkouts * 1000, 3) if checkouts else None,
+        "admission": {name: route_class.status() for name, route_class in ROUTE_CLASSES.items()},
+        "replica": {**replica_router.status(), **pool_usage(replica_engine.pool)} if replica_engine is not None else None,
+        "warmup": warmup.status()
+    }
+
+# ===== METRICS =====
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # ===== FASTAPI APP SETUP =====
 
 app.include_router(api_router)
+register_pool(engine)
+for bind in filter(None, (engine, replica_engine)):
+    slow_query_log.install(bind)
+    install_db_timing(bind)
+    install_db_tracing(bind)
+if replica_engine is not None:
+    register_pool(replica_engine, prefix="tusep_db_replica")
+install_session_tracing()
+install_statement_timeouts()
+
+@app.exception_handler(OperationalError)
+async def statement_timeout_handler(request: Request, exc: OperationalError):
+    # SQLSTATE 57014: cancelled by the statement_timeout of the request's admission class
+    if getattr(exc.orig, "pgcode", None) != "57014":
+        raise exc
+    return JSONResponse(status_code=503, content={"detail": "Query exceeded the statement timeout for this request"})
 
 app.add_middleware(
     CORSMiddleware,
@@ -852,6 +1683,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(RequestContextMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(ProfilerMiddleware, authorize=can_profile)
+app.add_middleware(TracingMiddleware)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -862,7 +1699,21 @@ logger = logging.getLogger(__name__)
 @app.on_event("startup")
 def startup():
     logger.info("TÜSEP Backend Started - PostgreSQL Mode")
+    
+    db = SessionLocal()
+    try:
+        deleted = sweep_expired_keys(db)
+        if deleted:
+            logger.info(f"Removed {deleted} expired idempotency keys")
+    except Exception as e:
+        logger.warning(f"Idempotency key sweep failed: {e}")
+    finally:
+        db.close()
+    
+    warmup.start()
 
 @app.on_event("shutdown")
 def shutdown():
+    fault_intake.stop()
+    trace_exporter.flush()
     logger.info("TÜSEP Backend Shutdown")
@@ -765,7 +765,7 @@ async def download_device_failure_frequency(year: Optional[int] = None, current_
     if not year:
         year = datetime.now(timezone.utc).year
     
-    excel_file = await ExcelReportService.generate_device_failure_frequency_report_postgres(db, year)
+    excel_file = ExcelReportService.generate_device_failure_frequency_report_postgres(db, year)
     
     return StreamingResponse(
         excel_file,
@@ -781,7 +781,7 @@ async def download_intervention_duration(year: Optional[int] = None, current_use
     if not year:
         year = datetime.now(timezone.utc).year
     
-    excel_file = await ExcelReportService.generate_intervention_duration_report_postgres(db, year)
+    excel_file = ExcelReportService.generate_intervention_duration_report_postgres(db, year)
     
     return StreamingResponse(
         excel_file,
@@ -797,7 +797,7 @@ async def download_facility_issues(year: Optional[int] = None, current_user: Use
     if not year:
         year = datetime.now(timezone.utc).year
     
-    excel_file = await ExcelReportService.generate_facility_issues_report_postgres(db, year)
+    excel_file = ExcelReportService.generate_facility_issues_report_postgres(db, year)
     
     return StreamingResponse(
         excel_file,
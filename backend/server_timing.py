@@ -0,0 +1,128 @@
+"""
+Per-request time breakdown, sent as a Server-Timing header and logged as
+one JSON line per request.
+
+Phases overlap the way they do in the request: `auth` (get_current_user)
+and `excel` include the SQL they issue, which is also counted in `db`;
+`serialize` is response-model validation and JSON rendering after the
+endpoint returns, minus any lazy loads it triggers.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import time
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.responses import Response
+
+from profiler import profiled_thread
+from request_context import RequestTimings, current_timings
+
+logger = logging.getLogger("tusep.timing")
+
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+REQUEST_TIMING_LOG = os.environ.get('REQUEST_TIMING_LOG', '1') == '1'
+# Browsers hide Server-Timing from cross-origin callers unless this allows them
+TIMING_ALLOW_ORIGIN = os.environ.get('TIMING_ALLOW_ORIGIN', os.environ.get('CORS_ORIGINS', '*').replace(',', ' '))
+
+
+def install_db_timing(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._timing_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        timings = current_timings.get()
+        started = getattr(context, "_timing_started", None)
+        if timings is not None and started is not None:
+            timings.add_statement(time.perf_counter() - started)
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that marks where the endpoint ends and serialization begins."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The request handler reads dependant.call on every request
+        call = self.dependant.call
+
+        def mark(result):
+            timings = current_timings.get()
+            if timings is not None:
+                timings.endpoint_done(isinstance(result, Response))
+            return result
+
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def timed_call(**values):
+                return mark(await call(**values))
+        else:
+            @functools.wraps(call)
+            def timed_call(**values):
+                # Sync endpoints run on a threadpool worker; let a request profile follow them there
+                with profiled_thread():
+                    return mark(call(**values))
+
+        self.dependant.call = timed_call
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = current_timings.get()
+            if timings is not None:
+                timings.serialization_done()
+            return response
+
+        return timed_handler
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api"):
+            await self.app(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.header().encode("latin-1")))
+                    headers.append((b"timing-allow-origin", TIMING_ALLOW_ORIGIN.encode("latin-1")))
+                    message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_timings.reset(token)
+            if REQUEST_TIMING_LOG:
+                route = scope.get("route")
+                logger.info(json.dumps({
+                    "event": "request",
+                    "method": scope["method"],
+                    "route": getattr(route, "path", scope["path"]),
+                    "status": status_code,
+                    "role": scope["state"].get("user_role"),
+                    "db_target": scope["state"].get("db_target"),
+                    "duration_ms": round((time.perf_counter() - timings.started) * 1000, 2),
+                    "db_statements": timings.db_statements,
+                    **{f"{name}_ms": ms for name, ms in timings.milliseconds().items()},
+                }))
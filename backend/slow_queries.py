@@ -0,0 +1,181 @@
+"""
+Slow-query log.
+
+Engine cursor hooks time every statement; those above SLOW_QUERY_MS are
+logged with the route that issued them and the shape (types and list
+lengths, never values) of their bound parameters, and kept in an in-memory
+ring buffer. With SLOW_QUERY_EXPLAIN=1 on PostgreSQL, SELECTs slower than
+SLOW_QUERY_EXPLAIN_MS are re-run by a background thread under
+EXPLAIN (ANALYZE, BUFFERS) in a read-only transaction, at most once per
+statement per SLOW_QUERY_EXPLAIN_INTERVAL_S.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+
+from metrics import SLOW_QUERIES
+from request_context import current_route
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', '200'))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', '0') == '1'
+SLOW_QUERY_EXPLAIN_MS = float(os.environ.get('SLOW_QUERY_EXPLAIN_MS', '1000'))
+SLOW_QUERY_EXPLAIN_INTERVAL_S = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL_S', '600'))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.environ.get('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', '30000'))
+
+MAX_STATEMENT_LENGTH = 4000
+
+# Expanded IN lists differ only by their length; collapse them for grouping
+IN_LIST = re.compile(r"\(\s*%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+\s*\)|\(\s*\?(?:\s*,\s*\?)+\s*\)")
+EXPLAINABLE = re.compile(r"^\s*SELECT\b", re.I)
+
+
+def normalize_statement(statement: str) -> str:
+    return IN_LIST.sub("(...)", " ".join(statement.split()))
+
+
+def value_shape(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": parameter_shape(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {k: value_shape(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [value_shape(v) for v in parameters]
+    return value_shape(parameters)
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, size: int = SLOW_QUERY_LOG_SIZE,
+                 explain: bool = SLOW_QUERY_EXPLAIN, explain_ms: float = SLOW_QUERY_EXPLAIN_MS,
+                 explain_interval_s: float = SLOW_QUERY_EXPLAIN_INTERVAL_S):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.explain_ms = explain_ms
+        self.explain_interval_s = explain_interval_s
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._explained_at: Dict[str, float] = {}
+        self._explain_queue = queue.Queue(maxsize=16)
+        self._thread = None
+
+    def install(self, engine):
+        if engine.dialect.name != "postgresql":
+            self.explain = False
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_slow_query_started", None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= self.threshold_ms:
+            self.record(statement, parameters, executemany, duration_ms, conn.engine)
+
+    def record(self, statement: str, parameters: Any, executemany: bool, duration_ms: float, engine=None) -> dict:
+        normalized = normalize_statement(statement)
+        fingerprint = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+        route = current_route()
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "route": route,
+            "fingerprint": fingerprint,
+            "statement": normalized[:MAX_STATEMENT_LENGTH],
+            "parameters": parameter_shape(parameters, executemany),
+            "explain": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        SLOW_QUERIES.inc(route=route or "none")
+        logger.warning(f"Slow query {duration_ms:.1f} ms [{route or '-'}] {fingerprint}: {normalized[:300]}")
+
+        # EXPLAIN runs on the engine (primary or replica) that executed the statement
+        if (engine is not None and self.explain and not executemany and duration_ms >= self.explain_ms
+                and EXPLAINABLE.match(statement)):
+            self._schedule_explain(entry, engine, statement, parameters)
+        return entry
+
+    def _schedule_explain(self, entry: dict, engine, statement: str, parameters: Any):
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(entry["fingerprint"])
+            if last is not None and now - last < self.explain_interval_s:
+                return
+            self._explained_at[entry["fingerprint"]] = now
+        try:
+            self._explain_queue.put_nowait((entry, engine, statement, parameters))
+        except queue.Full:
+            with self._lock:
+                self._explained_at.pop(entry["fingerprint"], None)
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._explain_worker, name="slow-query-explain", daemon=True)
+            self._thread.start()
+
+    def _explain_worker(self):
+        while True:
+            try:
+                entry, engine, statement, parameters = self._explain_queue.get(timeout=30)
+            except queue.Empty:
+                return
+            plan = self._run_explain(engine, statement, parameters)
+            with self._lock:
+                entry["explain"] = plan
+
+    def _run_explain(self, engine, statement: str, parameters: Any) -> str:
+        # Raw DBAPI connection: bypasses the cursor hooks, so EXPLAIN is never logged itself
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SET TRANSACTION READ ONLY")
+            cursor.execute(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            logger.warning(f"EXPLAIN failed: {e}")
+            return f"EXPLAIN failed: {e}"
+        finally:
+            connection.rollback()
+            connection.close()
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Newest first."""
+        with self._lock:
+            items = [dict(e) for e in reversed(self._entries)]
+        return items[:limit] if limit else items
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained_at.clear()
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,335 @@
+"""
+Lightweight OpenTelemetry-style tracing with a local JSON-lines exporter.
+
+Each request gets a root span; DB statements, pool checkouts, ORM flushes
+(including audit-log rows), report rendering and fault-intake batches are
+recorded as children linked by trace id. No collector is needed: finished
+spans are queued to a background thread that appends them to TRACE_FILE,
+rotating it at TRACE_FILE_MAX_MB.
+
+Sampling is decided once per trace at the root (TRACE_SAMPLE_RATE), or
+taken from an incoming W3C `traceparent` header. Unsampled requests share a
+single non-recording span, so they allocate nothing per child span.
+"""
+
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', '1') == '1'
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_FILE = Path(os.environ.get('TRACE_FILE', '/tmp/tusep-traces.jsonl'))
+TRACE_FILE_MAX_MB = float(os.environ.get('TRACE_FILE_MAX_MB', '100'))
+TRACE_QUEUE_SIZE = int(os.environ.get('TRACE_QUEUE_SIZE', '10000'))
+
+SERVICE_NAME = "tusep-backend"
+MAX_STATEMENT_LENGTH = 1000
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "links", "error", "sampled")
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str = "internal",
+                 attributes: Optional[Dict[str, Any]] = None, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}" if sampled else ""
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.links = None
+        self.error = None
+        self.sampled = sampled
+
+    def set(self, key: str, value: Any):
+        if self.sampled:
+            if self.attributes is None:
+                self.attributes = {}
+            self.attributes[key] = value
+
+    def fail(self, error: BaseException):
+        if self.sampled:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.sampled and self.end_ns is None:
+            self.end_ns = time.time_ns()
+            exporter.export(self)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        record = {
+            "service": SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "ERROR" if self.error else "OK",
+            "attributes": self.attributes or {},
+        }
+        if self.error:
+            record["error"] = self.error
+        if self.links:
+            record["links"] = self.links
+        return record
+
+
+NOOP_SPAN = Span("", None, "noop", sampled=False)
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JsonLinesExporter:
+    """Appends finished spans to a file from a background thread; drops spans when the queue is full."""
+
+    def __init__(self, path: Path = TRACE_FILE, max_bytes: int = int(TRACE_FILE_MAX_MB * 1024 * 1024),
+                 queue_size: int = TRACE_QUEUE_SIZE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def _drain(self, first: Span) -> list:
+        spans = [first]
+        while len(spans) < 1000:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=5)
+            except queue.Empty:
+                return
+            self._write(self._drain(first))
+
+    def _write(self, spans: list):
+        try:
+            self._append(spans)
+        finally:
+            for _ in spans:
+                self._queue.task_done()
+
+    def _append(self, spans: list):
+        lines = "".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n" for s in spans)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size + len(lines) > self.max_bytes:
+                self.path.replace(self.path.with_name(self.path.name + ".1"))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            logger.warning(f"Trace export failed: {e}")
+
+    def flush(self, timeout: float = 5.0):
+        """Write everything queued so far (used at shutdown and in tests)."""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            try:
+                self._write(self._drain(self._queue.get_nowait()))
+            except queue.Empty:
+                break
+        # Batches the worker already took off the queue
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+
+exporter = JsonLinesExporter()
+
+
+def start_root(name: str, traceparent: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None) -> Span:
+    """Root span for incoming work; continues the caller's trace and sampling decision if given."""
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    match = TRACEPARENT.match(traceparent or "")
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        sampled = bool(int(flags, 16) & 1)
+    else:
+        trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        sampled = random.random() < TRACE_SAMPLE_RATE
+    if not sampled:
+        return NOOP_SPAN
+    return Span(trace_id, parent_id, name, kind="server", attributes=attributes)
+
+
+@contextmanager
+def start_span(name: str, parent: Optional[Span] = None, links: Iterable[Span] = (), **attributes):
+    """Child of `parent` or of the current span; a no-op outside a sampled trace."""
+    parent = parent or current_span.get()
+    if parent is None or not parent.sampled:
+        yield NOOP_SPAN
+        return
+    span = Span(parent.trace_id, parent.span_id, name, attributes=attributes or None)
+    span.links = [{"trace_id": s.trace_id, "span_id": s.span_id} for s in links if s.sampled] or None
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.fail(e)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+
+def traced(name: str, **attributes):
+    """Run the decorated function inside a span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install_db_tracing(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        parent = current_span.get()
+        if parent is not None and parent.sampled and context is not None:
+            context._trace_span = Span(parent.trace_id, parent.span_id, "db.query", kind="client", attributes={
+                "db.system": conn.dialect.name,
+                "db.statement": " ".join(statement.split())[:MAX_STATEMENT_LENGTH],
+                "db.executemany": executemany,
+            })
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.set("db.rowcount", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def error(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None:
+            span.fail(exception_context.original_exception)
+            span.end()
+
+
+def install_session_tracing():
+    """Span per ORM flush; counts the audit-log rows written with it."""
+    @event.listens_for(Session, "before_flush")
+    def before_flush(session, flush_context, instances):
+        finish(session, "flush did not complete")
+        parent = current_span.get()
+        if parent is None or not parent.sampled:
+            return
+        span = Span(parent.trace_id, parent.span_id, "orm.flush", attributes={
+            "orm.new": len(session.new),
+            "orm.dirty": len(session.dirty),
+            "orm.deleted": len(session.deleted),
+            "audit.log_entries": sum(1 for obj in session.new if getattr(obj, "__tablename__", None) == "logs"),
+        })
+        session.info["_trace_flush"] = (span, current_span.set(span))
+
+    def finish(session, error: Optional[str] = None):
+        pending = session.info.pop("_trace_flush", None)
+        if pending is not None:
+            span, token = pending
+            try:
+                current_span.reset(token)
+            except ValueError:
+                # Finished from another context (e.g. a rollback on a different thread)
+                pass
+            if error:
+                span.error = error
+            span.end()
+
+    @event.listens_for(Session, "after_flush_postexec")
+    def after_flush(session, flush_context):
+        finish(session)
+
+    @event.listens_for(Session, "after_soft_rollback")
+    def after_rollback(session, previous_transaction):
+        finish(session, "flush rolled back")
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/api"):
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k == b"traceparent"), None)
+        span = start_root(f"{scope['method']} {scope['path']}", traceparent, {"http.method": scope["method"],
+                                                                           "http.target": scope["path"]})
+        if not span.sampled:
+            await self.app(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})
+        token = current_span.set(span)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"traceparent", span.traceparent().encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            current_span.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.set("http.route", route.path)
+            span.set("http.status_code", status_code)
+            span.set("user.role", scope["state"].get("user_role"))
+            if status_code >= 500 and span.error is None:
+                span.error = f"HTTP {status_code}"
+            span.end()
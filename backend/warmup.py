@@ -0,0 +1,141 @@
+"""
+Startup warm-up and readiness.
+
+The engine connects lazily, so without warm-up the first requests after a
+deploy pay for connection handshakes, mapper configuration, SQL compilation,
+the bcrypt backend probe and cold Postgres buffers. `Warmup` runs named
+steps in a background thread at startup and /api/ready answers 503 until
+they have finished, so a load balancer only routes traffic to a warm worker.
+
+Required steps (opening the pool) are retried until they succeed; failures
+of best-effort steps (cache warming) are logged and reported but do not hold
+readiness back.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, inspect, select, text
+
+from metrics import pool_usage
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') == '1'
+WARMUP_RETRY_S = float(os.environ.get('WARMUP_RETRY_S', '5'))
+
+
+class Warmup:
+    def __init__(self, retry_seconds: float = WARMUP_RETRY_S):
+        self.retry_seconds = retry_seconds
+        self.state = "pending"
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.results: Dict[str, dict] = {}
+        self._steps: List[Tuple[str, Callable, bool]] = []
+        self._done = threading.Event()
+        self._thread = None
+
+    def step(self, name: str, required: bool = False):
+        """Register a warm-up step; steps run in registration order."""
+        def decorator(fn):
+            self._steps.append((name, fn, required))
+            return fn
+        return decorator
+
+    def start(self):
+        if not WARMUP_ENABLED:
+            self.state = "skipped"
+            self._done.set()
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+            self._thread.start()
+
+    def _run_step(self, name: str, fn: Callable) -> bool:
+        started = time.perf_counter()
+        try:
+            detail = fn()
+            result = {"ok": True, "detail": detail}
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.results[name] = result
+        return result["ok"]
+
+    def run(self):
+        self.state = "running"
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        for name, fn, required in self._steps:
+            while not self._run_step(name, fn) and required:
+                self.state = "retrying"
+                time.sleep(self.retry_seconds)
+            self.state = "running"
+        self.state = "ready"
+        self.finished_at = datetime.now(timezone.utc).isoformat()
+        self._done.set()
+        total = sum(r["ms"] for r in self.results.values())
+        logger.info(f"Warm-up finished in {total:.0f} ms")
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": dict(self.results),
+        }
+
+
+def warm_pool(engine, connections: int) -> dict:
+    """Open up to `connections` at once and return them, leaving them idle in the pool."""
+    size = pool_usage(engine.pool)["size"]
+    # Connections beyond pool_size are overflow and would be closed on check-in
+    connections = min(connections, size) if size is not None else 0
+    opened = []
+    try:
+        for _ in range(connections):
+            opened.append(engine.connect())
+    finally:
+        for conn in opened:
+            conn.close()
+    return {"opened": len(opened), **pool_usage(engine.pool)}
+
+
+def warm_tables(engine, metadata) -> Dict[str, int]:
+    """Read every existing table so the first queries find its pages cached.
+
+    Uses pg_prewarm (pages loaded, heap and indexes) when the extension is
+    installed, otherwise a count(*) scan (rows).
+    """
+    warmed = {}
+    with engine.connect() as conn:
+        existing = set(inspect(conn).get_table_names())
+        prewarm = conn.dialect.name == "postgresql" and conn.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'")).first() is not None
+        for table in metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            if prewarm:
+                warmed[table.name] = conn.execute(text(
+                    "SELECT pg_prewarm(CAST(:t AS regclass)) + (SELECT coalesce(sum(pg_prewarm(indexrelid::regclass)), 0) "
+                    "FROM pg_index WHERE indrelid = CAST(:t AS regclass))"), {"t": table.name}).scalar()
+            else:
+                warmed[table.name] = conn.execute(select(func.count()).select_from(table)).scalar()
+        conn.rollback()
+    return warmed
+
+
+warmup = Warmup()
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Çok rollü iş akışı yük üretici
+
+Gerçekçi karışık oturumları çalışan bir backend'e (veya --in-process ile aynı
+süreçteki uygulamaya) karşı tekrar oynatır:
+
+    sağlık personeli  arıza bildirir, onarımı biten kendi arızalarını onaylar
+    yönetici          açık arızaları bu çalıştırmadaki teknisyenlere atar
+    teknisyen         atanan arızalarda onarımı başlatır / bitirir
+    kalite            Excel raporlarını ve sistem istatistiklerini indirir
+
+İki mod vardır:
+    --mode concurrency  Rol başına sabit sayıda sanal kullanıcı, düşünme
+                        süresiyle döngüde (kapalı model)
+    --mode rate         Rol başına saniyedeki oturum sayısı; Poisson
+                        gelişleri yanıt süresinden bağımsız başlatılır
+                        (açık model), --max-inflight aşılırsa düşürülür
+
+Her adım için istek/sn, p50/p95/p99 gecikme ve hata oranları raporlanır.
+Kullanıcılar database/generate_synthetic_data.py'nin oluşturduğu
+sentetik hesaplardır (şifre 12345).
+
+Kullanım:
+    python benchmarks/workflow_load.py --base-url http://localhost:8001 \\
+        --mode concurrency --users health_staff=40,manager=2,technician=15,quality=1 --duration 120
+
+    python benchmarks/workflow_load.py --mode rate \\
+        --rates health_staff=10,manager=1,technician=5,quality=0.2 --duration 120 --output yuk.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from endpoint_latency import PASSWORD, REPAIR_NOTES, percentile, git_commit
+
+ROLES = ("health_staff", "manager", "technician", "quality")
+# Accounts created by generate_synthetic_data.py with its default options
+DEFAULT_ACCOUNTS = "health_staff=400,manager=5,technician=40,quality=3"
+EXCEL_REPORTS = ("device-failure-frequency", "intervention-duration", "facility-issues")
+REPAIR_CATEGORIES = ("part_replacement", "adjustment", "complete_repair", "other")
+
+
+class Stats:
+    """Latency samples and outcome counts per workflow step."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.recording = False
+        self.started = None
+        self.stopped = None
+
+    def start(self):
+        self.recording = True
+        self.started = time.monotonic()
+
+    def stop(self):
+        self.recording = False
+        self.stopped = time.monotonic()
+
+    def record(self, step: str, elapsed: float, outcome: str):
+        if self.recording:
+            self.latencies[step].append(elapsed)
+            self.outcomes[step][outcome] += 1
+
+    def summary(self):
+        window = (self.stopped or time.monotonic()) - (self.started or time.monotonic())
+        rows = []
+        for step in sorted(set(self.latencies) | set(self.outcomes)):
+            ordered = sorted(self.latencies[step])
+            outcomes = dict(self.outcomes[step])
+            total = sum(outcomes.values())
+            failures = total - outcomes.get("ok", 0)
+            rows.append({
+                "step": step,
+                "requests": total,
+                "throughput_rps": round(total / window, 2) if window > 0 else 0.0,
+                "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+                "error_rate": round(failures / total, 4) if total else 0.0,
+                "outcomes": outcomes,
+            })
+        return window, rows
+
+
+class Shared:
+    """State shared by all virtual users of one run."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.device_ids = []
+        self.technician_ids = []
+
+
+class Session:
+    """One logged-in account issuing timed requests."""
+
+    def __init__(self, client, stats: Stats, role: str, email: str):
+        self.client = client
+        self.stats = stats
+        self.role = role
+        self.email = email
+        self.user_id = None
+        self.headers = {}
+
+    async def request(self, step: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except Exception:
+            self.stats.record(step, time.perf_counter() - started, "exception")
+            return None
+        elapsed = time.perf_counter() - started
+
+        if response.status_code < 400:
+            outcome = "ok"
+        elif response.status_code in (429, 503):
+            outcome = "rejected"
+        elif response.status_code < 500:
+            outcome = "client_error"
+        else:
+            outcome = "server_error"
+        self.stats.record(step, elapsed, outcome)
+        return response if outcome == "ok" else None
+
+    async def login(self) -> bool:
+        response = await self.request("login", "POST", "/api/auth/login",
+                                      json={"email": self.email, "password": PASSWORD})
+        if response is None:
+            return False
+        body = response.json()
+        self.user_id = body["user"]["id"]
+        self.headers = {"Authorization": f"Bearer {body['access_token']}"}
+        return True
+
+
+async def staff_iteration(session: Session, shared: Shared):
+    if shared.device_ids:
+        await session.request("staff.report_fault", "POST", "/api/faults", json={
+            "device_id": shared.rng.choice(shared.device_ids),
+            "description": shared.rng.choice(("Cihaz açılmıyor", "Alarm sürekli çalıyor", "Ekranda görüntü yok",
+                                              "Elektrik kesintisi sonrası açılmıyor")),
+        })
+
+    response = await session.request("staff.list_faults", "GET", "/api/faults",
+                                     params={"status": "in_progress", "fields": "id,repair_end"})
+    if response is not None:
+        for fault in response.json():
+            if fault.get("repair_end"):
+                await session.request("staff.confirm", "POST", f"/api/faults/{fault['id']}/confirm")
+                break
+
+
+async def manager_iteration(session: Session, shared: Shared, assign_batch: int):
+    response = await session.request("manager.list_open", "GET", "/api/faults",
+                                     params={"status": "open", "fields": "id"})
+    if response is not None and shared.technician_ids:
+        for fault in response.json()[:assign_batch]:
+            await session.request("manager.assign", "POST", f"/api/faults/{fault['id']}/assign",
+                                  json={"assigned_to": shared.rng.choice(shared.technician_ids)})
+
+    if shared.rng.random() < 0.2:
+        await session.request("manager.dashboard", "GET", "/api/dashboard/stats")
+
+
+async def technician_iteration(session: Session, shared: Shared):
+    response = await session.request("technician.list_assigned", "GET", "/api/faults",
+                                     params={"status": "in_progress", "fields": "id,repair_start,repair_end"})
+    if response is None:
+        return
+
+    faults = response.json()
+    started = [f for f in faults if f.get("repair_start") and not f.get("repair_end")]
+    waiting = [f for f in faults if not f.get("repair_start")]
+    if started:
+        await session.request("technician.end_repair", "POST", f"/api/faults/{started[0]['id']}/end-repair", json={
+            "repair_notes": REPAIR_NOTES,
+            "repair_category": shared.rng.choice(REPAIR_CATEGORIES),
+        })
+    if waiting:
+        await session.request("technician.start_repair", "POST", f"/api/faults/{waiting[0]['id']}/start-repair")
+
+
+async def quality_iteration(session: Session, shared: Shared):
+    report = shared.rng.choice(EXCEL_REPORTS)
+    await session.request(f"quality.excel_{report.replace('-', '_')}", "GET", f"/api/reports/excel/{report}",
+                          params={"year": datetime.now(timezone.utc).year})
+    await session.request("quality.system_stats", "GET", "/api/quality/system-stats")
+
+
+def iteration_for(role: str, args):
+    if role == "health_staff":
+        return staff_iteration
+    if role == "manager":
+        return lambda session, shared: manager_iteration(session, shared, args.assign_batch)
+    if role == "technician":
+        return technician_iteration
+    return quality_iteration
+
+
+def parse_roles(value: str, cast=int):
+    result = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        role, _, amount = item.partition("=")
+        if role not in ROLES:
+            raise SystemExit(f"Bilinmeyen rol: {role}")
+        result[role] = cast(amount)
+    return result
+
+
+async def open_sessions(client, stats, role: str, count: int, accounts: int):
+    sessions = [Session(client, stats, role, f"{role}{i % accounts}@sentetik.hastane") for i in range(count)]
+    # Logins are bcrypt-bound; keep them from saturating the server before the run
+    semaphore = asyncio.Semaphore(8)
+
+    async def login(session):
+        async with semaphore:
+            return await session.login()
+
+    results = await asyncio.gather(*[login(s) for s in sessions])
+    return [s for s, ok in zip(sessions, results) if ok]
+
+
+async def run_concurrency(sessions_by_role, shared, stats, args, deadline):
+    async def virtual_user(session, iteration, delay):
+        await asyncio.sleep(delay)
+        while time.monotonic() < deadline:
+            await iteration(session, shared)
+            await asyncio.sleep(shared.rng.expovariate(1 / args.think_time) if args.think_time > 0 else 0)
+
+    tasks = []
+    for role, sessions in sessions_by_role.items():
+        iteration = iteration_for(role, args)
+        for index, session in enumerate(sessions):
+            delay = args.ramp_up * index / max(len(sessions), 1)
+            tasks.append(virtual_user(session, iteration, delay))
+    await asyncio.gather(*tasks)
+
+
+async def run_rate(sessions_by_role, rates, shared, stats, args, deadline):
+    inflight = set()
+    dropped = defaultdict(int)
+
+    async def arrivals(role, rate):
+        iteration = iteration_for(role, args)
+        sessions = sessions_by_role[role]
+        next_at = time.monotonic()
+        while True:
+            next_at += shared.rng.expovariate(rate)
+            if next_at >= deadline:
+                return
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            if len(inflight) >= args.max_inflight:
+                if stats.recording:
+                    dropped[role] += 1
+                continue
+            task = asyncio.create_task(iteration(shared.rng.choice(sessions), shared))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+
+    await asyncio.gather(*[arrivals(role, rate) for role, rate in rates.items() if rate > 0])
+    if inflight:
+        await asyncio.wait(inflight, timeout=args.drain_timeout)
+    return dict(dropped)
+
+
+async def run(args):
+    import httpx
+
+    stats = Stats()
+    shared = Shared(args.seed)
+    accounts = parse_roles(args.accounts)
+
+    if args.in_process:
+        sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+        from server import app
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load", timeout=args.timeout)
+    else:
+        limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits)
+
+    async with client:
+        if args.mode == "concurrency":
+            counts = parse_roles(args.users)
+        else:
+            rates = parse_roles(args.rates, float)
+            # Open-model arrivals are served by a pool of logged-in accounts per role
+            counts = {role: min(accounts.get(role, 1), args.session_pool) for role, rate in rates.items() if rate > 0}
+
+        print("🔐 Oturumlar açılıyor...")
+        sessions_by_role = {}
+        for role, count in counts.items():
+            if count <= 0:
+                continue
+            sessions_by_role[role] = await open_sessions(client, stats, role, count, accounts.get(role, 1))
+            if not sessions_by_role[role]:
+                raise SystemExit(f"{role} hesaplarıyla giriş yapılamadı; sentetik veri yüklü mü?")
+
+        shared.technician_ids = list({s.user_id for s in sessions_by_role.get("technician", [])})
+        first = next(iter(sessions_by_role.values()))[0]
+        response = await first.request("setup.devices", "GET", "/api/devices", params={"fields": "id"})
+        shared.device_ids = [d["id"] for d in response.json()] if response is not None else []
+
+        print(f"🚀 {args.mode} modu, {args.duration:.0f} sn (ısınma {args.warmup:.0f} sn)")
+        loop = asyncio.get_running_loop()
+        loop.call_later(args.warmup, stats.start)
+        deadline = time.monotonic() + args.warmup + args.duration
+
+        dropped = {}
+        if args.mode == "concurrency":
+            await run_concurrency(sessions_by_role, shared, stats, args, deadline)
+        else:
+            dropped = await run_rate(sessions_by_role, rates, shared, stats, args, deadline)
+        stats.stop()
+
+    window, rows = stats.summary()
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "target": "in-process" if args.in_process else args.base_url,
+        "mode": args.mode,
+        "config": {
+            "users": args.users if args.mode == "concurrency" else None,
+            "rates": args.rates if args.mode == "rate" else None,
+            "duration": args.duration,
+            "think_time": args.think_time,
+            "max_inflight": args.max_inflight,
+        },
+        "window_seconds": round(window, 2),
+        "dropped_arrivals": dropped,
+        "steps": rows,
+    }
+
+
+def print_report(report):
+    print(f"\n{'Adım':40} {'istek':>7} {'istek/sn':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'hata':>7}")
+    for row in report["steps"]:
+        print(f"{row['step']:40} {row['requests']:7} {row['throughput_rps']:9.2f} {row['p50_ms']:9.1f} "
+              f"{row['p95_ms']:9.1f} {row['p99_ms']:9.1f} {row['error_rate']:7.1%}")
+    total = sum(r["requests"] for r in report["steps"])
+    print(f"\nToplam: {total} istek, {total / report['window_seconds']:.1f} istek/sn" if report["window_seconds"] else "")
+    if report["dropped_arrivals"]:
+        print(f"⚠️  Eşzamanlı limit nedeniyle düşürülen oturumlar: {report['dropped_arrivals']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çok rollü iş akışı yük üretici")
+    parser.add_argument("--base-url", default=os.environ.get("BACKEND_URL", "http://localhost:8001"))
+    parser.add_argument("--in-process", action="store_true", help="Uygulamayı aynı süreçte çalıştır (DATABASE_URL)")
+    parser.add_argument("--mode", choices=("concurrency", "rate"), default="concurrency")
+    parser.add_argument("--users", default="health_staff=20,manager=2,technician=10,quality=1",
+                        help="concurrency modu: rol başına sanal kullanıcı")
+    parser.add_argument("--rates", default="health_staff=5,manager=0.5,technician=3,quality=0.1",
+                        help="rate modu: rol başına saniyedeki oturum")
+    parser.add_argument("--accounts", default=DEFAULT_ACCOUNTS, help="Rol başına mevcut sentetik hesap sayısı")
+    parser.add_argument("--session-pool", type=int, default=20, help="rate modu: rol başına açık oturum")
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--warmup", type=float, default=5.0, help="İstatistiklere katılmayan ilk süre")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="concurrency modu: kullanıcıların başlama aralığı")
+    parser.add_argument("--think-time", type=float, default=1.0, help="concurrency modu: ortalama bekleme (sn)")
+    parser.add_argument("--assign-batch", type=int, default=3, help="Yöneticinin her turda atadığı arıza")
+    parser.add_argument("--max-inflight", type=int, default=500)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--drain-timeout", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"✓ Sonuçlar: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
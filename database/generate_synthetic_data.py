@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Yük ve rapor testleri için büyük ölçekli sentetik veri üretici
+
+Gerçekçi kat/oda dağılımıyla cihazlar, yaşam döngüsü tamamlanmış arıza
+kayıtları (bildirim -> atama -> onarım -> onay), transferler ve loglar üretir.
+Cihazlar parçalara bölünür; her parça ayrı bir işlemde üretilip COPY ile
+yüklenir. Her parçanın rastgele üreteci (seed, parça no) ile başlatıldığı için
+aynı parametrelerle yapılan çalıştırmalar aynı veriyi üretir.
+
+Cihaz sayaçları ve MTBF/MTTR/Kullanılabilirlik üretim sırasında hesaplanır,
+sonradan ayrıca güncelleme gerekmez. Transferler istek sırasıyla üretilir;
+cihazın konumu tamamlanan son transferin hedefidir.
+
+Dolu bir veritabanına yükleme yapılmaz: tablolarda kayıt varsa --reset ile
+önce boşaltılmalıdır.
+
+Kullanım:
+    python database/generate_synthetic_data.py --devices 50000 --faults 2000000 --reset
+    python database/generate_synthetic_data.py --devices 1000 --faults 20000 --seed 7 --workers 4
+"""
+
+import argparse
+import csv
+import io
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from multiprocessing import Pool
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+FLOORS = ["-2. KAT", "-1. KAT", "ZEMİN KAT", "1. KAT", "2. KAT", "3. KAT", "4. KAT", "5. KAT", "6. KAT"]
+ROOMS = [
+    "AMELİYATHANE", "YOĞUN BAKIM", "ACİL SERVİS", "RADYOLOJİ", "DAHİLİYE SERVİSİ",
+    "CERRAHİ SERVİSİ", "KARDİYOLOJİ", "DİYALİZ ÜNİTESİ", "DOĞUMHANE", "LABORATUVAR",
+    "STERİLİZASYON", "POLİKLİNİK", "ÇOCUK SERVİSİ", "ENDOSKOPİ", "FİZİK TEDAVİ",
+]
+# (type, relative share, failure-proneness)
+DEVICE_TYPES = [
+    ("Hasta Monitörü", 18, 1.0), ("İnfüzyon Pompası", 16, 1.4), ("Hasta Yatağı", 14, 0.6),
+    ("Ventilatör", 6, 1.3), ("Defibrilatör", 5, 0.7), ("EKG Cihazı", 6, 0.9),
+    ("Aspiratör", 6, 1.1), ("Ameliyat Lambası", 4, 0.8), ("Koter", 3, 1.2),
+    ("Anestezi Cihazı", 3, 1.3), ("Ultrason", 3, 1.0), ("Röntgen Cihazı", 2, 1.5),
+    ("Otoklav", 2, 1.8), ("Diyaliz Makinesi", 3, 1.6), ("Sedye", 9, 0.5),
+]
+BRANDS = ["BIÇAKCILAR", "DRÄGER", "PHILIPS", "GE HEALTHCARE", "MINDRAY", "SIEMENS",
+          "B. BRAUN", "FRESENIUS", "NIHON KOHDEN", "MAQUET"]
+DESCRIPTIONS = [
+    "Cihaz açılmıyor", "Ekranda görüntü yok", "Alarm sürekli çalıyor", "Kalibrasyon hatası veriyor",
+    "Batarya şarj olmuyor", "Sensör okuma yapmıyor", "Tuş takımı çalışmıyor", "Aşırı ısınma",
+    "Hata kodu veriyor", "Kablo hasarlı", "Mekanik aksamda ses var", "Basınç değerleri tutarsız",
+    "Elektrik kesintisi sonrası açılmıyor", "Tesis kaynaklı su kaçağı nedeniyle arıza",
+    "Altyapı kaynaklı topraklama sorunu",
+]
+REPAIR_NOTES = {
+    "part_replacement": "Arızalı parça değiştirildi, fonksiyon testleri yapıldı",
+    "adjustment": "Ayarlar ve kalibrasyon yeniden yapıldı, cihaz test edildi",
+    "complete_repair": "Cihaz söküldü, kapsamlı onarım ve bakım yapıldı",
+    "other": "Kullanıcı eğitimi verildi ve cihaz kontrol edildi",
+}
+REPAIR_CATEGORIES = list(REPAIR_NOTES)
+REPAIR_CATEGORY_WEIGHTS = [40, 30, 15, 15]
+
+OPERATING_HOURS = 8760.0
+PASSWORD = "12345"
+
+DEVICE_COLUMNS = [
+    "id", "type", "location", "total_failures", "total_operating_hours", "total_repair_hours",
+    "mtbf", "mttr", "availability", "created_at", "kat", "demirbas_adi", "marka", "model",
+    "seri_no", "adet", "ariza_adeti", "ortalama_yil_sure",
+]
+FAULT_COLUMNS = [
+    "id", "created_by", "created_by_name", "created_at", "device_id", "device_type", "description",
+    "assigned_to", "assigned_to_name", "repair_start", "repair_end", "repair_duration", "repair_notes",
+    "repair_category", "breakdown_iteration", "status", "confirmed_by", "confirmed_at",
+]
+TRANSFER_COLUMNS = [
+    "id", "device_id", "device_type", "from_location", "to_location", "requested_by", "requested_by_name",
+    "requested_at", "reason", "status", "approved_by", "approved_by_name", "approved_at",
+    "rejection_reason", "completed_at",
+]
+LOG_COLUMNS = ["id", "record_id", "event", "timestamp", "user_id", "user_name"]
+LOADED_TABLES = ["users", "devices", "fault_records", "equipment_transfers", "logs"]
+
+
+def libpq_dsn(url: str) -> str:
+    return "postgresql://" + url.split("://", 1)[1]
+
+
+def rng_uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def poisson(rng: random.Random, lam: float) -> int:
+    if lam <= 0:
+        return 0
+    if lam > 30:
+        return max(0, round(rng.gauss(lam, math.sqrt(lam))))
+    threshold = math.exp(-lam)
+    k, p = 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= threshold:
+            return k
+        k += 1
+
+
+def make_users(args):
+    """Deterministic user list: (id, name, email, role)."""
+    users = []
+    for role, count in (("manager", args.managers), ("quality", args.quality),
+                        ("technician", args.technicians), ("health_staff", args.staff)):
+        for i in range(count):
+            users.append((f"syn-{role}-{i}", f"{role.replace('_', ' ').title()} {i}", f"{role}{i}@sentetik.hastane", role))
+    return users
+
+
+def device_location(rng: random.Random):
+    kat = rng.choice(FLOORS)
+    oda = rng.choice(ROOMS)
+    return kat, f"{kat} - {oda}"
+
+
+class CopyBuffer:
+    def __init__(self, columns):
+        self.columns = columns
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.rows = 0
+
+    def add(self, row):
+        self.writer.writerow(["" if v is None else v for v in row])
+        self.rows += 1
+
+    def copy(self, cursor, table):
+        self.buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT csv)", self.buffer)
+
+
+def generate_chunk(task):
+    """Generate and COPY one device range with its faults, transfers and logs."""
+    import psycopg2
+
+    chunk_no, first, last, args = task
+    rng = random.Random(args["seed"] * 1_000_003 + chunk_no)
+
+    users = args["users"]
+    staff = [u for u in users if u[3] == "health_staff"]
+    technicians = [u for u in users if u[3] == "technician"]
+    quality = [u for u in users if u[3] == "quality"]
+
+    end = args["end"]
+    start = end - timedelta(days=365 * args["years"])
+    span = (end - start).total_seconds()
+    faults_per_device = args["faults"] / args["devices"]
+    transfers_per_device = args["transfers"] / args["devices"]
+    type_names = [t[0] for t in DEVICE_TYPES]
+    type_weights = [t[1] for t in DEVICE_TYPES]
+    proneness = {t[0]: t[2] for t in DEVICE_TYPES}
+
+    devices = CopyBuffer(DEVICE_COLUMNS)
+    faults = CopyBuffer(FAULT_COLUMNS)
+    transfers = CopyBuffer(TRANSFER_COLUMNS)
+    logs = CopyBuffer(LOG_COLUMNS)
+
+    for index in range(first, last):
+        device_id = f"CIH-{100000 + index}"
+        device_type = rng.choices(type_names, type_weights)[0]
+        kat, location = device_location(rng)
+        created_at = start - timedelta(days=rng.randint(0, 365 * 3))
+
+        # Lognormal with mean 1 so the fleet-wide total stays near --faults
+        weight = rng.lognormvariate(-0.5 * 0.8 ** 2, 0.8) * proneness[device_type]
+        fault_times = sorted(start + timedelta(seconds=rng.random() * span)
+                             for _ in range(poisson(rng, faults_per_device * weight)))
+
+        total_repair_hours = 0.0
+        for iteration, fault_at in enumerate(fault_times, 1):
+            fault_id = rng_uuid(rng)
+            reporter = rng.choice(staff)
+            technician = rng.choice(technicians)
+            description = rng.choice(DESCRIPTIONS)
+
+            assigned_at = fault_at + timedelta(minutes=rng.expovariate(1 / 45))
+            repair_start = assigned_at + timedelta(minutes=rng.expovariate(1 / 90))
+            duration = min(rng.lognormvariate(math.log(2.5), 0.9), 72.0)
+            repair_end = repair_start + timedelta(hours=duration)
+            confirmed_at = repair_end + timedelta(minutes=rng.expovariate(1 / 120))
+
+            # Recent faults are still moving through the workflow
+            if end < assigned_at:
+                status, stage = "open", 0
+            elif end < repair_start:
+                status, stage = "in_progress", 1
+            elif end < repair_end:
+                status, stage = "in_progress", 2
+            elif end < confirmed_at:
+                status, stage = "in_progress", 3
+            else:
+                status, stage = "closed", 4
+
+            category = rng.choices(REPAIR_CATEGORIES, REPAIR_CATEGORY_WEIGHTS)[0] if stage >= 3 else None
+            repair_duration = duration if stage >= 3 else 0.0
+            total_repair_hours += repair_duration
+
+            faults.add([
+                fault_id, reporter[0], reporter[1], fault_at.isoformat(), device_id, device_type, description,
+                technician[0] if stage >= 1 else None, technician[1] if stage >= 1 else None,
+                repair_start.isoformat() if stage >= 2 else None,
+                repair_end.isoformat() if stage >= 3 else None,
+                round(repair_duration, 4),
+                REPAIR_NOTES[category] if category else None, category, iteration, status,
+                reporter[0] if stage >= 4 else None, confirmed_at.isoformat() if stage >= 4 else None,
+            ])
+
+            if args["logs"]:
+                events = [(fault_at, f"Arıza kaydı oluşturuldu: {description}", reporter)]
+                if stage >= 1:
+                    events.append((assigned_at, f"Teknisyene atandı: {technician[1]}", None))
+                if stage >= 2:
+                    events.append((repair_start, "Onarım başlatıldı", technician))
+                if stage >= 3:
+                    events.append((repair_end, f"Onarım tamamlandı ({repair_duration:.2f} saat)", technician))
+                if stage >= 4:
+                    events.append((confirmed_at, "Onarım onaylandı ve kayıt kapatıldı", reporter))
+                for timestamp, event, user in events:
+                    user = user or users[0]
+                    logs.add([rng_uuid(rng), fault_id, event, timestamp.isoformat(), user[0], user[1]])
+
+        # Transfers are generated in request order; each completed one moves the device
+        transfer_times = sorted(start + timedelta(seconds=rng.random() * span)
+                                for _ in range(poisson(rng, transfers_per_device)))
+        for requested_at in transfer_times:
+            requester = rng.choice(staff)
+            approver = rng.choice(quality)
+            to_kat, to_location = device_location(rng)
+            decided_at = requested_at + timedelta(hours=rng.expovariate(1 / 20))
+            roll = rng.random()
+            if decided_at > end or roll < 0.05:
+                row_status, decided = "pending", False
+            elif roll < 0.15:
+                row_status, decided = "rejected", True
+            else:
+                row_status, decided = "completed", True
+            transfers.add([
+                rng_uuid(rng), device_id, device_type, location, to_location, requester[0], requester[1],
+                requested_at.isoformat(), "Bölümler arası ihtiyaç nedeniyle transfer", row_status,
+                approver[0] if decided else None, approver[1] if decided else None,
+                decided_at.isoformat() if decided else None,
+                "Hedef bölümde yer yok" if row_status == "rejected" else None,
+                decided_at.isoformat() if row_status == "completed" else None,
+            ])
+            if row_status == "completed":
+                kat, location = to_kat, to_location
+
+        total_failures = len(fault_times)
+        if total_failures:
+            mttr = total_repair_hours / total_failures
+            mtbf = (OPERATING_HOURS - total_repair_hours) / total_failures
+            availability = mtbf / (mtbf + mttr) * 100 if mtbf + mttr > 0 else 100.0
+        else:
+            mtbf = mttr = 0.0
+            availability = 100.0
+
+        devices.add([
+            device_id, device_type, location, total_failures, OPERATING_HOURS, round(total_repair_hours, 4),
+            mtbf, mttr, availability, created_at.isoformat(), kat, device_type, rng.choice(BRANDS),
+            f"M-{rng.randint(100, 999)}", str(rng.randint(1000, 99999)), 1, total_failures, None,
+        ])
+
+    conn = psycopg2.connect(args["dsn"])
+    try:
+        with conn, conn.cursor() as cursor:
+            devices.copy(cursor, "devices")
+            faults.copy(cursor, "fault_records")
+            transfers.copy(cursor, "equipment_transfers")
+            logs.copy(cursor, "logs")
+    finally:
+        conn.close()
+
+    return devices.rows, faults.rows, transfers.rows, logs.rows
+
+
+def load_users(cursor, users, created_at):
+    from passlib.context import CryptContext
+
+    password = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(PASSWORD)
+    buffer = CopyBuffer(["id", "name", "email", "password", "role", "successful_repairs", "failed_repairs", "created_at"])
+    for user_id, name, email, role in users:
+        buffer.add([user_id, name, email, password, role, 0, 0, created_at.isoformat()])
+    buffer.copy(cursor, "users")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik büyük ölçekli veri üretici")
+    parser.add_argument("--database-url", help="PostgreSQL bağlantısı (varsayılan: DATABASE_URL)")
+    parser.add_argument("--devices", type=int, default=50000)
+    parser.add_argument("--faults", type=int, default=1000000, help="Yaklaşık toplam arıza kaydı")
+    parser.add_argument("--transfers", type=int, default=20000, help="Yaklaşık toplam transfer")
+    parser.add_argument("--years", type=int, default=3, help="Arıza geçmişinin kapsadığı yıl")
+    parser.add_argument("--technicians", type=int, default=40)
+    parser.add_argument("--staff", type=int, default=400)
+    parser.add_argument("--managers", type=int, default=5)
+    parser.add_argument("--quality", type=int, default=3)
+    parser.add_argument("--no-logs", action="store_true", help="Arıza yaşam döngüsü loglarını üretme")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", help="Geçmişin bittiği gün, YYYY-AA-GG (varsayılan: bugün, UTC)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Parça başına cihaz sayısı")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--reset", action="store_true", help="Yüklemeden önce tüm tabloları boşalt")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from database import Base, engine, DATABASE_URL
+
+    Base.metadata.create_all(bind=engine)
+    dsn = libpq_dsn(DATABASE_URL)
+    # Anchored to a day boundary so the same seed reproduces the same timestamps
+    end = datetime.fromisoformat(args.end_date) if args.end_date else datetime.now(timezone.utc)
+    end = end.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+    users = make_users(args)
+    if not any(u[3] == "technician" for u in users) or not any(u[3] == "health_staff" for u in users) \
+            or not any(u[3] == "quality" for u in users):
+        parser.error("En az bir teknisyen, sağlık personeli ve kalite kullanıcısı gerekli")
+
+    import psycopg2
+
+    started = time.monotonic()
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn, conn.cursor() as cursor:
+            if args.reset:
+                cursor.execute("TRUNCATE logs, equipment_transfers, fault_records, devices, users CASCADE")
+                print("✓ Tablolar boşaltıldı")
+            else:
+                cursor.execute("SELECT " + " OR ".join(f"EXISTS (SELECT 1 FROM {t})" for t in LOADED_TABLES))
+                if cursor.fetchone()[0]:
+                    print("❌ Veritabanı boş değil; mevcut verinin üzerine yüklemek için --reset kullanın")
+                    return 1
+            load_users(cursor, users, end - timedelta(days=365 * args.years))
+        print(f"✓ {len(users)} kullanıcı")
+
+        task_args = {
+            "dsn": dsn, "seed": args.seed, "users": users, "devices": args.devices,
+            "faults": args.faults, "transfers": args.transfers, "years": args.years, "end": end,
+            "logs": not args.no_logs,
+        }
+        tasks = [
+            (chunk_no, first, min(first + args.chunk_size, args.devices), task_args)
+            for chunk_no, first in enumerate(range(0, args.devices, args.chunk_size))
+        ]
+
+        totals = [0, 0, 0, 0]
+        with Pool(args.workers) as pool:
+            for done, counts in enumerate(pool.imap_unordered(generate_chunk, tasks), 1):
+                totals = [a + b for a, b in zip(totals, counts)]
+                print(f"  {done}/{len(tasks)} parça - {totals[0]} cihaz, {totals[1]} arıza")
+
+        with conn, conn.cursor() as cursor:
+            cursor.execute("""
+                UPDATE users u
+                SET successful_repairs = c.repairs
+                FROM (
+                    SELECT assigned_to, count(*) AS repairs
+                    FROM fault_records
+                    WHERE status = 'closed' AND assigned_to LIKE 'syn-technician-%%'
+                    GROUP BY assigned_to
+                ) c
+                WHERE u.id = c.assigned_to
+            """)
+            cursor.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    print(f"\n✅ {totals[0]} cihaz, {totals[1]} arıza, {totals[2]} transfer, {totals[3]} log "
+          f"({elapsed:.1f} sn, seed={args.seed})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
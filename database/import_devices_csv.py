@@ -1,93 +1,73 @@
 #!/usr/bin/env python3
 """
-1000 Cihazı CSV'den PostgreSQL'e İçe Aktarma Script'i
-Excel'i önce CSV olarak kaydedin
+Cihazları CSV veya Excel (.xlsx) dosyasından PostgreSQL'e toplu aktarma
+
+Satırlar doğrulanır, cihaz koduna (CIH-<D.No>) göre tekilleştirilir,
+COPY ile geçici tabloya yüklenir ve tek bir upsert ile devices tablosuna yazılır.
+Aynı içe aktarma, kimlik doğrulamalı POST /api/devices/import uç noktasıyla da yapılabilir.
+
+Kullanım:
+    python database/import_devices_csv.py cihazlar.xlsx
+    python database/import_devices_csv.py cihazlar.csv --dry-run --errors hatalar.csv
 """
 
-import psycopg2
-import uuid
+import argparse
 import csv
+import os
 import sys
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cihazları CSV/.xlsx dosyasından içe aktar")
+    parser.add_argument("file", help="CSV veya .xlsx dosya yolu")
+    parser.add_argument("--database-url", help="PostgreSQL bağlantısı (varsayılan: DATABASE_URL)")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece doğrula, veritabanına yazma")
+    parser.add_argument("--errors", help="Hatalı satırları bu CSV dosyasına yaz")
+    parser.add_argument("--strict", action="store_true", help="Hatalı satır varsa 1 çıkış koduyla bitir")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+    from database import SessionLocal
+    from device_import import import_devices
+
+    db = SessionLocal()
+    try:
+        with open(args.file, "rb") as file:
+            result = import_devices(db, file, args.file, dry_run=args.dry_run)
+    except FileNotFoundError:
+        print(f"❌ Dosya bulunamadı: {args.file}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"Toplam satır: {result['total_rows']}")
+    print(f"Geçerli satır: {result['valid_rows']}")
+    if args.dry_run:
+        print("Deneme modu: veritabanına yazılmadı")
+    else:
+        print(f"✅ Eklenen: {result['inserted']}, güncellenen: {result['updated']}")
+
+    errors = result["errors"]
+    if errors:
+        print(f"⚠️  {len(errors)} hatalı satır")
+        for error in errors[:20]:
+            print(f"  Satır {error['row']} ({error['code']}): {error['error']}")
+        if len(errors) > 20:
+            print(f"  ... ve {len(errors) - 20} satır daha")
 
-# PostgreSQL bağlantısı
-try:
-    conn = psycopg2.connect(
-        host="localhost",
-        port=5432,
-        database="postgres",
-        user="admin",
-        password="1234"
-    )
-    cursor = conn.cursor()
-    print("✓ PostgreSQL'e bağlanıldı")
-except Exception as e:
-    print(f"❌ Bağlantı hatası: {e}")
-    sys.exit(1)
+        if args.errors:
+            with open(args.errors, "w", newline="", encoding="utf-8") as out:
+                writer = csv.DictWriter(out, fieldnames=["row", "code", "error"])
+                writer.writeheader()
+                writer.writerows(errors)
+            print(f"Hata raporu: {args.errors}")
 
-# CSV dosyasını oku
-csv_file = input("CSV dosya yolu (örn: cihazlar.csv): ")
+    return 1 if errors and args.strict else 0
 
-try:
-    with open(csv_file, 'r', encoding='utf-8-sig') as file:
-        csv_reader = csv.DictReader(file)
-        
-        count = 0
-        for row in csv_reader:
-            device_id = str(uuid.uuid4())
-            
-            # CSV sütun isimleri - Excel'inizdeki başlıklara göre düzenleyin
-            d_no = row.get('D.No', row.get('d_no', ''))
-            kat = row.get('Kat', row.get('kat', ''))
-            oda = row.get('Oda', row.get('oda', ''))
-            demirbas_adi = row.get('Demirbaş Adı', row.get('demirbas_adi', ''))
-            marka = row.get('Marka', row.get('marka', ''))
-            model = row.get('Model', row.get('model', ''))
-            seri = row.get('Seri', row.get('seri', ''))
-            adet = int(row.get('Adet', row.get('adet', 1)))
-            
-            # Code: D.No değeri
-            code = f"CIH-{d_no}"
-            
-            # Type: Demirbaş adı
-            device_type = demirbas_adi
-            
-            # Location: Kat + Oda
-            location = f"{kat} - {oda}"
-            
-            try:
-                cursor.execute("""
-                    INSERT INTO devices (
-                        id, code, type, location, 
-                        kat, demirbas_adi, marka, model, seri_no, adet,
-                        total_operating_hours
-                    ) VALUES (
-                        %s, %s, %s, %s,
-                        %s, %s, %s, %s, %s, %s,
-                        8760.0
-                    )
-                """, (
-                    device_id, code, device_type, location,
-                    kat, demirbas_adi, marka, model, seri, adet
-                ))
-                
-                count += 1
-                if count % 100 == 0:
-                    print(f"✓ {count} cihaz eklendi...")
-                    
-            except Exception as e:
-                print(f"⚠️  {code} eklenirken hata: {e}")
-                continue
-        
-        conn.commit()
-        print(f"\n✅ Toplam {count} cihaz başarıyla eklendi!")
-        
-except FileNotFoundError:
-    print(f"❌ Dosya bulunamadı: {csv_file}")
-except Exception as e:
-    print(f"❌ Hata: {e}")
-finally:
-    cursor.close()
-    conn.close()
 
-print("\n📊 Kontrol et:")
-print("docker exec -it tusep-postgres psql -U admin -d postgres -c 'SELECT COUNT(*) FROM devices;'")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Geçmiş arıza kayıtlarını CSV veya Excel (.xlsx) dosyasından toplu aktarma
+
+Beklenen sütunlar (Türkçe veya İngilizce başlık):
+    Cihaz ID / device_id (ya da D.No), Açıklama / description,
+    Bildirim Tarihi / created_at, Onarım Başlangıç / repair_start,
+    Onarım Bitiş / repair_end, Onarım Notları / repair_notes,
+    Onarım Kategorisi / repair_category, Teknisyen / technician_email
+
+Kayıtlar COPY ile yüklenir; cihaz toplamları ve MTBF/MTTR/Kullanılabilirlik
+içe aktarma sonunda tek seferde yeniden hesaplanır. Aynı dosya tekrar
+aktarıldığında mevcut kayıtlar atlanır.
+
+Kullanım:
+    python database/import_faults.py gecmis_arizalar.xlsx --user fatma@hastane.com
+"""
+
+import argparse
+import csv
+import os
+import sys
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geçmiş arıza kayıtlarını içe aktar")
+    parser.add_argument("file", help="CSV veya .xlsx dosya yolu")
+    parser.add_argument("--user", required=True, help="Kayıtları oluşturan kullanıcının e-postası")
+    parser.add_argument("--database-url", help="PostgreSQL bağlantısı (varsayılan: DATABASE_URL)")
+    parser.add_argument("--timezone", default="Europe/Istanbul", help="Saat dilimi bilgisi olmayan tarihler için")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece doğrula, veritabanına yazma")
+    parser.add_argument("--errors", help="Hatalı satırları bu CSV dosyasına yaz")
+    parser.add_argument("--strict", action="store_true", help="Hatalı satır varsa 1 çıkış koduyla bitir")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+    from database import SessionLocal, User
+    from fault_import import import_faults, load_timezone
+
+    try:
+        load_timezone(args.timezone)
+    except ValueError:
+        print(f"❌ Bilinmeyen saat dilimi: {args.timezone}")
+        return 1
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == args.user).first()
+        if user is None:
+            print(f"❌ Kullanıcı bulunamadı: {args.user}")
+            return 1
+
+        with open(args.file, "rb") as file:
+            result = import_faults(db, file, args.file, user, tz_name=args.timezone, dry_run=args.dry_run)
+    except FileNotFoundError:
+        print(f"❌ Dosya bulunamadı: {args.file}")
+        return 1
+    finally:
+        db.close()
+
+    print(f"Toplam satır: {result['total_rows']}")
+    print(f"Geçerli satır: {result['valid_rows']}")
+    if args.dry_run:
+        print("Deneme modu: veritabanına yazılmadı")
+    else:
+        print(f"✅ Eklenen: {result['inserted']}, zaten mevcut: {result['skipped_existing']}, "
+              f"güncellenen cihaz: {result['affected_devices']}")
+
+    errors = result["errors"]
+    if errors:
+        print(f"⚠️  {len(errors)} hatalı satır")
+        for error in errors[:20]:
+            print(f"  Satır {error['row']}: {error['error']}")
+        if len(errors) > 20:
+            print(f"  ... ve {len(errors) - 20} satır daha")
+
+        if args.errors:
+            with open(args.errors, "w", newline="", encoding="utf-8") as out:
+                writer = csv.DictWriter(out, fieldnames=["row", "error"])
+                writer.writeheader()
+                writer.writerows(errors)
+            print(f"Hata raporu: {args.errors}")
+
+    return 1 if errors and args.strict else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 -- PostgreSQL Database Schema
 
 -- Drop tables if exist (dikkatli kullan!)
+DROP TABLE IF EXISTS idempotency_keys CASCADE;
 DROP TABLE IF EXISTS logs CASCADE;
 DROP TABLE IF EXISTS equipment_transfers CASCADE;
 DROP TABLE IF EXISTS fault_records CASCADE;
@@ -98,6 +99,18 @@ CREATE TABLE logs (
     user_name VARCHAR(255)
 );
 
+-- Idempotency Keys Table (stored responses for retried POSTs)
+CREATE TABLE idempotency_keys (
+    key VARCHAR(255) NOT NULL,
+    user_id VARCHAR(50) NOT NULL,
+    scope VARCHAR(100) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INTEGER DEFAULT 200,
+    response_body TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (key, user_id)
+);
+
 -- Create Indexes for Performance
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_role ON users(role);
@@ -111,14 +124,18 @@ CREATE INDEX idx_fault_records_status ON fault_records(status);
 CREATE INDEX idx_fault_records_created_by ON fault_records(created_by);
 CREATE INDEX idx_fault_records_assigned_to ON fault_records(assigned_to);
 CREATE INDEX idx_fault_records_created_at ON fault_records(created_at);
+CREATE INDEX idx_fault_records_device_created_at ON fault_records(device_id, created_at);
 
 CREATE INDEX idx_transfers_device ON equipment_transfers(device_id);
 CREATE INDEX idx_transfers_status ON equipment_transfers(status);
 CREATE INDEX idx_transfers_requested_at ON equipment_transfers(requested_at);
+CREATE INDEX idx_transfers_device_requested_at ON equipment_transfers(device_id, requested_at);
 
 CREATE INDEX idx_logs_timestamp ON logs(timestamp);
 CREATE INDEX idx_logs_record_id ON logs(record_id);
 
+CREATE INDEX idx_idempotency_keys_created_at ON idempotency_keys(created_at);
+
 -- Insert Demo Users
 INSERT INTO users (id, name, email, password, role, successful_repairs, failed_repairs) VALUES
 ('user-1', 'Dr. Ayşe Yılmaz', 'ayse@hastane.com', '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewY5oo2IQ6RYqQ6W', 'health_staff', 0, 0),
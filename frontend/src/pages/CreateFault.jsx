@@ -40,7 +40,7 @@ const CreateFault = () => {
 
   const fetchDevices = async () => {
     try {
-      const response = await axios.get(`${API}/devices`);
+      const response = await axios.get(`${API}/devices?fields=id,type,location`);
       setAllDevices(response.data);
       setDevices(response.data);
       
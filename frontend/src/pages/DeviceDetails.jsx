@@ -9,12 +9,16 @@ import { ArrowLeft, Activity, AlertCircle, Clock, TrendingUp } from 'lucide-reac
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
 import { formatTimeMinutesSeconds } from '../utils/timeFormat';
 
+const FAULT_PAGE_SIZE = 50;
+
 const DeviceDetails = () => {
   const { deviceId } = useParams();
   const navigate = useNavigate();
   const [device, setDevice] = useState(null);
   const [faults, setFaults] = useState([]);
+  const [totalFaults, setTotalFaults] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchDeviceDetails();
@@ -22,12 +26,12 @@ const DeviceDetails = () => {
 
   const fetchDeviceDetails = async () => {
     try {
-      const [deviceRes, faultsRes] = await Promise.all([
-        axios.get(`${API}/devices/${deviceId}`),
-        axios.get(`${API}/devices/${deviceId}/faults`)
-      ]);
-      setDevice(deviceRes.data);
-      setFaults(faultsRes.data);
+      const response = await axios.get(`${API}/devices/${deviceId}/details`, {
+        params: { fault_limit: FAULT_PAGE_SIZE }
+      });
+      setDevice(response.data.device);
+      setFaults(response.data.faults);
+      setTotalFaults(response.data.metrics.total_faults);
     } catch (error) {
       toast.error('Cihaz bilgileri yüklenemedi');
     } finally {
@@ -35,6 +39,22 @@ const DeviceDetails = () => {
     }
   };
 
+  // /details returns the most recent faults one page at a time
+  const loadMoreFaults = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API}/devices/${deviceId}/details`, {
+        params: { fault_offset: faults.length, fault_limit: FAULT_PAGE_SIZE }
+      });
+      setFaults([...faults, ...response.data.faults]);
+      setTotalFaults(response.data.metrics.total_faults);
+    } catch (error) {
+      toast.error('Arıza geçmişi yüklenemedi');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="flex items-center justify-center h-96">
@@ -202,6 +222,16 @@ const DeviceDetails = () => {
               Henüz arıza kaydı bulunmuyor
             </div>
           )}
+          {faults.length < totalFaults && (
+            <div className="flex items-center justify-between pt-4">
+              <p className="text-sm text-gray-600" data-testid="fault-history-count">
+                {totalFaults} arıza kaydından son {faults.length} tanesi gösteriliyor
+              </p>
+              <Button variant="outline" onClick={loadMoreFaults} disabled={loadingMore} data-testid="load-more-faults-btn">
+                {loadingMore ? 'Yükleniyor...' : 'Daha fazla yükle'}
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
     </div>
@@ -20,14 +20,20 @@ const Reports = () => {
 
   const fetchReports = async () => {
     try {
-      const [breakdown, intervention, technician] = await Promise.all([
-        axios.get(`${API}/reports/breakdown-frequency`),
-        axios.get(`${API}/reports/intervention-duration`),
-        axios.get(`${API}/reports/technician-performance`)
-      ]);
-      setBreakdownReport(breakdown.data);
-      setInterventionReport(intervention.data);
-      setTechnicianReport(technician.data);
+      const response = await axios.post(`${API}/batch`, {
+        operations: [
+          { path: '/reports/breakdown-frequency' },
+          { path: '/reports/intervention-duration' },
+          { path: '/reports/technician-performance' }
+        ]
+      });
+      const [breakdown, intervention, technician] = response.data.results;
+      if ([breakdown, intervention, technician].some(r => r.status !== 200)) {
+        throw new Error('Batch report request failed');
+      }
+      setBreakdownReport(breakdown.body);
+      setInterventionReport(intervention.body);
+      setTechnicianReport(technician.body);
     } catch (error) {
       toast.error('Raporlar yüklenemedi');
     } finally {
@@ -46,7 +46,7 @@ const Transfers = () => {
 
   const fetchDevices = async () => {
     try {
-      const response = await axios.get(`${API}/devices`);
+      const response = await axios.get(`${API}/devices?fields=id,type,location`);
       setDevices(response.data);
     } catch (error) {
       console.error('Devices load error', error);
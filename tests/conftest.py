@@ -0,0 +1,142 @@
+import os
+import sys
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+# Tests never run against DATABASE_URL; use TEST_DATABASE_URL or a throwaway SQLite file
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'tusep_test.db'}"
+)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import server
+from database import Base, engine, SessionLocal, User, Device, FaultRecord, EquipmentTransfer, Log
+
+
+class QueryCounter:
+    """Counts SQL statements sent through the engine while active."""
+
+    def __init__(self, bind):
+        self.statements = []
+        self._active = False
+        self._lock = threading.Lock()
+        event.listen(bind, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self._active:
+            with self._lock:
+                self.statements.append(" ".join(statement.split()))
+
+    def __enter__(self):
+        self.statements = []
+        self._active = True
+        return self
+
+    def __exit__(self, *exc):
+        self._active = False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+class Dataset:
+    """Ids of the rows created by populate()."""
+
+    def __init__(self):
+        self.users = {}
+        self.technicians = []
+        self.devices = []
+        self.faults = []
+        self.open_faults = []
+        self.assigned_faults = []
+        self.started_faults = []
+        self.ended_faults = []
+        self.pending_transfers = []
+
+
+def populate(devices: int, technicians: int, faults_per_device: int) -> Dataset:
+    """Recreate the schema and fill it; every count scales with the arguments."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    data = Dataset()
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        for role in ("health_staff", "manager", "quality"):
+            data.users[role] = role
+            db.add(User(id=role, name=role.title(), email=f"{role}@test.hastane", password="x", role=role))
+        for i in range(technicians):
+            data.technicians.append(f"tech{i}")
+            db.add(User(id=f"tech{i}", name=f"Teknisyen {i}", email=f"tech{i}@test.hastane", password="x", role="technician"))
+        data.users["technician"] = data.technicians[0]
+
+        def fault(device, **values):
+            record = FaultRecord(id=str(uuid.uuid4()), created_by="health_staff", created_by_name="Health_Staff",
+                                 device_id=device.id, device_type=device.type, description="Tesis kaynaklı arıza",
+                                 **values)
+            db.add(record)
+            db.add(Log(id=str(uuid.uuid4()), record_id=record.id, event="Arıza kaydı oluşturuldu"))
+            data.faults.append(record.id)
+            return record.id
+
+        for d in range(devices):
+            device = Device(id=f"CIH-{1000 + d}", type=f"Tip {d % 3}", location=f"{d % 4}. KAT - ODA {d % 5}",
+                            total_operating_hours=8760.0, total_failures=faults_per_device + 4)
+            db.add(device)
+            data.devices.append(device.id)
+
+            for f in range(faults_per_device):
+                created_at = now - timedelta(days=f + 1)
+                fault(device, created_at=created_at, status="closed", assigned_to=data.technicians[f % technicians],
+                      repair_start=created_at, repair_end=created_at + timedelta(hours=2), repair_duration=2.0,
+                      repair_category="adjustment", confirmed_by="health_staff", confirmed_at=created_at)
+
+            data.open_faults.append(fault(device, status="open"))
+            data.assigned_faults.append(fault(device, status="in_progress", assigned_to=data.users["technician"]))
+            data.started_faults.append(fault(device, status="in_progress", assigned_to=data.users["technician"],
+                                             repair_start=now - timedelta(hours=1)))
+            data.ended_faults.append(fault(device, status="in_progress", assigned_to=data.users["technician"],
+                                           repair_start=now - timedelta(hours=2), repair_end=now, repair_duration=2.0,
+                                           repair_notes="Arızalı parça değiştirildi ve test edildi",
+                                           repair_category="part_replacement"))
+
+            for _ in range(2):
+                transfer = EquipmentTransfer(id=str(uuid.uuid4()), device_id=device.id, device_type=device.type,
+                                             from_location=device.location, to_location="1. KAT - YOĞUN BAKIM",
+                                             requested_by="health_staff", requested_by_name="Health_Staff",
+                                             reason="Bölüm ihtiyacı")
+                db.add(transfer)
+                data.pending_transfers.append(transfer.id)
+        db.commit()
+    finally:
+        db.close()
+    return data
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(server.app) as test_client:
+        # Tests start once the startup warm-up is done, like traffic behind /api/ready
+        server.warmup.wait(timeout=60)
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def query_counter():
+    return QueryCounter(engine)
+
+
+@pytest.fixture(scope="session")
+def auth_headers():
+    def headers(user_id: str):
+        return {"Authorization": f"Bearer {server.create_access_token({'sub': user_id})}"}
+    return headers
@@ -0,0 +1,131 @@
+"""
+Admission control: per-class slots, bounded queues and per-client limits
+answer overload with 429/503 + Retry-After, and each class's
+statement_timeout is applied to its transactions.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+import admission
+from admission import RouteClass
+from database import SessionLocal
+from excel_service_postgres import ExcelReportService
+from request_context import current_scope
+from benchmarks import endpoint_latency
+from tests.conftest import populate
+
+
+def report_class(**overrides):
+    settings = dict(concurrency=1, queue=1, per_client=1, statement_timeout_ms=0, queue_timeout_s=0.2, expected_seconds=4)
+    settings.update(overrides)
+    return RouteClass("report", **settings)
+
+
+def test_slots_queue_and_per_client_limit():
+    async def scenario():
+        reports = report_class()
+        await reports.acquire("a")
+
+        with pytest.raises(HTTPException) as rejected:
+            await reports.acquire("a")
+        assert rejected.value.status_code == 429 and rejected.value.headers["Retry-After"] == "4"
+
+        queued = asyncio.create_task(reports.acquire("b"))
+        await asyncio.sleep(0)
+        assert reports.waiting == 1
+        with pytest.raises(HTTPException) as rejected:
+            await reports.acquire("b")
+        assert rejected.value.status_code == 429
+        with pytest.raises(HTTPException) as rejected:
+            await reports.acquire("c")
+        assert rejected.value.status_code == 503 and int(rejected.value.headers["Retry-After"]) >= 4
+
+        reports.release("a", 2.0)
+        await queued
+        assert (reports.active, reports.waiting) == (1, 0)
+
+        with pytest.raises(HTTPException) as rejected:
+            await reports.acquire("d")
+        assert rejected.value.status_code == 503 and reports.waiting == 0
+        reports.release("b", 2.0)
+        assert reports.active == 0 and reports.average_seconds < 4
+
+    asyncio.run(scenario())
+
+
+def test_saturated_report_class_does_not_block_fault_reporting(client, auth_headers, monkeypatch):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    saturated = report_class(queue=0)
+    saturated._semaphore = asyncio.Semaphore(0)
+    monkeypatch.setitem(admission.ROUTE_CLASSES, "report", saturated)
+
+    response = client.get("/api/reports/excel/device-failure-frequency", headers=auth_headers(data.users["quality"]))
+    assert response.status_code == 503 and response.headers["retry-after"]
+
+    response = client.post("/api/faults", json={"device_id": data.devices[0], "description": "Alarm susmuyor"},
+                           headers=auth_headers(data.users["health_staff"]))
+    assert response.status_code == 200
+    assert client.get("/api/health").status_code == 200
+
+    metrics = client.get("/metrics").text
+    assert 'tusep_admission_rejected_total{route_class="report",reason="queue_full"}' in metrics
+
+
+def test_statement_timeout_per_class(client, auth_headers, monkeypatch):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    db = SessionLocal()
+    if db.get_bind().dialect.name != "postgresql":
+        db.close()
+        pytest.skip("statement_timeout is a PostgreSQL setting")
+
+    token = current_scope.set({"state": {"route_class": "report"}})
+    try:
+        assert db.execute(text("SHOW statement_timeout")).scalar() == "2min"
+    finally:
+        db.close()
+        current_scope.reset(token)
+
+    def slow_report(db, year):
+        db.execute(text("SELECT pg_sleep(1)"))
+
+    monkeypatch.setattr(admission.ROUTE_CLASSES["report"], "statement_timeout_ms", 50)
+    monkeypatch.setattr(ExcelReportService, "generate_device_failure_frequency_report_postgres", slow_report)
+    response = client.get("/api/reports/excel/device-failure-frequency", headers=auth_headers(data.users["quality"]))
+    assert response.status_code == 503 and "statement timeout" in response.json()["detail"]
+
+
+def run_benchmark(app, headers, labels, argv):
+    args = endpoint_latency.build_parser().parse_args(argv)
+    endpoint_latency.configure_admission(args)
+    specs = [spec for spec in endpoint_latency.endpoint_specs() if spec[1] in labels]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return [await endpoint_latency.measure(client, None, {"manager": headers}, spec, args) for spec in specs]
+
+    return asyncio.run(scenario())
+
+
+def test_benchmark_runs_under_default_limits(client, auth_headers, monkeypatch):
+    data = populate(devices=2, technicians=1, faults_per_device=2)
+    headers = auth_headers(data.users["manager"])
+    monkeypatch.setattr(admission, "ADMISSION_ENABLED", True)
+    for name in ("report", "bulk"):
+        monkeypatch.setitem(admission.ROUTE_CLASSES, name, RouteClass.from_env(name, admission.DEFAULTS[name]))
+
+    # The harness runs every endpoint at --concurrency 4 with one token per role
+    reports = {"/api/reports/breakdown-frequency", "/api/reports/intervention-duration", "/api/batch"}
+    results = run_benchmark(client.app, headers, reports, ["--requests", "20", "--warmup", "2"])
+    assert len(results) == 3
+    assert all(r["errors"] == 0 and r["status_codes"] == {"200": 20} for r in results)
+
+    # With admission on, two overlapping Reports page loads from one login are both admitted
+    results = run_benchmark(client.app, headers, {"/api/batch"},
+                            ["--admission", "--concurrency", "2", "--requests", "20", "--warmup", "2"])
+    assert results[0]["status_codes"] == {"200": 20}
@@ -0,0 +1,90 @@
+"""
+/api/batch runs each operation on its own: unknown, non-batchable or
+forbidden paths and failing handlers become per-operation results while the
+other operations still succeed. The whole batch reads from the replica when
+one is configured, otherwise from the primary.
+"""
+
+from sqlalchemy import create_engine, text
+
+import database
+import server
+from replica import replica_router, STICKY_COOKIE
+from tests.conftest import QueryCounter, populate
+
+
+def run_batch(client, headers, *paths):
+    response = client.post("/api/batch", json={"operations": [{"path": p} for p in paths]}, headers=headers)
+    assert response.status_code == 200, response.text
+    return [(r["status"], r["body"]) for r in response.json()["results"]]
+
+
+def test_mixed_operations(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    results = run_batch(client, auth_headers(data.users["manager"]),
+                        "/dashboard/stats", f"/devices/{data.devices[0]}", "/devices/CIH-YOK", "/nowhere",
+                        f"/devices/{data.devices[0]}/details?fault_limit=1")
+
+    assert [status for status, _ in results] == [200, 200, 404, 404, 200]
+    assert results[1][1]["id"] == data.devices[0]
+    assert len(results[4][1]["faults"]) == 1
+
+
+def test_routes_outside_the_allow_list_are_not_batchable(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    # Dependencies other than get_current_user/get_db (require_quality, none at all) are never skipped
+    results = run_batch(client, auth_headers(data.users["quality"]),
+                        "/auth/me", "/health", "/quality/memory", "/reports/excel/facility-issues", "/batch")
+    assert all(status == 404 for status, _ in results)
+
+
+def test_forbidden_operation(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    results = run_batch(client, auth_headers(data.users["health_staff"]),
+                        "/quality/system-stats", "/faults")
+    assert [status for status, _ in results] == [403, 200]
+
+
+def test_failing_operation_does_not_fail_the_batch(client, auth_headers, monkeypatch):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    route = next(r for r in server.api_router.routes if r.path == "/api/dashboard/stats")
+
+    def broken(db, **kwargs):
+        # A failed statement aborts the transaction the later operations read in
+        db.execute(text("SELECT missing_column FROM devices"))
+
+    monkeypatch.setattr(route, "endpoint", broken)
+    results = run_batch(client, auth_headers(data.users["manager"]),
+                        "/dashboard/stats", "/reports/breakdown-frequency", f"/devices/{data.devices[0]}")
+    assert [status for status, _ in results] == [500, 200, 200]
+    assert results[0][1] == {"detail": "Internal server error"}
+
+
+def test_batch_routing(client, auth_headers, query_counter):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    headers = auth_headers(data.users["manager"])
+
+    with query_counter:
+        assert run_batch(client, headers, "/dashboard/stats")[0][0] == 200
+    assert query_counter.count > 0
+
+    # A second engine on the same database stands in for the replica
+    url = database.engine.url.render_as_string(hide_password=False)
+    replica_engine = create_engine(url, **database.engine_options(url))
+    replica_counter = QueryCounter(replica_engine)
+    replica_router.configure(database.engine, replica_engine)
+    client.cookies.clear()
+    try:
+        with query_counter, replica_counter:
+            assert run_batch(client, headers, "/dashboard/stats", "/reports/breakdown-frequency")[0][0] == 200
+        assert query_counter.count == 0 and replica_counter.count > 0
+
+        # Read-your-writes keeps the batch on the primary after a write
+        client.cookies.set(STICKY_COOKIE, "9999999999")
+        with query_counter, replica_counter:
+            assert run_batch(client, headers, "/dashboard/stats")[0][0] == 200
+        assert query_counter.count > 0 and replica_counter.count == 0
+    finally:
+        replica_router.configure(database.engine, database.replica_engine)
+        client.cookies.clear()
+        replica_engine.dispose()
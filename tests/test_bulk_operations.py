@@ -0,0 +1,129 @@
+"""
+Bulk fault assignment and bulk transfer approval report a result per item:
+valid items are applied, invalid ones are skipped without failing the rest.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy import event, text
+
+from database import SessionLocal, Device, FaultRecord, EquipmentTransfer, Log, engine
+from tests.conftest import populate
+
+
+def test_bulk_assign_partial_failures(client, auth_headers):
+    data = populate(devices=2, technicians=2, faults_per_device=1)
+    first, second = data.open_faults
+    closed = data.faults[0]
+    assignments = [
+        {"fault_id": first, "assigned_to": data.technicians[0]},
+        {"fault_id": "ARZ-YOK", "assigned_to": data.technicians[0]},
+        {"fault_id": closed, "assigned_to": data.technicians[0]},
+        {"fault_id": second, "assigned_to": data.users["manager"]},
+        # A later entry for the same fault wins
+        {"fault_id": first, "assigned_to": data.technicians[1]},
+    ]
+
+    response = client.post("/api/faults/bulk-assign", json={"assignments": assignments},
+                           headers=auth_headers(data.users["manager"]))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == 1
+    assert [(r["id"], r["success"], r["detail"]) for r in body["results"]] == [
+        (first, True, "Assigned to Teknisyen 0"),
+        ("ARZ-YOK", False, "Fault not found"),
+        (closed, False, "Fault is closed"),
+        (second, False, "Invalid technician"),
+        (first, True, "Assigned to Teknisyen 1"),
+    ]
+
+    db = SessionLocal()
+    try:
+        faults = {f.id: f for f in db.query(FaultRecord).filter(FaultRecord.id.in_([first, second]))}
+        assert (faults[first].assigned_to, faults[first].assigned_to_name, faults[first].status) == \
+            (data.technicians[1], "Teknisyen 1", "in_progress")
+        assert (faults[second].assigned_to, faults[second].status) == (None, "open")
+        assert [log.event for log in db.query(Log).filter(Log.record_id == first, Log.event.like("Teknisyene%"))] == \
+            ["Teknisyene atandı: Teknisyen 1"]
+    finally:
+        db.close()
+
+
+def test_bulk_assign_requires_manager(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = client.post("/api/faults/bulk-assign", headers=auth_headers(data.users["quality"]), json={
+        "assignments": [{"fault_id": data.open_faults[0], "assigned_to": data.technicians[0]}]
+    })
+    assert response.status_code == 403
+
+
+def test_bulk_approve_partial_failures_and_final_location(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    earlier, later, other_device, rejected = data.pending_transfers
+    now = datetime.now(timezone.utc)
+
+    db = SessionLocal()
+    try:
+        db.query(EquipmentTransfer).filter(EquipmentTransfer.id == earlier).update(
+            {"to_location": "2. KAT - AMELİYATHANE", "requested_at": now - timedelta(hours=2)})
+        db.query(EquipmentTransfer).filter(EquipmentTransfer.id == later).update(
+            {"to_location": "3. KAT - SERVİS", "requested_at": now - timedelta(hours=1)})
+        db.query(EquipmentTransfer).filter(EquipmentTransfer.id == rejected).update({"status": "rejected"})
+        db.commit()
+    finally:
+        db.close()
+
+    # The later request is listed first; the device still ends up at its destination
+    response = client.post("/api/transfers/bulk-approve", headers=auth_headers(data.users["quality"]), json={
+        "transfer_ids": [later, earlier, "TRF-YOK", rejected, other_device, later]
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["applied"] == 3
+    assert [(r["id"], r["success"]) for r in body["results"]] == [
+        (later, True), (earlier, True), ("TRF-YOK", False), (rejected, False), (other_device, True),
+    ]
+    assert body["results"][3]["detail"] == "Transfer is not pending"
+
+    db = SessionLocal()
+    try:
+        devices = {d.id: d.location for d in db.query(Device)}
+        assert devices[data.devices[0]] == "3. KAT - SERVİS"
+        assert devices[data.devices[1]] == "1. KAT - YOĞUN BAKIM"
+        statuses = {t.id: t.status for t in db.query(EquipmentTransfer)}
+        assert [statuses[t] for t in (earlier, later, other_device, rejected)] == ["completed"] * 3 + ["rejected"]
+    finally:
+        db.close()
+
+
+def test_bulk_approve_loses_to_concurrent_reject(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    first, _, raced, _ = data.pending_transfers
+    reject = text("UPDATE equipment_transfers SET status = 'rejected' WHERE id = :id")
+
+    def reject_first(conn, cursor, statement, parameters, context, executemany):
+        # Another quality user rejects the transfer after bulk-approve has read it as pending
+        if statement.lstrip().startswith("UPDATE equipment_transfers SET status") and "rejected" not in statement:
+            conn.execute(reject, {"id": raced})
+
+    event.listen(engine, "before_cursor_execute", reject_first)
+    try:
+        response = client.post("/api/transfers/bulk-approve", headers=auth_headers(data.users["quality"]),
+                               json={"transfer_ids": [first, raced]})
+    finally:
+        event.remove(engine, "before_cursor_execute", reject_first)
+
+    body = response.json()
+    assert body["applied"] == 1
+    assert [(r["id"], r["success"], r["detail"]) for r in body["results"]] == [
+        (first, True, "Transfer approved and completed"), (raced, False, "Transfer is not pending"),
+    ]
+
+    db = SessionLocal()
+    try:
+        # The rejected transfer neither moved its device nor logged an approval
+        assert db.query(Device.location).filter(Device.id == data.devices[1]).scalar() != "1. KAT - YOĞUN BAKIM"
+        assert db.query(EquipmentTransfer.status).filter(EquipmentTransfer.id == raced).scalar() == "rejected"
+        assert db.query(Log).filter(Log.record_id == raced).count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,130 @@
+"""
+Bulk device import: rows are validated and de-duplicated with a per-row
+error report, and the COPY + ON CONFLICT merge reports inserted and updated
+devices separately (PostgreSQL only). COPY works with psycopg2 and psycopg 3.
+"""
+
+import io
+
+import pytest
+
+import device_import
+from database import SessionLocal, Device
+from tests.conftest import populate
+
+HEADER = "D.No,Kat,Oda,Demirbaş Adı,Marka,Model,Seri,Adet\n"
+
+
+def upload(client, headers, text, filename="cihazlar.csv", **params):
+    files = {"file": (filename, io.BytesIO(text.encode("utf-8")), "text/csv")}
+    return client.post("/api/devices/import", files=files, params=params, headers=headers)
+
+
+def test_validation_and_dedupe_report(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    rows = (
+        "2001,1. KAT,ODA 1,Monitör,Philips,MX40,S1,1\n"
+        ",1. KAT,ODA 2,Monitör,Philips,MX40,S2,1\n"
+        "2002,1. KAT,ODA 3,,Philips,MX40,S3,1\n"
+        "2003,1. KAT,ODA 4,Ventilatör,Dräger,V500,S4,iki\n"
+        "2004,1. KAT,ODA 5,Ventilatör,Dräger,V500,S5,0\n"
+        "2001,2. KAT,ODA 1,Monitör,Philips,MX40,S6,1\n"
+        f"2005,1. KAT,ODA 6,{'X' * 300},Dräger,V500,S7,1\n"
+        "2006,2. KAT,ODA 7,Defibrilatör,Zoll,R,S8,2\n"
+    )
+
+    response = upload(client, auth_headers(data.users["manager"]), HEADER + rows, dry_run=True)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_rows"], body["valid_rows"], body["inserted"], body["updated"], body["dry_run"]) == (8, 2, 0, 0, True)
+    assert body["errors"] == [
+        {"row": 3, "code": "", "error": "D.No is required"},
+        {"row": 4, "code": "2002", "error": "Demirbaş Adı is required"},
+        {"row": 5, "code": "2003", "error": "Adet is not a number: iki"},
+        {"row": 6, "code": "2004", "error": "Adet must be at least 1"},
+        {"row": 7, "code": "CIH-2001", "error": "Duplicate device code (first seen on row 2)"},
+        {"row": 8, "code": "2005", "error": "type is longer than 255 characters"},
+    ]
+
+    db = SessionLocal()
+    try:
+        assert db.query(Device).filter(Device.id.in_(["CIH-2001", "CIH-2006"])).count() == 0
+    finally:
+        db.close()
+
+
+def test_import_requires_role_and_supported_file(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    assert upload(client, auth_headers(data.users["health_staff"]), HEADER).status_code == 403
+    assert upload(client, auth_headers(data.users["manager"]), HEADER, filename="cihazlar.txt").status_code == 400
+
+
+def test_copy_merge_counts_inserted_and_updated(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=2)
+    db = SessionLocal()
+    if db.get_bind().dialect.name != "postgresql":
+        db.close()
+        pytest.skip("COPY import is PostgreSQL only")
+    try:
+        failures = db.query(Device.total_failures).filter(Device.id == "CIH-1000").scalar()
+    finally:
+        db.close()
+
+    rows = (
+        "1000,3. KAT,ODA 9,Monitör (yenilendi),Philips,MX450,S1,1\n"
+        "3001,1. KAT,ODA 1,İnfüzyon Pompası,B. Braun,Space,S2,4\n"
+        "3002,1. KAT,ODA 2,Aspiratör,Medela,Basic,S3,1\n"
+        "3001,1. KAT,ODA 1,İnfüzyon Pompası,B. Braun,Space,S2,4\n"
+    )
+    response = upload(client, auth_headers(data.users["manager"]), HEADER + rows)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_rows"], body["valid_rows"], body["inserted"], body["updated"]) == (4, 3, 2, 1)
+    assert [e["row"] for e in body["errors"]] == [5]
+
+    db = SessionLocal()
+    try:
+        updated = db.query(Device).filter(Device.id == "CIH-1000").one()
+        # Descriptive columns change, failure counters and metrics are kept
+        assert (updated.type, updated.location, updated.total_failures) == ("Monitör (yenilendi)", "3. KAT - ODA 9", failures)
+        new = db.query(Device).filter(Device.id == "CIH-3001").one()
+        assert (new.adet, new.total_failures, new.availability) == (4, 0, 100.0)
+    finally:
+        db.close()
+
+    # Importing the same file again only updates
+    body = upload(client, auth_headers(data.users["manager"]), HEADER + rows).json()
+    assert (body["inserted"], body["updated"]) == (0, 3)
+
+
+def test_copy_from_uses_the_driver_api(monkeypatch):
+    class Psycopg2Cursor:
+        def copy_expert(self, sql, source):
+            self.copied = (sql, source.read())
+
+    class Psycopg3Cursor:
+        chunks = []
+
+        def copy(self, sql):
+            self.sql = sql
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def write(self, chunk):
+            self.chunks.append(chunk)
+
+    rows = "CIH-1,Monitör\n" * 10
+    cursor = Psycopg2Cursor()
+    device_import.copy_from(cursor, "COPY t FROM STDIN", io.StringIO(rows))
+    assert cursor.copied == ("COPY t FROM STDIN", rows)
+
+    monkeypatch.setattr(device_import, "COPY_CHUNK_SIZE", 32)
+    cursor = Psycopg3Cursor()
+    device_import.copy_from(cursor, "COPY t FROM STDIN", io.StringIO(rows))
+    assert cursor.sql == "COPY t FROM STDIN"
+    assert "".join(cursor.chunks) == rows and len(cursor.chunks) == 5
@@ -0,0 +1,106 @@
+"""
+Historical fault import: the timezone for naive timestamps is validated
+before the file is read, and the COPY backfill rolls the rows into device and
+technician counters and recomputes iterations and metrics; re-importing the
+same file changes nothing (PostgreSQL only).
+"""
+
+import io
+from datetime import datetime, timezone
+
+import pytest
+
+from database import SessionLocal, Device, FaultRecord, User
+from tests.conftest import populate
+
+CSV = "device_id,description,created_at\nCIH-1000,Ekran görüntü vermiyor,01.03.2024 09:30\n"
+
+
+def upload(client, headers, **params):
+    files = {"file": ("arizalar.csv", io.BytesIO(CSV.encode("utf-8")), "text/csv")}
+    return client.post("/api/faults/import", files=files, params={"dry_run": True, **params}, headers=headers)
+
+
+@pytest.mark.parametrize("name", ["Mars/Olympus", "", "../../etc/passwd", "/etc/localtime", "Europe"])
+def test_unknown_timezone_is_rejected(client, auth_headers, name):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = upload(client, auth_headers(data.users["manager"]), timezone_name=name)
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Unknown timezone: {name}"
+
+
+def test_known_timezone(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = upload(client, auth_headers(data.users["manager"]), timezone_name="UTC")
+    assert response.status_code == 200
+    assert (response.json()["valid_rows"], response.json()["errors"]) == (1, [])
+
+
+HISTORY = (
+    "Cihaz ID,Açıklama,Bildirim Tarihi,Onarım Başlangıç,Onarım Bitiş,Teknisyen,Onarım Kategorisi\n"
+    "CIH-1000,Kompresör arızası,01.01.2020 08:00,01.01.2020 09:00,01.01.2020 12:00,tech0@test.hastane,complete_repair\n"
+    "CIH-1000,Alarm çalışmıyor,02.01.2020 08:00,,,,\n"
+    "CIH-1001,Batarya şişmiş,03.01.2020 10:00,03.01.2020 10:30,03.01.2020 11:30,TECH0@test.hastane,part_replacement\n"
+    "CIH-YOK,Cihaz yok,04.01.2020 10:00,,,,\n"
+)
+
+
+def snapshot():
+    db = SessionLocal()
+    try:
+        devices = {d.id: (d.total_failures, d.total_repair_hours, d.mtbf, d.mttr, d.availability)
+                   for d in db.query(Device)}
+        faults = {f.id: (f.device_id, f.breakdown_iteration, f.status) for f in db.query(FaultRecord)}
+        repairs = db.query(User.successful_repairs).filter(User.id == "tech0").scalar()
+        return devices, faults, repairs
+    finally:
+        db.close()
+
+
+def test_copy_backfill_and_rerun(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    db = SessionLocal()
+    if db.get_bind().dialect.name != "postgresql":
+        db.close()
+        pytest.skip("COPY import is PostgreSQL only")
+    db.close()
+    devices_before, faults_before, repairs_before = snapshot()
+
+    headers = auth_headers(data.users["quality"])
+    files = {"file": ("arizalar.csv", io.BytesIO(HISTORY.encode("utf-8")), "text/csv")}
+    body = client.post("/api/faults/import", files=files, headers=headers).json()
+    assert (body["total_rows"], body["valid_rows"], body["inserted"], body["affected_devices"]) == (4, 3, 3, 2)
+    assert body["errors"] == [{"row": 5, "error": "Unknown device: CIH-YOK"}]
+
+    devices, faults, repairs = snapshot()
+    imported = {i: f for i, f in faults.items() if i not in faults_before}
+    assert sorted(f[2] for f in imported.values()) == ["closed", "closed", "open"]
+    assert repairs == repairs_before + 2
+
+    db = SessionLocal()
+    try:
+        first = db.query(FaultRecord).filter(FaultRecord.description == "Kompresör arızası").one()
+        # Naive times are Europe/Istanbul by default
+        assert first.created_at == datetime(2020, 1, 1, 5, 0, tzinfo=timezone.utc)
+        assert (first.repair_duration, first.assigned_to, first.assigned_to_name) == (3.0, "tech0", "Teknisyen 0")
+        assert (first.confirmed_by, first.confirmed_at) == ("quality", first.repair_end)
+        for device_id in data.devices:
+            # Iterations follow created_at across imported and existing faults
+            ordered = db.query(FaultRecord.breakdown_iteration).filter(FaultRecord.device_id == device_id) \
+                .order_by(FaultRecord.created_at, FaultRecord.id).all()
+            assert [i for (i,) in ordered] == list(range(1, len(ordered) + 1))
+    finally:
+        db.close()
+
+    for device_id, added, hours in (("CIH-1000", 2, 3.0), ("CIH-1001", 1, 1.0)):
+        failures, repair_hours, mtbf, mttr, availability = devices[device_id]
+        assert (failures, repair_hours) == (devices_before[device_id][0] + added, devices_before[device_id][1] + hours)
+        assert mttr == pytest.approx(repair_hours / failures)
+        assert mtbf == pytest.approx((8760.0 - repair_hours) / failures)
+        assert availability == pytest.approx(mtbf / (mtbf + mttr) * 100)
+
+    # Same file again: deterministic ids, nothing inserted, counters untouched
+    files = {"file": ("arizalar.csv", io.BytesIO(HISTORY.encode("utf-8")), "text/csv")}
+    body = client.post("/api/faults/import", files=files, headers=headers).json()
+    assert (body["valid_rows"], body["inserted"], body["skipped_existing"]) == (3, 0, 3)
+    assert snapshot() == (devices, faults, repairs)
@@ -0,0 +1,97 @@
+"""
+Group-committed fault intake: concurrent reports are written in one
+transaction with per-device counters, and a report that cannot be written
+does not reject the others in its batch.
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from database import SessionLocal, Device, FaultRecord, Log
+from fault_intake import FaultIntakeQueue
+from tests.conftest import populate
+
+
+@pytest.fixture
+def intake(monkeypatch):
+    queue = FaultIntakeQueue(max_batch=50, max_wait_ms=200)
+    writes = []
+    write_batch = queue._write_batch
+
+    def recording(batch):
+        writes.append(len(batch))
+        write_batch(batch)
+
+    monkeypatch.setattr(queue, "_write_batch", recording)
+    yield queue, writes
+    queue.stop()
+
+
+def submit_all(queue, reports):
+    async def run():
+        return await asyncio.gather(*[queue.submit(d, text, "health_staff", "Health_Staff") for d, text in reports],
+                                    return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_reports_are_group_committed(client, intake):
+    queue, writes = intake
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    first, second = data.devices
+    db = SessionLocal()
+    try:
+        failures = dict(db.query(Device.id, Device.total_failures))
+    finally:
+        db.close()
+
+    results = submit_all(queue, [(first, "Alarm çalışmıyor"), ("CIH-YOK", "Cihaz yok"), (second, "Ekran kapalı"),
+                                 (first, "Batarya şişmiş")])
+
+    assert writes == [4]
+    assert isinstance(results[1], HTTPException) and results[1].status_code == 404
+    assert [r.breakdown_iteration for r in (results[0], results[3])] == [failures[first] + 1, failures[first] + 2]
+    assert results[2].breakdown_iteration == failures[second] + 1
+
+    db = SessionLocal()
+    try:
+        assert dict(db.query(Device.id, Device.total_failures)) == {first: failures[first] + 2, second: failures[second] + 1}
+        ids = [r.id for r in results if not isinstance(r, Exception)]
+        assert db.query(FaultRecord).filter(FaultRecord.id.in_(ids)).count() == 3
+        assert db.query(Log).filter(Log.record_id.in_(ids)).count() == 3
+    finally:
+        db.close()
+
+
+def test_failed_report_does_not_reject_its_batch(client, intake):
+    queue, writes = intake
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    device_id = data.devices[0]
+
+    # A missing description violates NOT NULL and fails the group insert
+    results = submit_all(queue, [(device_id, "Alarm çalışmıyor"), (device_id, None), (device_id, "Ekran kapalı")])
+
+    assert writes == [3, 1, 1, 1]
+    assert isinstance(results[1], HTTPException) and results[1].status_code == 503
+    assert [r.description for r in (results[0], results[2])] == ["Alarm çalışmıyor", "Ekran kapalı"]
+    assert results[2].breakdown_iteration == results[0].breakdown_iteration + 1
+
+    db = SessionLocal()
+    try:
+        assert db.query(FaultRecord).filter(FaultRecord.id.in_([results[0].id, results[2].id])).count() == 2
+    finally:
+        db.close()
+
+
+def test_intake_endpoint(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    headers = auth_headers(data.users["health_staff"])
+
+    response = client.post("/api/faults/intake", json={"device_id": data.devices[0], "description": "Alarm çalışmıyor"},
+                           headers=headers)
+    assert response.status_code == 200
+    assert response.json()["device_id"] == data.devices[0] and response.json()["created_by"] == "health_staff"
+
+    response = client.post("/api/faults/intake", json={"device_id": "CIH-YOK", "description": "Cihaz yok"}, headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,95 @@
+"""
+Offline technician sync: queued actions are applied in order, each one is
+checked against the fault's current state (including earlier actions of the
+same request) and conflicts are reported per action.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from database import SessionLocal, Device, FaultRecord
+from tests.conftest import populate
+
+NOTES = "Kart değiştirildi, kalibrasyon ve güvenlik testleri yapıldı"
+
+
+def action(kind, fault_id, at, action_id=None, **values):
+    return {"action": kind, "fault_id": fault_id, "client_timestamp": at.isoformat(), "client_action_id": action_id,
+            **values}
+
+
+def sync(client, headers, *actions):
+    response = client.post("/api/faults/sync", json={"actions": list(actions)}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_actions_apply_in_order(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    fault_id = data.assigned_faults[0]
+    now = datetime.now(timezone.utc)
+    end = action("end_repair", fault_id, now - timedelta(minutes=30), repair_notes=NOTES, repair_category="adjustment")
+
+    body = sync(client, auth_headers(data.users["technician"]),
+                {**end, "client_action_id": "erken-bitis"},
+                action("start_repair", fault_id, now - timedelta(hours=2), "baslat"),
+                {**end, "client_action_id": "bitir"})
+
+    assert [(r["id"], r["success"], r["detail"]) for r in body["results"]] == [
+        ("erken-bitis", False, "Repair not started yet"),
+        ("baslat", True, "Onarım başlatıldı"),
+        ("bitir", True, "Onarım tamamlandı (1.50 saat)"),
+    ]
+    assert body["applied"] == 2
+
+    db = SessionLocal()
+    try:
+        fault = db.query(FaultRecord).filter(FaultRecord.id == fault_id).one()
+        assert fault.repair_start is not None and fault.repair_end is not None
+        assert (round(fault.repair_duration, 2), fault.repair_notes, fault.repair_category) == (1.5, NOTES, "adjustment")
+        device = db.query(Device).filter(Device.id == data.devices[0]).one()
+        assert device.total_repair_hours >= 1.5
+    finally:
+        db.close()
+
+
+def test_conflicts_are_reported_per_action(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    now = datetime.now(timezone.utc)
+    started, ended = data.started_faults[0], data.ended_faults[0]
+
+    body = sync(client, auth_headers(data.users["technician"]),
+                action("start_repair", "ARZ-YOK", now),
+                action("start_repair", data.open_faults[0], now),
+                action("start_repair", started, now),
+                action("end_repair", ended, now, repair_notes=NOTES, repair_category="adjustment"),
+                action("end_repair", started, now - timedelta(hours=3), repair_notes=NOTES, repair_category="adjustment"),
+                action("end_repair", started, now, repair_notes="kısa", repair_category="adjustment"),
+                action("start_repair", data.assigned_faults[0], now + timedelta(hours=1)),
+                action("reset", data.assigned_faults[1], now))
+
+    assert [r["detail"] for r in body["results"]] == [
+        "Fault not found",
+        "Not assigned to you",
+        "Repair already started",
+        "Repair already ended",
+        "Repair end is before repair start",
+        "Onarım notları en az 20 karakter olmalıdır",
+        "Client timestamp is in the future",
+        "Unknown action: reset",
+    ]
+    assert body["applied"] == 0
+
+    db = SessionLocal()
+    try:
+        assert db.query(FaultRecord).filter(FaultRecord.id == started).one().repair_end is None
+        assert db.query(FaultRecord).filter(FaultRecord.id == data.assigned_faults[0]).one().repair_start is None
+    finally:
+        db.close()
+
+
+def test_sync_requires_technician(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = client.post("/api/faults/sync", headers=auth_headers(data.users["manager"]), json={
+        "actions": [action("start_repair", data.assigned_faults[0], datetime.now(timezone.utc))]
+    })
+    assert response.status_code == 403
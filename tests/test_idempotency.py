@@ -0,0 +1,139 @@
+"""
+Idempotency-Key on POST /faults and POST /transfers: retries replay the
+stored response, a reused key with another request is rejected, a retry that
+loses the insert race returns the winner's response, and old keys expire.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import idempotency
+import server
+from database import SessionLocal, Device, FaultRecord, IdempotencyKey
+from tests.conftest import populate
+
+
+def post_fault(client, headers, key, device_id, description="Monitör görüntü vermiyor"):
+    return client.post("/api/faults", json={"device_id": device_id, "description": description},
+                       headers={**headers, "Idempotency-Key": key})
+
+
+def fault_count(device_id):
+    db = SessionLocal()
+    try:
+        return db.query(FaultRecord).filter(FaultRecord.device_id == device_id).count()
+    finally:
+        db.close()
+
+
+def test_retry_replays_stored_response(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    device_id = data.devices[0]
+    headers = auth_headers(data.users["health_staff"])
+    before = fault_count(device_id)
+
+    first = post_fault(client, headers, "anahtar-1", device_id)
+    retry = post_fault(client, headers, "anahtar-1", device_id)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json() and retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert fault_count(device_id) == before + 1
+
+    # Keys are per user
+    other = post_fault(client, auth_headers(data.users["manager"]), "anahtar-1", device_id)
+    assert other.status_code == 200 and other.json()["id"] != first.json()["id"]
+
+    transfer = {"device_id": device_id, "to_location": "2. KAT - ODA 2", "reason": "Bölüm ihtiyacı"}
+    first = client.post("/api/transfers", json=transfer, headers={**headers, "Idempotency-Key": "anahtar-2"})
+    retry = client.post("/api/transfers", json=transfer, headers={**headers, "Idempotency-Key": "anahtar-2"})
+    assert retry.json() == first.json() and retry.headers["idempotent-replayed"] == "true"
+
+
+def test_key_reused_with_different_request(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    device_id = data.devices[0]
+    headers = auth_headers(data.users["health_staff"])
+    assert post_fault(client, headers, "anahtar-1", device_id).status_code == 200
+    before = fault_count(device_id)
+
+    response = post_fault(client, headers, "anahtar-1", device_id, description="Başka bir arıza")
+    assert response.status_code == 422
+    response = client.post("/api/transfers", json={"device_id": device_id, "to_location": "2. KAT", "reason": "Bölüm"},
+                           headers={**headers, "Idempotency-Key": "anahtar-1"})
+    assert response.status_code == 422
+    assert fault_count(device_id) == before
+
+
+def test_concurrent_retry_returns_winning_response(client, auth_headers, monkeypatch):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    device_id = data.devices[0]
+    headers = auth_headers(data.users["health_staff"])
+    winner = post_fault(client, headers, "anahtar-1", device_id).json()
+    db = SessionLocal()
+    try:
+        failures_before = db.query(Device.total_failures).filter(Device.id == device_id).scalar()
+    finally:
+        db.close()
+
+    # The retry checks for the key before the first request has committed it
+    monkeypatch.setattr(server, "find_stored_response", lambda *args: None)
+    response = post_fault(client, headers, "anahtar-1", device_id)
+
+    assert response.status_code == 200 and response.json() == winner
+    assert response.headers["idempotent-replayed"] == "true"
+    db = SessionLocal()
+    try:
+        # The loser's fault and counter update were rolled back
+        assert db.query(FaultRecord).filter(FaultRecord.description == "Monitör görüntü vermiyor").count() == 1
+        assert db.query(Device.total_failures).filter(Device.id == device_id).scalar() == failures_before
+    finally:
+        db.close()
+
+
+def test_conflicting_concurrent_request_is_rejected(client):
+    populate(devices=1, technicians=1, faults_per_device=1)
+    db = SessionLocal()
+    try:
+        db.add(IdempotencyKey(key="anahtar-1", user_id="health_staff", scope="POST /faults", request_hash="baska",
+                              response_body="{}"))
+        db.commit()
+        db.add(Device(id="CIH-YARIS", type="Monitör", location="1. KAT"))
+        with pytest.raises(HTTPException) as rejected:
+            idempotency.commit_with_key(db, "anahtar-1", "health_staff", "POST /faults", "istek", {"id": "x"})
+        assert rejected.value.status_code == 422
+        db.rollback()
+        assert db.query(Device).filter(Device.id == "CIH-YARIS").count() == 0
+    finally:
+        db.close()
+
+
+def test_expired_keys(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    device_id = data.devices[0]
+    headers = auth_headers(data.users["health_staff"])
+    first = post_fault(client, headers, "eski", device_id).json()
+    post_fault(client, headers, "yeni", device_id)
+
+    db = SessionLocal()
+    try:
+        expired_at = datetime.now(timezone.utc) - idempotency.IDEMPOTENCY_TTL - timedelta(minutes=1)
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == "eski").update({"created_at": expired_at})
+        db.commit()
+    finally:
+        db.close()
+
+    # An expired key is treated as new
+    retry = post_fault(client, headers, "eski", device_id)
+    assert retry.status_code == 200 and retry.json()["id"] != first["id"]
+    assert "idempotent-replayed" not in retry.headers
+
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == "eski").update({"created_at": expired_at})
+        db.commit()
+        assert idempotency.sweep_expired_keys(db) == 1
+        assert [k.key for k in db.query(IdempotencyKey)] == ["yeni"]
+    finally:
+        db.close()
@@ -0,0 +1,54 @@
+"""
+Memory diagnostics: tracemalloc lifecycle, snapshot diffs and live ORM
+object counts, restricted to quality users.
+"""
+
+import tracemalloc
+
+import pytest
+
+from tests.conftest import populate
+
+
+@pytest.fixture
+def quality(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=2)
+    yield data, auth_headers(data.users["quality"])
+    client.post("/api/quality/memory/tracemalloc/stop", headers=auth_headers(data.users["quality"]))
+    assert not tracemalloc.is_tracing()
+
+
+def test_snapshot_diff_and_top(client, quality):
+    data, headers = quality
+    assert client.post("/api/quality/memory/snapshots", headers=headers).status_code == 409
+
+    assert client.post("/api/quality/memory/tracemalloc/start", params={"frames": 3}, headers=headers).json()["tracing"]
+    base = client.post("/api/quality/memory/snapshots", params={"label": "önce"}, headers=headers).json()
+    assert client.get("/api/faults/all", headers=headers).status_code == 200
+    target = client.post("/api/quality/memory/snapshots", params={"label": "sonra"}, headers=headers).json()
+
+    diff = client.get("/api/quality/memory/diff", params={"base": base["id"], "target": target["id"], "group_by": "filename"},
+                      headers=headers).json()
+    assert diff["top"] and {"file", "line", "size_diff", "count_diff"} <= set(diff["top"][0])
+
+    top = client.get("/api/quality/memory/top", params={"group_by": "traceback", "limit": 5}, headers=headers).json()
+    assert len(top["top"]) <= 5 and "traceback" in top["top"][0]
+
+    status = client.get("/api/quality/memory", headers=headers).json()
+    assert [s["label"] for s in status["snapshots"]] == ["önce", "sonra"]
+    assert client.get("/api/quality/memory/diff", params={"base": "999"}, headers=headers).status_code == 404
+    assert client.get("/api/quality/memory/top", params={"group_by": "module"}, headers=headers).status_code == 400
+
+
+def test_live_objects_counts_orm_classes(client, quality):
+    data, headers = quality
+    counts = client.get("/api/quality/memory/objects", params={"collect": True}, headers=headers).json()["objects"]
+    assert {"Device", "FaultRecord", "User", "Session"} <= set(counts)
+    assert counts["Session"] >= 1
+
+
+def test_only_quality_can_use_memory_diagnostics(client, auth_headers, quality):
+    data, _ = quality
+    headers = auth_headers(data.users["manager"])
+    assert client.get("/api/quality/memory", headers=headers).status_code == 403
+    assert client.post("/api/quality/memory/tracemalloc/start", headers=headers).status_code == 403
@@ -0,0 +1,66 @@
+"""
+/metrics exposition: request counters and histograms are labelled with the
+route template and the caller's role, and pool/bcrypt gauges are present.
+"""
+
+import re
+
+from tests.conftest import populate
+
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return response.text
+
+
+def sample(text, name, **labels):
+    for line in text.splitlines():
+        if not line.startswith(name + "{") and not line.startswith(name + " "):
+            continue
+        if all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_request_metrics_use_route_template_and_role(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    headers = auth_headers(data.users["health_staff"])
+    before = scrape(client)
+    route = {"route": "/api/devices/{device_id}", "method": "GET", "role": "health_staff"}
+    start = sample(before, "tusep_http_requests_total", status="200", **route) or 0
+
+    for device_id in data.devices:
+        assert client.get(f"/api/devices/{device_id}", headers=headers).status_code == 200
+    assert client.get("/api/devices/CIH-YOK", headers=headers).status_code == 404
+
+    text = scrape(client)
+    assert sample(text, "tusep_http_requests_total", status="200", **route) == start + 2
+    assert sample(text, "tusep_http_requests_total", status="404", **route) >= 1
+    assert sample(text, "tusep_http_request_duration_seconds_bucket", le="+Inf", **route) >= start + 3
+    assert "CIH-YOK" not in text
+
+
+def test_unauthenticated_requests_are_anonymous(client):
+    client.get("/api/auth/me")
+    text = scrape(client)
+    assert sample(text, "tusep_http_requests_total", route="/api/auth/me", role="anonymous") >= 1
+
+
+def test_pool_report_and_bcrypt_series(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = client.get("/api/reports/excel/facility-issues", headers=auth_headers(data.users["quality"]))
+    assert response.status_code == 200
+    user = {"name": "Yeni Personel", "email": "yeni@test.hastane", "password": "12345", "role": "health_staff"}
+    assert client.post("/api/auth/register", json=user).status_code == 200
+    assert client.post("/api/auth/login", json={"email": user["email"], "password": "12345"}).status_code == 200
+
+    text = scrape(client)
+    assert sample(text, "tusep_report_generation_seconds_count", report="facility_issues") >= 1
+    assert sample(text, "tusep_bcrypt_duration_seconds_count", operation="hash") >= 1
+    assert sample(text, "tusep_bcrypt_duration_seconds_count", operation="verify") >= 1
+    assert sample(text, "tusep_bcrypt_queue_depth") == 0
+    assert sample(text, "tusep_db_pool_checkout_seconds_count") >= 1
+    assert sample(text, "tusep_db_pool_connections", state="checked_out") is not None
+    assert re.search(r"^tusep_db_pool_saturation [0-9.]+$", text, re.M)
@@ -0,0 +1,70 @@
+"""
+Mongo migration converter: devices are keyed by their code, fault and
+transfer device ids are rewritten from the Mongo uuid to that code, and
+missing record timestamps come from the ObjectId.
+"""
+
+import importlib.util
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from bson import ObjectId
+
+from database import Device, FaultRecord, EquipmentTransfer
+
+spec = importlib.util.spec_from_file_location(
+    "migrate_mongo_to_postgres", Path(__file__).resolve().parent.parent / "database" / "migrate_mongo_to_postgres.py"
+)
+migration = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(migration)
+
+DEVICE_UUID = "0b6f3c1e-5d7a-4e7b-9a51-2f1c8d0e4a11"
+DEVICE_CODES = {DEVICE_UUID: "MR-001"}
+
+
+def record(table, converted):
+    return dict(zip([c.name for c in table.columns], converted))
+
+
+def test_device_is_keyed_by_its_code():
+    object_id = ObjectId.from_datetime(datetime(2024, 3, 1, 8, 30, tzinfo=timezone.utc))
+    converted = record(Device.__table__, migration.DocumentConverter(Device.__table__).convert({
+        "_id": object_id, "id": DEVICE_UUID, "code": "MR-001", "type": "MR Cihazı", "location": "Radyoloji Bölümü",
+        "total_failures": 3, "mtbf": "2915.83", "availability": 99.86,
+    }))
+
+    assert converted["id"] == "MR-001"
+    assert (converted["type"], converted["total_failures"], converted["mtbf"]) == ("MR Cihazı", 3, 2915.83)
+    assert converted["created_at"] == datetime(2024, 3, 1, 8, 30, tzinfo=timezone.utc)
+    assert converted["total_repair_hours"] == 0.0 and converted["adet"] == 1
+
+    with pytest.raises(ValueError, match="missing required field code"):
+        migration.DocumentConverter(Device.__table__).convert({"_id": object_id, "id": DEVICE_UUID,
+                                                               "type": "MR Cihazı", "location": "Radyoloji"})
+
+
+def test_fault_and_transfer_point_at_the_device_code():
+    converter = migration.DocumentConverter(FaultRecord.__table__, DEVICE_CODES)
+    converted = record(FaultRecord.__table__, converter.convert({
+        "_id": ObjectId(), "id": "fault-1", "created_by": "user-1", "created_by_name": "Dr. Ayşe Yılmaz",
+        "created_at": "2024-03-05T10:00:00+00:00", "device_id": DEVICE_UUID, "device_code": "MR-001",
+        "device_type": "MR Cihazı", "description": "Görüntü kalitesinde bozulma var", "repair_duration": 4,
+        "breakdown_iteration": 1, "status": "closed",
+    }))
+    assert (converted["id"], converted["device_id"]) == ("fault-1", "MR-001")
+    assert converted["created_at"] == datetime(2024, 3, 5, 10, tzinfo=timezone.utc)
+    assert converted["repair_duration"] == 4.0
+
+    with pytest.raises(ValueError, match="unknown device"):
+        converter.convert({"_id": ObjectId(), "id": "fault-2", "created_by": "user-1", "device_id": "silinmis-cihaz",
+                           "description": "Cihaz yok"})
+
+    converter = migration.DocumentConverter(EquipmentTransfer.__table__, DEVICE_CODES)
+    converted = record(EquipmentTransfer.__table__, converter.convert({
+        "_id": ObjectId(), "id": "transfer-1", "device_id": DEVICE_UUID, "from_location": "Radyoloji Bölümü",
+        "to_location": "Acil Servis", "requested_by": "user-1", "reason": "Bölüm ihtiyacı",
+        "requested_at": datetime(2024, 3, 6, 9, 0),
+    }))
+    assert (converted["device_id"], converted["status"]) == ("MR-001", "pending")
+    assert converted["requested_at"] == datetime(2024, 3, 6, 9, tzinfo=timezone.utc)
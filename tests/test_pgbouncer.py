@@ -0,0 +1,68 @@
+"""
+PgBouncer transaction-pooling mode: engine options, no session-level state
+in any endpoint's SQL, and the workflow running on a NullPool engine.
+"""
+
+import re
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+import database
+from tests.test_query_budgets import BUDGETS, SMALL, count_statements
+
+# Statements whose effect outlives the transaction they run in
+SESSION_STATE = re.compile(
+    r"^\s*(SET\s+(?!LOCAL\b|TRANSACTION\b)|RESET\b|LISTEN\b|PREPARE\b|DISCARD\b|LOAD\b)|pg_advisory_lock|\bWITH\s+HOLD\b",
+    re.IGNORECASE)
+
+
+def test_engine_options(monkeypatch):
+    monkeypatch.setattr(database, "DB_PGBOUNCER", True)
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 0)
+    options = database.engine_options("postgresql+psycopg://u:p@pgbouncer:6432/tusep")
+    assert options["poolclass"] is NullPool and options["connect_args"] == {"prepare_threshold": None}
+    assert database.engine_options("postgresql://u:p@pgbouncer:6432/tusep")["connect_args"] == {}
+
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 2)
+    options = database.engine_options("postgresql://u:p@pgbouncer:6432/tusep")
+    assert "poolclass" not in options and options["pool_size"] == 2
+
+    monkeypatch.setattr(database, "DB_PGBOUNCER", False)
+    assert "connect_args" not in database.engine_options("postgresql://u:p@localhost/tusep")
+
+
+@pytest.mark.parametrize("name", list(BUDGETS))
+def test_no_session_state(client, query_counter, auth_headers, name):
+    statements = count_statements(client, query_counter, auth_headers, name, SMALL)
+    assert not [s for s in statements if SESSION_STATE.search(s)]
+
+
+@pytest.fixture
+def null_pool_engine(monkeypatch):
+    monkeypatch.setattr(database, "DB_PGBOUNCER", True)
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 0)
+    url = database.engine.url.render_as_string(hide_password=False)
+    options = database.engine_options(url)
+    if "poolclass" not in options:
+        pytest.skip("SQLite keeps its own pooling")
+
+    null_engine = create_engine(url, **options)
+    database.SessionLocal.configure(bind=null_engine)
+    yield null_engine
+    database.SessionLocal.configure(bind=database.engine)
+    null_engine.dispose()
+
+
+def backends(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")).scalar()
+
+
+def test_workflow_on_null_pool(client, query_counter, auth_headers, null_pool_engine):
+    before = backends(database.engine)
+    for name in ("create_fault", "assign", "start_repair", "end_repair", "confirm", "dashboard", "excel_failure_frequency"):
+        count_statements(client, query_counter, auth_headers, name, SMALL)
+    # Every request closed its connection instead of keeping it idle
+    assert backends(database.engine) <= before
@@ -0,0 +1,98 @@
+"""
+On-demand profiler: X-Profile requests from quality users leave a folded
+stack file in a bounded directory; other callers are served unprofiled
+without taking the profiler slot.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from profiler import profiler
+from tests.conftest import populate
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    directory, max_files = profiler.store.directory, profiler.store.max_files
+    profiler.store.directory, profiler.store.max_files = tmp_path, 2
+    yield tmp_path
+    profiler.store.directory, profiler.store.max_files = directory, max_files
+
+
+def test_quality_request_profile_is_saved(client, auth_headers, profile_dir):
+    data = populate(devices=3, technicians=1, faults_per_device=2)
+    headers = {**auth_headers(data.users["quality"]), "X-Profile": "1"}
+    response = client.get("/api/faults/all", headers=headers)
+    assert response.status_code == 200
+
+    name = response.headers["x-profile-name"]
+    assert "_request_GET-api-faults-all" in name
+    content = (profile_dir / name).read_text()
+    for line in content.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+    listed = client.get("/api/quality/profiler/profiles", headers=auth_headers(data.users["quality"])).json()
+    assert [p["name"] for p in listed] == [name]
+    download = client.get(f"/api/quality/profiler/profiles/{name}", headers=auth_headers(data.users["quality"]))
+    assert download.text == content
+
+
+def test_other_roles_are_not_profiled(client, auth_headers, profile_dir):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = client.get("/api/faults", headers={**auth_headers(data.users["manager"]), "X-Profile": "1"})
+    assert response.status_code == 200
+    assert "x-profile-name" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+    assert client.get("/api/quality/profiler/profiles", headers=auth_headers(data.users["manager"])).status_code == 403
+
+
+def test_unauthorized_requests_do_not_take_the_profiler(client, auth_headers, profile_dir, monkeypatch):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    begun = []
+    try_begin = profiler.try_begin
+    monkeypatch.setattr(profiler, "try_begin", lambda **kwargs: begun.append(kwargs) or try_begin(**kwargs))
+
+    for headers in ({}, {"Authorization": "Bearer gecersiz"}, {"Authorization": "Basic cXVhbGl0eQ=="},
+                    auth_headers(data.users["manager"]), auth_headers("silinmis-kullanici")):
+        response = client.get("/api/health", headers={**headers, "X-Profile": "1"})
+        assert response.status_code == 200 and "x-profile-name" not in response.headers
+    assert begun == []
+
+    response = client.get("/api/health", headers={**auth_headers(data.users["quality"]), "X-Profile": "1"})
+    assert len(begun) == 1 and response.headers["x-profile-name"]
+
+
+def test_profile_is_written_off_the_event_loop(client, auth_headers, profile_dir, monkeypatch):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    on_loop = []
+    finish = profiler.finish
+
+    def recording(sampler, name):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        finish(sampler, name)
+
+    monkeypatch.setattr(profiler, "finish", recording)
+    response = client.get("/api/health", headers={**auth_headers(data.users["quality"]), "X-Profile": "1"})
+    assert on_loop == [False]
+    assert (profile_dir / response.headers["x-profile-name"]).is_file()
+
+
+def test_window_is_exclusive_and_directory_is_bounded(client, auth_headers, profile_dir):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    headers = auth_headers(data.users["quality"])
+    for _ in range(3):
+        first = client.post("/api/quality/profiler/sample", params={"seconds": 0.2}, headers=headers)
+        assert first.status_code == 200
+        assert client.post("/api/quality/profiler/sample", params={"seconds": 0.2}, headers=headers).status_code == 409
+        time.sleep(0.6)
+
+    assert len(list(profile_dir.glob("*.folded"))) == 2
+    assert client.get("/api/quality/profiler/profiles/..%2Fsecret.folded", headers=headers).status_code == 404
+    assert client.post("/api/quality/profiler/sample", params={"seconds": 3600}, headers=headers).status_code == 400
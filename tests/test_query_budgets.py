@@ -0,0 +1,106 @@
+"""
+Per-endpoint SQL statement budgets.
+
+Each endpoint is called against a small and a larger dataset (more devices,
+technicians, faults and transfers; bulk payloads grow with the data). The test
+fails when the number of statements differs between the two sizes, which is
+how N+1 patterns show up, or when it exceeds the declared budget.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from tests.conftest import populate
+
+SMALL = {"devices": 3, "technicians": 2, "faults_per_device": 2}
+LARGE = {"devices": 12, "technicians": 6, "faults_per_device": 5}
+
+YEAR = datetime.now(timezone.utc).year
+NOTES = "Arızalı parça değiştirildi, fonksiyon testleri yapıldı"
+
+
+def sync_actions(data):
+    now = datetime.now(timezone.utc)
+    actions = [{"action": "start_repair", "fault_id": f, "client_timestamp": (now - timedelta(minutes=5)).isoformat()}
+               for f in data.assigned_faults]
+    actions += [{"action": "end_repair", "fault_id": f, "client_timestamp": now.isoformat(),
+                 "repair_notes": NOTES, "repair_category": "adjustment"} for f in data.started_faults]
+    return {"actions": actions}
+
+
+# name: (budget, role, build(data) -> (method, url, request kwargs))
+BUDGETS = {
+    "auth_me": (1, "health_staff", lambda d: ("GET", "/api/auth/me", {})),
+    "users": (2, "manager", lambda d: ("GET", "/api/users", {})),
+    "technicians": (2, "manager", lambda d: ("GET", "/api/users/technicians", {})),
+    "create_device": (3, "manager", lambda d: ("POST", "/api/devices", {"json": {"type": "Monitör", "location": "1. KAT - ODA 1"}})),
+    "devices": (2, "health_staff", lambda d: ("GET", "/api/devices", {})),
+    "devices_fields": (2, "health_staff", lambda d: ("GET", "/api/devices", {"params": {"fields": "id,type"}})),
+    "device": (2, "health_staff", lambda d: ("GET", f"/api/devices/{d.devices[0]}", {})),
+    "device_details": (5, "health_staff", lambda d: ("GET", f"/api/devices/{d.devices[0]}/details", {})),
+    "device_faults": (2, "health_staff", lambda d: ("GET", f"/api/devices/{d.devices[0]}/faults", {})),
+    "create_fault": (8, "health_staff", lambda d: ("POST", "/api/faults", {"json": {"device_id": d.devices[0], "description": "Cihaz açılmıyor"}})),
+    "faults": (2, "manager", lambda d: ("GET", "/api/faults", {})),
+    "faults_all": (2, "quality", lambda d: ("GET", "/api/faults/all", {})),
+    "fault": (2, "health_staff", lambda d: ("GET", f"/api/faults/{d.faults[0]}", {})),
+    "assign": (7, "manager", lambda d: ("POST", f"/api/faults/{d.open_faults[0]}/assign", {"json": {"assigned_to": d.technicians[0]}})),
+    "bulk_assign": (5, "manager", lambda d: ("POST", "/api/faults/bulk-assign", {"json": {"assignments": [
+        {"fault_id": f, "assigned_to": d.technicians[i % len(d.technicians)]} for i, f in enumerate(d.open_faults)
+    ]}})),
+    "sync": (6, "technician", lambda d: ("POST", "/api/faults/sync", {"json": sync_actions(d)})),
+    "start_repair": (5, "technician", lambda d: ("POST", f"/api/faults/{d.assigned_faults[0]}/start-repair", {})),
+    "end_repair": (8, "technician", lambda d: ("POST", f"/api/faults/{d.started_faults[0]}/end-repair", {"json": {
+        "repair_notes": NOTES, "repair_category": "part_replacement"
+    }})),
+    "confirm": (7, "health_staff", lambda d: ("POST", f"/api/faults/{d.ended_faults[0]}/confirm", {})),
+    "dashboard": (7, "manager", lambda d: ("GET", "/api/dashboard/stats", {})),
+    "breakdown_frequency": (2, "manager", lambda d: ("GET", "/api/reports/breakdown-frequency", {})),
+    "intervention_duration": (2, "manager", lambda d: ("GET", "/api/reports/intervention-duration", {})),
+    "technician_performance": (3, "manager", lambda d: ("GET", "/api/reports/technician-performance", {})),
+    "create_transfer": (4, "health_staff", lambda d: ("POST", "/api/transfers", {"json": {
+        "device_id": d.devices[0], "to_location": "2. KAT - ODA 2", "reason": "Bölüm ihtiyacı"
+    }})),
+    "transfers": (2, "quality", lambda d: ("GET", "/api/transfers", {})),
+    "approve_transfer": (5, "quality", lambda d: ("POST", f"/api/transfers/{d.pending_transfers[0]}/approve", {})),
+    "bulk_approve": (5, "quality", lambda d: ("POST", "/api/transfers/bulk-approve", {"json": {
+        "transfer_ids": d.pending_transfers[::2]
+    }})),
+    "reject_transfer": (3, "quality", lambda d: ("POST", f"/api/transfers/{d.pending_transfers[0]}/reject", {"json": {
+        "rejection_reason": "Hedef bölümde yer yok"
+    }})),
+    "excel_failure_frequency": (3, "quality", lambda d: ("GET", "/api/reports/excel/device-failure-frequency", {"params": {"year": YEAR}})),
+    "excel_intervention_duration": (3, "quality", lambda d: ("GET", "/api/reports/excel/intervention-duration", {"params": {"year": YEAR}})),
+    "excel_facility_issues": (2, "quality", lambda d: ("GET", "/api/reports/excel/facility-issues", {"params": {"year": YEAR}})),
+    "all_logs": (2, "quality", lambda d: ("GET", "/api/quality/all-logs", {})),
+    "system_stats": (6, "quality", lambda d: ("GET", "/api/quality/system-stats", {})),
+    "batch": (10, "manager", lambda d: ("POST", "/api/batch", {"json": {"operations": [
+        {"path": "/dashboard/stats"}, {"path": "/reports/breakdown-frequency"}, {"path": f"/devices/{d.devices[0]}"}
+    ]}})),
+}
+
+
+def count_statements(client, query_counter, auth_headers, name, size):
+    budget, role, build = BUDGETS[name]
+    data = populate(**size)
+    method, url, kwargs = build(data)
+    user_id = data.users[role]
+
+    with query_counter:
+        response = client.request(method, url, headers=auth_headers(user_id), **kwargs)
+
+    assert response.status_code == 200, response.text
+    return query_counter.statements
+
+
+@pytest.mark.parametrize("name", list(BUDGETS))
+def test_query_budget(client, query_counter, auth_headers, name):
+    budget = BUDGETS[name][0]
+    small = count_statements(client, query_counter, auth_headers, name, SMALL)
+    large = count_statements(client, query_counter, auth_headers, name, LARGE)
+
+    listing = "\n".join(large)
+    assert len(large) == len(small), (
+        f"{name}: statement count grows with data size ({len(small)} -> {len(large)}):\n{listing}"
+    )
+    assert len(large) <= budget, f"{name}: {len(large)} statements, budget is {budget}:\n{listing}"
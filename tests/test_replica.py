@@ -0,0 +1,123 @@
+"""
+Read-replica routing: @read_only endpoints read from the replica in READ ONLY
+transactions, fall back to the primary after a write or when the replica
+lags, and every other endpoint stays on the primary.
+
+Uses TEST_REPLICA_DATABASE_URL (e.g. a streaming standby of TEST_DATABASE_URL);
+on SQLite a second database file is kept in sync by copying the rows.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text
+
+import database
+from replica import replica_router, STICKY_COOKIE
+from tests.conftest import QueryCounter, populate
+
+
+def replica_url():
+    if os.environ.get("TEST_REPLICA_DATABASE_URL"):
+        return os.environ["TEST_REPLICA_DATABASE_URL"]
+    if database.engine.dialect.name == "sqlite":
+        return f"sqlite:///{Path(tempfile.mkdtemp()) / 'tusep_replica.db'}"
+    pytest.skip("TEST_REPLICA_DATABASE_URL is not set")
+
+
+def catch_up(replica_engine):
+    """Wait for a streaming standby to replay the primary's WAL, or copy the rows into a standalone copy."""
+    with replica_engine.connect() as conn:
+        standby = conn.dialect.name == "postgresql" and conn.execute(text("SELECT pg_is_in_recovery()")).scalar()
+    if standby:
+        with database.engine.connect() as conn:
+            lsn = conn.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+        deadline = time.monotonic() + 10
+        with replica_engine.connect() as conn:
+            while not conn.execute(text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"), {"lsn": lsn}).scalar():
+                assert time.monotonic() < deadline, "replica did not catch up"
+                time.sleep(0.05)
+        return
+
+    database.Base.metadata.drop_all(bind=replica_engine)
+    database.Base.metadata.create_all(bind=replica_engine)
+    with database.engine.connect() as source, replica_engine.begin() as target:
+        for table in database.Base.metadata.sorted_tables:
+            rows = source.execute(select(table)).mappings().all()
+            if rows:
+                target.execute(insert(table), [dict(r) for r in rows])
+
+
+@pytest.fixture
+def replica(client):
+    replica_engine = create_engine(replica_url(), **database.engine_options(replica_url()))
+    replica_router.configure(database.engine, replica_engine)
+    client.cookies.clear()
+    yield replica_engine, QueryCounter(replica_engine)
+    replica_router.configure(database.engine, database.replica_engine)
+    client.cookies.clear()
+    replica_engine.dispose()
+
+
+def test_reports_and_dashboard_read_from_replica(client, auth_headers, query_counter, replica):
+    replica_engine, replica_counter = replica
+    data = populate(devices=2, technicians=1, faults_per_device=2)
+    catch_up(replica_engine)
+
+    for role, url in (("manager", "/api/dashboard/stats"), ("manager", "/api/reports/breakdown-frequency"),
+                      ("quality", "/api/reports/excel/device-failure-frequency")):
+        with query_counter, replica_counter:
+            response = client.get(url, headers=auth_headers(data.users[role]))
+        assert response.status_code == 200
+        assert query_counter.count == 0 and replica_counter.count > 0, url
+
+    batch = {"operations": [{"path": "/dashboard/stats"}, {"path": "/reports/breakdown-frequency"},
+                            {"path": "/reports/intervention-duration"}]}
+    with query_counter, replica_counter:
+        response = client.post("/api/batch", json=batch, headers=auth_headers(data.users["manager"]))
+    assert [r["status"] for r in response.json()["results"]] == [200, 200, 200]
+    assert query_counter.count == 0 and replica_counter.count > 0
+
+    with query_counter, replica_counter:
+        assert client.get("/api/faults", headers=auth_headers(data.users["manager"])).status_code == 200
+    assert query_counter.count > 0 and replica_counter.count == 0
+
+
+def test_read_your_writes_and_lag_fallback(client, auth_headers, query_counter, replica, monkeypatch):
+    replica_engine, replica_counter = replica
+    data = populate(devices=2, technicians=1, faults_per_device=2)
+    catch_up(replica_engine)
+    headers = auth_headers(data.users["health_staff"])
+
+    response = client.post("/api/faults", json={"device_id": data.devices[0], "description": "Ekran görüntü vermiyor"},
+                           headers=headers)
+    assert response.status_code == 200 and STICKY_COOKIE in response.headers["set-cookie"]
+
+    with query_counter, replica_counter:
+        stats = client.get("/api/dashboard/stats", headers=headers).json()
+    assert stats["total_faults"] == len(data.faults) + 1
+    assert query_counter.count > 0 and replica_counter.count == 0
+
+    client.cookies.clear()
+    monkeypatch.setattr(replica_router, "max_lag_seconds", -1)
+    with query_counter, replica_counter:
+        assert client.get("/api/dashboard/stats", headers=headers).status_code == 200
+    # Only the lag check itself reaches the replica
+    assert query_counter.count > 0 and all("pg_is_in_recovery" in s for s in replica_counter.statements)
+
+
+def test_read_only_transactions(client, replica):
+    if database.engine.dialect.name != "postgresql":
+        pytest.skip("READ ONLY transactions are a PostgreSQL feature")
+    read_route = next(r for r in client.app.routes if getattr(r, "path", None) == "/api/dashboard/stats")
+
+    for cookie in ((), ((b"cookie", f"{STICKY_COOKIE}={time.time() + 60}".encode()),)):
+        bind = replica_router.bind_for({"route": read_route, "headers": list(cookie)})
+        with bind.connect() as conn:
+            assert conn.execute(text("SHOW transaction_read_only")).scalar() == "on"
+    # The primary connection goes back to the pool without the read-only flag
+    with database.engine.connect() as conn:
+        assert conn.execute(text("SHOW transaction_read_only")).scalar() == "off"
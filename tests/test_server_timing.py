@@ -0,0 +1,43 @@
+"""
+Server-Timing header: every /api response carries its time breakdown and
+is readable cross-origin.
+"""
+
+import re
+
+from tests.conftest import populate
+
+YEAR_PARAMS = {"year": 2025}
+
+
+def phases(response):
+    header = response.headers["server-timing"]
+    return {m.group(1): float(m.group(2)) for m in re.finditer(r"(\w+);dur=([0-9.]+)", header)}
+
+
+def test_model_response_has_auth_db_and_serialization(client, auth_headers):
+    data = populate(devices=3, technicians=1, faults_per_device=2)
+    response = client.get("/api/faults", headers=auth_headers(data.users["manager"]))
+    assert response.status_code == 200
+
+    timing = phases(response)
+    assert {"pool", "auth", "db", "serialize", "total"} <= set(timing)
+    assert timing["total"] >= timing["auth"]
+    assert 'desc="2 statements"' in response.headers["server-timing"]
+    assert response.headers["timing-allow-origin"]
+
+
+def test_excel_report_reports_rendering_time(client, auth_headers):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    response = client.get("/api/reports/excel/facility-issues", params=YEAR_PARAMS,
+                          headers=auth_headers(data.users["quality"]))
+    assert response.status_code == 200
+    timing = phases(response)
+    assert "excel" in timing
+    assert "serialize" not in timing
+
+
+def test_errors_still_carry_the_header(client):
+    response = client.get("/api/auth/me", headers={"Authorization": "Bearer bozuk"})
+    assert response.status_code == 401
+    assert "total" in phases(response)
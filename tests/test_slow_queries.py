@@ -0,0 +1,50 @@
+"""
+Slow-query log: entries carry the originating route and parameter shapes
+(never values), and only quality users can read them.
+"""
+
+import pytest
+
+from slow_queries import slow_query_log, normalize_statement, parameter_shape
+from tests.conftest import populate
+
+
+@pytest.fixture
+def log_everything():
+    threshold = slow_query_log.threshold_ms
+    slow_query_log.threshold_ms = 0
+    slow_query_log.clear()
+    yield slow_query_log
+    slow_query_log.threshold_ms = threshold
+    slow_query_log.clear()
+
+
+def test_entries_have_route_and_parameter_shapes(client, auth_headers, log_everything):
+    data = populate(devices=2, technicians=1, faults_per_device=1)
+    device_id = data.devices[0]
+    response = client.get(f"/api/devices/{device_id}", headers=auth_headers(data.users["health_staff"]))
+    assert response.status_code == 200
+
+    entries = [e for e in log_everything.entries() if e["route"] == "GET /api/devices/{device_id}"]
+    assert entries
+    device_query = next(e for e in entries if "FROM devices" in e["statement"])
+    assert device_id not in str(device_query["parameters"])
+    assert "str(" in str(device_query["parameters"])
+
+
+def test_only_quality_can_view(client, auth_headers, log_everything):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    assert client.get("/api/quality/slow-queries", headers=auth_headers(data.users["manager"])).status_code == 403
+
+    response = client.get("/api/quality/slow-queries", params={"limit": 5}, headers=auth_headers(data.users["quality"]))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["threshold_ms"] == 0
+    assert len(body["queries"]) <= 5
+
+
+def test_in_lists_collapse_and_executemany_shape():
+    statement = "SELECT * FROM devices WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+    assert normalize_statement(statement) == "SELECT * FROM devices WHERE id IN (...)"
+    shape = parameter_shape([{"id": "a", "n": 1}, {"id": "b", "n": None}], executemany=True)
+    assert shape == {"rows": 2, "row": {"id": "str(1)", "n": "int"}}
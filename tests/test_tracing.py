@@ -0,0 +1,73 @@
+"""
+Tracing: sampled requests produce a span tree in the JSON-lines file,
+unsampled ones produce nothing, and an incoming traceparent is continued.
+"""
+
+import json
+
+import pytest
+
+import tracing
+from tests.conftest import populate
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing.exporter, "path", tmp_path / "traces.jsonl")
+
+    def read():
+        tracing.exporter.flush()
+        path = tmp_path / "traces.jsonl"
+        return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+    return read
+
+
+def test_sampled_request_has_linked_child_spans(client, auth_headers, trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = client.post(f"/api/faults/{data.ended_faults[0]}/confirm", headers=auth_headers(data.users["health_staff"]))
+    assert response.status_code == 200
+
+    trace_id = response.headers["traceparent"].split("-")[1]
+    spans = [s for s in trace_file() if s["trace_id"] == trace_id]
+    by_id = {s["span_id"]: s for s in spans}
+    root = next(s for s in spans if s["parent_span_id"] is None)
+    assert root["name"] == "POST /api/faults/{fault_id}/confirm"
+    assert root["attributes"]["http.status_code"] == 200
+    assert root["attributes"]["user.role"] == "health_staff"
+
+    names = {s["name"] for s in spans}
+    assert {"db.checkout", "db.query", "orm.flush"} <= names
+    assert all(s["parent_span_id"] in by_id for s in spans if s is not root)
+    assert any(s["attributes"].get("audit.log_entries") for s in spans if s["name"] == "orm.flush")
+
+
+def test_report_render_span(client, auth_headers, trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    response = client.get("/api/reports/excel/device-failure-frequency", headers=auth_headers(data.users["quality"]))
+    assert response.status_code == 200
+
+    spans = trace_file()
+    render = next(s for s in spans if s["name"] == "report.render")
+    assert render["attributes"]["report"] == "device_failure_frequency"
+    assert any(s["name"] == "report.save" and s["parent_span_id"] == render["span_id"] for s in spans)
+
+
+def test_head_sampling_and_traceparent(client, auth_headers, trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    headers = auth_headers(data.users["manager"])
+
+    response = client.get("/api/faults", headers=headers)
+    assert "traceparent" not in response.headers
+    assert trace_file() == []
+
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    client.get("/api/faults", headers={**headers, "traceparent": f"00-{trace_id}-{parent_id}-00"})
+    assert trace_file() == []
+
+    response = client.get("/api/faults", headers={**headers, "traceparent": f"00-{trace_id}-{parent_id}-01"})
+    assert response.headers["traceparent"].startswith(f"00-{trace_id}-")
+    root = next(s for s in trace_file() if s["kind"] == "server")
+    assert root["trace_id"] == trace_id and root["parent_span_id"] == parent_id
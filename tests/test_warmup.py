@@ -0,0 +1,59 @@
+"""
+Startup warm-up: /api/ready stays 503 until the steps have run, required
+steps are retried, and pool statistics are visible to quality users.
+"""
+
+import threading
+
+import server
+from tests.conftest import populate
+from warmup import Warmup
+
+
+def test_ready_after_startup_warmup(client):
+    assert client.get("/api/health").json() == {"status": "ok"}
+
+    response = client.get("/api/ready")
+    assert response.status_code == 200
+    status = response.json()
+    assert status["ready"] and status["state"] == "ready"
+    assert {"pool", "tables", "queries", "bcrypt"} <= set(status["steps"])
+    assert status["steps"]["pool"]["ok"]
+
+
+def test_not_ready_until_steps_finish(client, monkeypatch):
+    release = threading.Event()
+    attempts = []
+    pending = Warmup(retry_seconds=0)
+
+    @pending.step("blocking")
+    def blocking():
+        release.wait(5)
+
+    @pending.step("flaky", required=True)
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("database is starting up")
+
+    monkeypatch.setattr(server, "warmup", pending)
+    assert client.get("/api/ready").status_code == 503
+
+    pending.start()
+    assert client.get("/api/ready").status_code == 503
+    release.set()
+    assert pending.wait(5)
+
+    status = client.get("/api/ready").json()
+    assert status["ready"] and len(attempts) == 3 and status["steps"]["flaky"]["ok"]
+
+
+def test_pool_stats_for_quality_only(client, auth_headers):
+    data = populate(devices=1, technicians=1, faults_per_device=1)
+    assert client.get("/api/faults", headers=auth_headers(data.users["manager"])).status_code == 200
+
+    stats = client.get("/api/quality/pool", headers=auth_headers(data.users["quality"])).json()
+    assert stats["checked_out"] >= 1 and stats["capacity"] >= stats["size"] >= 1
+    assert stats["checkouts"] >= 2 and stats["avg_checkout_wait_ms"] is not None
+    assert stats["warmup"]["ready"]
+    assert client.get("/api/quality/pool", headers=auth_headers(data.users["manager"])).status_code == 403